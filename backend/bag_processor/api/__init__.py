@@ -3,9 +3,13 @@ API package for the RosBag Cockpit application.
 This package contains all the API routes, models, and utilities for the application.
 """
 
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from . import routes
+from .compression import CompressionMiddleware
 from .exception_handlers import register_exception_handlers
 from .routes import router as api_router
 
@@ -18,6 +22,23 @@ app = FastAPI(
 )
 register_exception_handlers(app)
 
+
+async def catalog_etag() -> str:
+    """Version of the catalog the cached catalog responses were built from."""
+    return (await routes.database_service.get_catalog_version()).etag
+
+
+# Compress responses and cache the compressed catalog listings until the catalog
+# changes, RESPONSE_CACHE_MB=0 disables the cache. Added before CORS, so the CORS
+# headers are added to cached responses as well.
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=1024,
+    cache_paths=("/api/stats", "/api/rosbags"),
+    cache_version=catalog_etag,
+    cache_max_bytes=int(os.getenv("RESPONSE_CACHE_MB", "32")) * 1024 * 1024,
+)
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,295 @@
+"""
+Response compression for the RosBag Cockpit API.
+
+Catalog responses repeat the same keys, topic names and paths for every bag and
+shrink to a fraction with any compressor. CompressionMiddleware negotiates the
+encoding through Accept-Encoding: zstd and brotli when their packages are
+installed, gzip always. It can also keep the compressed bodies of expensive
+GET endpoints, keyed by a version of the data they are built from, so repeated
+requests are answered without running the endpoint or compressing again.
+"""
+
+import gzip
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .logging import server_logger
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compressors by content coding, in order of preference. The levels favor speed,
+# the responses are compressed per request.
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = lambda body: zstandard.ZstdCompressor(level=3).compress(body)
+if brotli is not None:
+    COMPRESSORS["br"] = lambda body: brotli.compress(body, quality=5)
+COMPRESSORS["gzip"] = lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml")
+
+# Larger bodies are compressed on a worker thread, so they do not block the event loop
+THREAD_THRESHOLD = 64 * 1024
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Sequence[str]) -> Optional[str]:
+    """
+    Choose the content coding of a response from the Accept-Encoding header.
+
+    Args:
+        accept_encoding: Accept-Encoding header, like "gzip, br;q=0.8"
+        encodings: Codings the server supports, in order of preference
+
+    Returns:
+        The coding with the highest q-value, the server's preference on ties, or
+        None to send the response uncompressed
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, *params = part.strip().split(";")
+        weight = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding.strip():
+            weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for coding in encodings:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class CachedResponse(NamedTuple):
+    """Complete response stored by ResponseCache."""
+
+    version: str
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+class ResponseCache:
+    """Least recently used cache of complete responses, bounded by their total body size."""
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Maximum total size of the cached bodies
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+
+    def get(self, key: tuple, version: str) -> Optional[CachedResponse]:
+        """
+        Get the cached response of a key if it was built from this version.
+
+        Args:
+            key: Request key, see CompressionMiddleware
+            version: Current version of the data behind the response
+
+        Returns:
+            CachedResponse or None
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry.version != version:
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, entry: CachedResponse) -> None:
+        """
+        Store a response, evicting the least recently used ones beyond max_bytes.
+
+        Args:
+            key: Request key, see CompressionMiddleware
+            entry: Response to store
+        """
+        if len(entry.body) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old.body)
+        self.entries[key] = entry
+        self.size += len(entry.body)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted.body)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with the best encoding the client accepts.
+
+    Only complete, compressible bodies of at least minimum_size bytes are
+    compressed. Streamed responses, responses that already have a
+    Content-Encoding and 204 or 304 responses pass through unchanged.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encodings: Optional[Sequence[str]] = None,
+        cache_paths: Sequence[str] = (),
+        cache_version: Optional[Callable[[], Awaitable[str]]] = None,
+        cache_max_bytes: int = 32 * 1024 * 1024,
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI app
+            minimum_size: Smallest body in bytes that is compressed
+            encodings: Content codings to offer, in order of preference, defaults to
+                all installed ones
+            cache_paths: Path prefixes of GET endpoints whose responses are cached
+            cache_version: Coroutine function returning the current version of the data
+                the cached endpoints return, a cached response is only used while
+                the version is unchanged. Without it nothing is cached.
+            cache_max_bytes: Maximum total size of the cached bodies, 0 disables the cache
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = [e for e in (encodings or COMPRESSORS) if e in COMPRESSORS]
+        self.cache_paths = tuple(cache_paths)
+        self.cache_version = cache_version
+        self.cache = None
+        if cache_paths and cache_version is not None and cache_max_bytes > 0:
+            self.cache = ResponseCache(cache_max_bytes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""), self.encodings)
+
+        version = None
+        key = (scope["path"], scope["query_string"], encoding)
+        if self._is_cacheable(scope, request_headers):
+            try:
+                version = await self.cache_version()
+            except Exception as e:
+                server_logger.error(f"Could not get the response cache version: {e}")
+            if version is not None:
+                entry = self.cache.get(key, version)
+                if entry is not None:
+                    await send(
+                        {
+                            "type": "http.response.start",
+                            "status": entry.status,
+                            "headers": entry.headers,
+                        }
+                    )
+                    await send({"type": "http.response.body", "body": entry.body})
+                    return
+
+        responder = _CompressingResponder(self, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+        if version is not None and responder.status == 200 and responder.body is not None:
+            self.cache.put(
+                key, CachedResponse(version, responder.status, responder.headers, responder.body)
+            )
+
+    def _is_cacheable(self, scope: Scope, request_headers: Headers) -> bool:
+        # Conditional requests go to the endpoint, which answers them with a 304
+        return (
+            self.cache is not None
+            and scope["method"] == "GET"
+            and scope["path"].startswith(self.cache_paths)
+            and "if-none-match" not in request_headers
+            and "if-modified-since" not in request_headers
+        )
+
+    def should_compress(self, headers: MutableHeaders, status: int, body: bytes) -> bool:
+        """
+        Check whether a complete response is worth compressing.
+
+        Args:
+            headers: Response headers
+            status: Response status code
+            body: Response body
+
+        Returns:
+            True if the body should be compressed
+        """
+        return (
+            status not in (204, 304)
+            and "content-encoding" not in headers
+            and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            and len(body) >= self.minimum_size
+        )
+
+
+class _CompressingResponder:
+    """send wrapper of one response, compressing its body once it is complete."""
+
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: Optional[str]):
+        self.middleware = middleware
+        self.send_next = send
+        self.encoding = encoding
+        self.start_message: Optional[Message] = None
+        self.streaming = False
+        # The response as sent, for the cache, body stays None for streamed responses
+        self.status = 0
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.body: Optional[bytes] = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the body shows whether the headers change
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.streaming:
+            await self.send_next(message)
+            return
+
+        start = self.start_message
+        headers = MutableHeaders(raw=list(start["headers"]))
+        body = message.get("body", b"")
+        if message.get("more_body", False):
+            # Streamed responses are sent as they are
+            self.streaming = True
+            await self.send_next(start)
+            await self.send_next(message)
+            return
+
+        status = start["status"]
+        if headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+            headers.add_vary_header("Accept-Encoding")
+        if self.encoding is not None and self.middleware.should_compress(headers, status, body):
+            compress = COMPRESSORS[self.encoding]
+            if len(body) >= THREAD_THRESHOLD:
+                body = await anyio.to_thread.run_sync(compress, body)
+            else:
+                body = compress(body)
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(body))
+
+        self.status, self.headers, self.body = status, headers.raw, body
+        await self.send_next({**start, "headers": headers.raw})
+        await self.send_next({"type": "http.response.body", "body": body})
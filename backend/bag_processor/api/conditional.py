@@ -0,0 +1,90 @@
+"""
+Conditional requests for the catalog endpoints.
+
+Catalog responses carry an ETag and Last-Modified derived from the catalog
+version. The browser revalidates them on every request, and a client that
+already has the current catalog gets an empty 304 without a query.
+"""
+
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict
+
+from fastapi import HTTPException, Request, Response
+
+from ..database.operations import CatalogVersion
+
+
+def validator_headers(version: CatalogVersion) -> Dict[str, str]:
+    """
+    Build the caching headers of a catalog response.
+
+    Args:
+        version: Current catalog version
+
+    Returns:
+        ETag, Last-Modified and Cache-Control headers
+    """
+    return {
+        "ETag": version.etag,
+        "Last-Modified": formatdate(version.modified_at, usegmt=True),
+        # Cache, but revalidate every time
+        "Cache-Control": "no-cache",
+    }
+
+
+def is_not_modified(request: Request, version: CatalogVersion) -> bool:
+    """
+    Check the If-None-Match or If-Modified-Since header of a request.
+
+    If-Modified-Since is ignored when If-None-Match is present, as in RFC 9110.
+
+    Args:
+        request: Incoming request
+        version: Current catalog version
+
+    Returns:
+        True if the client already has the current catalog
+    """
+    if request.method not in ("GET", "HEAD"):
+        return False
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison, W/"x" matches "x"
+        etag = _opaque_tag(version.etag)
+        return any(_opaque_tag(tag) == etag for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole seconds
+        return int(version.modified_at) <= since
+    return False
+
+
+def _opaque_tag(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def check_not_modified(request: Request, response: Response, version: CatalogVersion) -> None:
+    """
+    Answer 304 if the client has the current catalog, else add the caching headers.
+
+    Args:
+        request: Incoming request
+        response: Response of the endpoint, gets the caching headers
+        version: Current catalog version
+
+    Raises:
+        HTTPException: 304 Not Modified, without a body
+    """
+    headers = validator_headers(version)
+    if is_not_modified(request, version):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
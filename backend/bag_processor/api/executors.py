@@ -0,0 +1,49 @@
+"""
+Thread pools for blocking work in the API routes.
+
+The routes are coroutines, so a blocking Docker SDK call, subprocess or sleep
+would stall the event loop and every other request with it. Each subsystem gets
+its own bounded pool, so a hanging Docker daemon only uses up the Docker threads
+and playback or analysis requests still get through.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class BlockingExecutor:
+    """Awaitable, bounded thread pool for the blocking calls of one subsystem."""
+
+    def __init__(self, name: str, max_workers: int = 4):
+        """
+        Initialize the executor.
+
+        Args:
+            name: Name of the subsystem, used as the thread name prefix
+            max_workers: Maximum number of calls running at the same time
+        """
+        self.name = name
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking function on the thread pool.
+
+        Args:
+            func: Function to run
+            *args: Positional arguments of func
+            **kwargs: Keyword arguments of func
+
+        Returns:
+            Return value of func
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        """Wait for running calls, then close the thread pool."""
+        self.executor.shutdown(wait=True)
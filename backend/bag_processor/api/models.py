@@ -9,6 +9,27 @@ from typing import Any, Dict, List, Optional, Union
 from pydantic import BaseModel, Field, field_validator, model_validator
 
 
+def topic_counts_from_columns(data: Dict) -> Dict[str, Optional[int]]:
+    """
+    Collect the topic counts of rows that still have the wide topic__*_count columns.
+
+    Args:
+        data: Rosbag row
+
+    Returns:
+        Dictionary of topic names and message counts, empty without such columns
+    """
+    topic_counts = {}
+    for key, value in data.items():
+        if key.startswith("topic__") and key.endswith("_count"):
+            # Extract the topic name (remove "topic__" and "_count")
+            topic_name = key[7:-6]  # Remove "topic__" and "_count"
+            # Replace underscore with slash for the actual topic name
+            topic_name = "/" + topic_name.replace("_", "/")
+            topic_counts[topic_name] = value
+    return topic_counts
+
+
 class RosbagBase(BaseModel):
     """Base model for rosbag data."""
 
@@ -41,6 +62,16 @@ class Topic(BaseModel):
     message_type: str = Field(..., description="Message type of the topic")
     message_count: int = Field(..., description="Number of messages for this topic")
     frequency: Optional[float] = Field(None, description="Publishing frequency of the topic")
+    jitter_s: Optional[float] = Field(
+        None, description="Standard deviation of the inter-arrival times in seconds"
+    )
+    max_gap_s: Optional[float] = Field(None, description="Longest inter-arrival time in seconds")
+    gap_count: Optional[int] = Field(
+        None, description="Number of inter-arrival times above the gap threshold"
+    )
+    regression_count: Optional[int] = Field(
+        None, description="Number of timestamps smaller than their predecessor"
+    )
 
     class Config:
         orm_mode = True
@@ -77,18 +108,12 @@ class Rosbag(BaseModel):
         if not isinstance(data, dict):
             return data
 
-        # Process any fields that match the pattern "topic__*_count"
-        topic_counts = {}
-        for key, value in list(data.items()):
-            if key.startswith("topic__") and key.endswith("_count"):
-                # Extract the topic name (remove "topic__" and "_count")
-                topic_name = key[7:-6]  # Remove "topic__" and "_count"
-                # Replace underscore with slash for the actual topic name
-                topic_name = "/" + topic_name.replace("_", "/")
-                topic_counts[topic_name] = value
+        # Filled from the rosbag_topics table by the database layer
+        if data.get("topic_counts") is not None:
+            return data
 
         # Add the extracted counts to the data
-        data["topic_counts"] = topic_counts
+        data["topic_counts"] = topic_counts_from_columns(data)
         return data
 
     @field_validator("topics", mode="before")
@@ -122,6 +147,16 @@ class Rosbag(BaseModel):
         return None
 
 
+class RosbagListResponse(BaseModel):
+    """Model for a page of the rosbag listing."""
+
+    items: List[Rosbag] = Field(..., description="Rosbags of the page")
+    total: int = Field(..., description="Number of rosbags matching the filters")
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor of the next page, None on the last page"
+    )
+
+
 class TopicCreate(BaseModel):
     """Model for creating a new topic."""
 
@@ -163,11 +198,25 @@ class SuccessResponse(BaseModel):
     data: Optional[Any] = Field(None, description="Response data")
 
 
+class CategoryStats(BaseModel):
+    """Model for the statistics of one map category."""
+
+    map_category: Optional[str] = Field(None, description="Map category, None if not set")
+    rosbag_count: int = Field(..., description="Number of rosbags in the category")
+    total_size_mb: float = Field(..., description="Total size of the rosbags in MB")
+    total_duration: float = Field(..., description="Total duration of the rosbags in seconds")
+
+
 class DatabaseStats(BaseModel):
     """Model for system statistics."""
 
     rosbag_count: int = Field(..., description="Total number of rosbags")
-    total_columns: int = Field(..., description="Total number of columns in the database")
+    total_columns: int = Field(..., description="Number of columns of the rosbags table")
+    total_size_mb: float = Field(0.0, description="Total size of all rosbags in MB")
+    total_duration: float = Field(0.0, description="Total duration of all rosbags in seconds")
+    categories: List[CategoryStats] = Field(
+        default_factory=list, description="Statistics per map category"
+    )
 
 
 class DockerImageInfo(BaseModel):
@@ -8,20 +8,23 @@ from collections import deque
 from typing import Dict, List, Optional, Union
 
 import docker
-from fastapi import APIRouter, Body, HTTPException, Path, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Request, Response
 
 from bag_processor.api.models import Rosbag
 
 from ..bag_manager.player import RosbagPlayer
-from ..database.db_connection_pool import DBConnectionPool
+from ..database.async_operations import AsyncDatabaseManager
+from ..database.db_connection_pool import DBConnectionPool, SQLiteProfile
 from ..database.operations import DatabaseManager
+from .conditional import check_not_modified
 from .exception_handlers import (
     DockerContainerAccessError,
     DockerContainerGetError,
     DockerContainerNotFoundError,
 )
+from .executors import BlockingExecutor
 from .logging import LogType, server_logger
-from .models import DockerContainerConfig
+from .models import DatabaseStats, DockerContainerConfig, RosbagListResponse, Topic
 from .services import DatabaseService, DockerService, OpenLoopTestService, RosPublisherService
 
 router = APIRouter(prefix="/api")
@@ -40,11 +43,12 @@ db_conn_pool = DBConnectionPool(
     max_overflow=20,
     pool_timeout=30,
     pool_recycle=1800,
+    sqlite_profile=SQLiteProfile.from_env(),
 )
 
 # Create database manager with the connection pool
 db_manager = DatabaseManager(db_conn_pool=db_conn_pool)
-database_service = DatabaseService(db_manager)
+database_service = DatabaseService(AsyncDatabaseManager(db_manager))
 
 bag_player = RosbagPlayer()
 
@@ -52,8 +56,42 @@ bag_player = RosbagPlayer()
 docker_client = docker.from_env()
 docker_service = DockerService(docker_client)
 
+# Blocking calls run on one thread pool per subsystem, never on the event loop
+docker_executor = BlockingExecutor("docker", max_workers=4)
+process_executor = BlockingExecutor("process", max_workers=4)
+
 publish_service = RosPublisherService()
-openloop_service = OpenLoopTestService(docker_service, bag_player, database_service)
+openloop_service = OpenLoopTestService(
+    docker_service, bag_player, docker_executor, process_executor, database_service
+)
+
+
+def json_response(content: bytes, response: Response) -> Response:
+    """
+    Send JSON the service already serialized, skipping the response_model validation.
+
+    The response_model of the route still documents the response.
+
+    Args:
+        content: Serialized JSON
+        response: Response of the endpoint, its headers are copied
+
+    Returns:
+        Response with the JSON content
+    """
+    # FastAPI drops the headers the dependencies set when a route returns a Response
+    return Response(content=content, media_type="application/json", headers=dict(response.headers))
+
+
+async def catalog_not_modified(request: Request, response: Response) -> None:
+    """
+    Dependency of the catalog endpoints answering 304 when the catalog did not change.
+
+    Args:
+        request: Incoming request with If-None-Match or If-Modified-Since
+        response: Response of the endpoint, gets the ETag and Last-Modified headers
+    """
+    check_not_modified(request, response, await database_service.get_catalog_version())
 
 
 @router.get("/", response_model=Dict[str, str])
@@ -67,9 +105,7 @@ async def root():
     return {"message": "Welcome to RosBag Cockpit API"}
 
 
-@router.get(
-    "/stats",
-)
+@router.get("/stats", response_model=DatabaseStats, dependencies=[Depends(catalog_not_modified)])
 async def get_database_stats():
     """
     Get system statistics.
@@ -81,11 +117,16 @@ async def get_database_stats():
         Stats: System statistics
     """
 
-    return database_service.get_database_stats()
+    return await database_service.get_database_stats()
 
 
-@router.get("/rosbags/{map_category}", response_model=List[Rosbag])
+@router.get(
+    "/rosbags/{map_category}",
+    response_model=List[Rosbag],
+    dependencies=[Depends(catalog_not_modified)],
+)
 async def get_rosbags_by_map_category(
+    response: Response,
     map_category: str = Path(..., title="The map category to filter by"),
 ):
     """
@@ -98,7 +139,7 @@ async def get_rosbags_by_map_category(
         List[Rosbag]: List of skidpad rosbags
     """
 
-    return database_service.get_rosbags_by_map_category(map_category)
+    return json_response(await database_service.get_rosbags_by_map_category(map_category), response)
 
 
 @router.post("/rosbags/view", response_model=Rosbag)
@@ -140,27 +181,67 @@ async def upload_rosbag(
     pass
 
 
-@router.get("/rosbags", response_model=List[Rosbag])
+@router.get(
+    "/rosbags",
+    response_model=RosbagListResponse,
+    dependencies=[Depends(catalog_not_modified)],
+)
 async def get_rosbags_endpoint(
-    # skip: int = 0,
-    # limit: int = 100,
-    # search: Optional[str] = None,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of rosbags per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    category: Optional[str] = Query(None, description="Map category to filter by"),
+    start_from: Optional[str] = Query(
+        None, description="Earliest start time, a prefix of YYYY-MM-DD-HH-MM-SS like 2024-07-01"
+    ),
+    start_before: Optional[str] = Query(
+        None, description="Start time the recordings must start before, same format"
+    ),
+    min_duration: Optional[float] = Query(None, description="Minimum duration in seconds"),
+    max_duration: Optional[float] = Query(None, description="Maximum duration in seconds"),
+    min_size_mb: Optional[float] = Query(None, description="Minimum size in MB"),
+    max_size_mb: Optional[float] = Query(None, description="Maximum size in MB"),
+    sort: str = Query(
+        "-start_time",
+        description="Sort key: id, file_path, map_category, start_time, duration or size_mb, "
+        "prefixed with '-' for descending order",
+    ),
+    search: Optional[str] = Query(
+        None, description="Full-text search, e.g. 'trackdrive 2024-07*' or '/rslidar*'"
+    ),
     # tag: Optional[str] = None,
 ):
     """
-    Get a list of rosbags.
+    Get a page of rosbags, filtered and sorted in the database.
 
     Args:
-        skip (int): Number of records to skip
-        limit (int): Maximum number of records to return
+        limit (int): Maximum number of rosbags per page
+        cursor (Optional[str]): Cursor of the page, from next_cursor of the previous page
+        category (Optional[str]): Map category to filter by
+        start_from (Optional[str]): Earliest start time
+        start_before (Optional[str]): Start time the recordings must start before
+        min_duration, max_duration (Optional[float]): Duration range in seconds
+        min_size_mb, max_size_mb (Optional[float]): Size range in MB
+        sort (str): Sort key
         search (Optional[str]): Search term for filtering rosbags
-        tag (Optional[str]): Filter rosbags by tag
-        db (Session): Database session
 
     Returns:
-        List[Rosbag]: List of rosbags
-    """
-    return database_service.get_all_rosbags()
+        RosbagListResponse: The rosbags of the page, the total number of matching
+        rosbags and the cursor of the next page
+    """
+    filters = {
+        "map_category": category,
+        "start_time_from": start_from,
+        "start_time_before": start_before,
+        "min_duration": min_duration,
+        "max_duration": max_duration,
+        "min_size_mb": min_size_mb,
+        "max_size_mb": max_size_mb,
+        "search": search,
+    }
+    return json_response(
+        await database_service.list_rosbags(filters, sort, cursor, limit), response
+    )
 
 
 @router.get("/rosbags/{rosbag_id}", response_model=Rosbag)
@@ -199,9 +280,7 @@ async def delete_rosbag_endpoint(
     pass
 
 
-@router.get(
-    "/rosbags/{rosbag_id}/topics",
-)
+@router.get("/rosbags/{rosbag_id}/topics", response_model=List[Topic])
 async def get_topics_endpoint(
     rosbag_id: int = Path(..., title="The ID of the rosbag"),
 ):
@@ -215,7 +294,7 @@ async def get_topics_endpoint(
     Returns:
         List[Topic]: List of topics
     """
-    pass
+    return await database_service.get_rosbag_topics(rosbag_id)
 
 
 @router.post(
@@ -236,9 +315,9 @@ async def play_rosbag_endpoint(
         SuccessResponse: Success message
     """
     # Check if the rosbag exists
-    rosbag = database_service.get_rosbag_by_path_or_404(bag_path)
+    rosbag = await database_service.get_rosbag_by_path_or_404(bag_path)
 
-    bag_player.play_bag(bag_path=rosbag.file_path, topics=topics)
+    await process_executor.run(bag_player.play_bag, bag_path=rosbag.file_path, topics=topics)
 
     return {"message": "Started playing rosbag ''", "data": None}
 
@@ -257,7 +336,7 @@ async def stop_play_rosbag_endpoint():
     Returns:
         SuccessResponse: Success message
     """
-    res = bag_player.stop_playback()
+    res = await process_executor.run(bag_player.stop_playback)
 
     return {"message": f"{res}"}
 
@@ -276,7 +355,7 @@ async def get_play_rosbag_status_endpoint():
     Returns:
         SuccessResponse: Success message
     """
-    status = bag_player.get_playback_status()
+    status = await process_executor.run(bag_player.get_playback_status)
 
     return status
 
@@ -304,9 +383,11 @@ async def run_docker_endpoint(
         if image_tag is not None:
             if config is None:
                 config = DockerContainerConfig()
-            return docker_service.run_container_from_image(image_tag, config)
+            return await docker_executor.run(
+                docker_service.run_container_from_image, image_tag, config
+            )
         elif container_id is not None:
-            return docker_service.run_container_by_id(container_id)
+            return await docker_executor.run(docker_service.run_container_by_id, container_id)
     except DockerContainerNotFoundError as e:
         server_logger.error(f"Docker container not found: {e}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -335,7 +416,7 @@ async def stop_container_endpoint(
     Returns:
         SuccessResponse: Success message
     """
-    return docker_service.stop_container_by_id(container_id)
+    return await docker_executor.run(docker_service.stop_container_by_id, container_id)
 
 
 @router.delete(
@@ -352,7 +433,7 @@ async def remove_container_endpoint(
     Returns:
         SuccessResponse: Success message
     """
-    return docker_service.remove_container_by_id(container_id)
+    return await docker_executor.run(docker_service.remove_container_by_id, container_id)
 
 
 @router.post(
@@ -374,7 +455,9 @@ async def copy_from_container_endpoint(
     Returns:
         SuccessResponse: Success message
     """
-    return docker_service.copy_from_container(container_id, source_path, destination_path)
+    return await docker_executor.run(
+        docker_service.copy_from_container, container_id, source_path, destination_path
+    )
 
 
 @router.get(
@@ -387,7 +470,7 @@ async def list_docker_images_endpoint():
     Returns:
         List[Dict[str, str]]: List of Docker images
     """
-    return docker_service.list_all_images()
+    return await docker_executor.run(docker_service.list_all_images)
 
 
 @router.get(
@@ -400,7 +483,7 @@ async def list_docker_containers_endpoint():
     Returns:
         List[Dict[str, str]]: List of Docker containers
     """
-    return docker_service.list_all_containers()
+    return await docker_executor.run(docker_service.list_all_containers)
 
 
 @router.post(
@@ -417,7 +500,7 @@ async def publish_topic_endpoint(as_state: int, active_mission: int):
     Returns:
         SuccessResponse: Success message
     """
-    return publish_service.publish_masterlogic(as_state, active_mission)
+    return await process_executor.run(publish_service.publish_masterlogic, as_state, active_mission)
 
 
 @router.post(
@@ -434,7 +517,7 @@ async def stop_publish_topic_endpoint():
     Returns:
         SuccessResponse: Success message
     """
-    return publish_service.stop_publish_masterlogic()
+    return await process_executor.run(publish_service.stop_publish_masterlogic)
 
 
 @router.post(
@@ -504,12 +587,26 @@ async def get_logs(
     lines: int = 100,
 ):
     log_file = f"bag_processor/api/logs/{log_type}.log"
-    if not os.path.exists(log_file):
-        raise HTTPException(status_code=404, detail=f"Log file {log_type} not found")
-
     try:
-        with open(log_file, "r") as f:
-            last_lines = list(deque(f, maxlen=lines))
+        # Reading a large log takes a while, off the event loop
+        last_lines = await process_executor.run(read_last_lines, log_file, lines)
         return {"logs": last_lines}
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Log file {log_type} not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading logs: {str(e)}")
+
+
+def read_last_lines(path: str, lines: int) -> List[str]:
+    """
+    Read the last lines of a text file.
+
+    Args:
+        path: Path of the file
+        lines: Number of lines
+
+    Returns:
+        The last lines, with their line endings
+    """
+    with open(path, "r") as f:
+        return list(deque(f, maxlen=lines))
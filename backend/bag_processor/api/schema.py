@@ -1,6 +1,16 @@
-from typing import List
+import json
+from typing import Any, Dict, List
 
-from .models import DatabaseStats, Rosbag
+from .models import DatabaseStats, Rosbag, Topic, topic_counts_from_columns
+
+try:
+    # Several times faster than json and pydantic, emits bytes directly
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fields of the Rosbag response, in the order the model serializes them
+ROSBAG_FIELDS = tuple(Rosbag.model_fields)
 
 
 def from_dict_to_database_stats(data: dict) -> DatabaseStats:
@@ -29,20 +39,68 @@ def from_dicts_to_rosbags(data: List[dict]) -> List[Rosbag]:
     return [Rosbag(**item) for item in data]
 
 
-def get_all_rosbags(db) -> List[Rosbag]:
+def from_dicts_to_rosbag_responses(data: List[dict]) -> List[Dict[str, Any]]:
     """
-    Get all rosbags from the database.
+    Convert trusted database rows to Rosbag responses without validating them.
+
+    The result is what Rosbag(**item).model_dump(mode="json") returns for each
+    row, but built directly. topics and metadata stay None like in the model,
+    so topics_json and metadata_json are not parsed.
 
     Args:
-        db: Database session
+        data: List of rosbags rows, as returned by DatabaseManager
 
     Returns:
-        List of Rosbag objects
+        List of JSON-ready dictionaries
+    """
+    responses = []
+    for item in data:
+        response = {field: item.get(field) for field in ROSBAG_FIELDS}
+        response["topics"] = None
+        response["metadata"] = None
+        if response["topic_counts"] is None:
+            response["topic_counts"] = topic_counts_from_columns(item)
+        responses.append(response)
+    return responses
+
+
+def dump_json(content: Any) -> bytes:
+    """
+    Serialize JSON-ready content to bytes, with orjson when it is installed.
+
+    Args:
+        content: Dictionaries, lists and scalars
+
+    Returns:
+        UTF-8 encoded JSON
     """
-    # Placeholder for actual database query
-    # data = db.get_all_rosbags()
-    # return from_dict_to_rosbag(data)
-    pass
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
 
 
-# def get_rosbag()
+def from_dicts_to_topics(data: List[dict]) -> List[Topic]:
+    """
+    Convert rosbag_topics rows to a list of Topic objects.
+
+    Args:
+        data: List of dictionaries containing rosbag_topics rows
+
+    Returns:
+        List of Topic objects
+    """
+    return [
+        Topic(
+            id=item["id"],
+            rosbag_id=item["rosbag_id"],
+            name=item["topic"],
+            message_type=item["type"] or "",
+            message_count=item["message_count"] or 0,
+            frequency=item["frequency"],
+            jitter_s=item["jitter_s"],
+            max_gap_s=item["max_gap_s"],
+            gap_count=item["gap_count"],
+            regression_count=item["regression_count"],
+        )
+        for item in data
+    ]
@@ -4,45 +4,67 @@ import os
 import subprocess
 import tarfile
 import threading
-import time
 from typing import Any, Dict, List, Optional, Union
 
 from docker.errors import APIError, DockerException, ImageNotFound, NotFound
 from fastapi import HTTPException
 
-from ..api.schema import Rosbag, from_dict_to_database_stats, from_dicts_to_rosbags
+from ..api.schema import (
+    Rosbag,
+    dump_json,
+    from_dict_to_database_stats,
+    from_dicts_to_rosbag_responses,
+    from_dicts_to_rosbags,
+    from_dicts_to_topics,
+)
 from ..bag_manager.player import RosbagPlayer
-from ..database.operations import DatabaseManager
+from ..database.async_operations import AsyncDatabaseManager
+from ..database.operations import CatalogVersion
 from .exception_handlers import (
     DockerContainerAccessError,
     DockerContainerGetError,
     DockerContainerNotFoundError,
 )
+from .executors import BlockingExecutor
 from .logging import docker_service_logger, open_loop_test_logger
-from .models import DockerContainerConfig, DockerContainerInfo, DockerImageInfo
+from .models import (
+    DockerContainerConfig,
+    DockerContainerInfo,
+    DockerImageInfo,
+    Topic,
+)
 
 
 class DatabaseService:
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: AsyncDatabaseManager):
         """
         Initialize the DatabaseService.
 
         Args:
-            db_manager: DatabaseManager instance
+            db_manager: AsyncDatabaseManager instance, its queries run off the event loop
         """
         self.db_manager = db_manager
 
-    def get_database_stats(self):
+    async def get_catalog_version(self) -> CatalogVersion:
+        """
+        Get the catalog version the catalog endpoints derive their ETags from.
+
+        Returns:
+            CatalogVersion: Current catalog version
+        """
+        return await self.db_manager.get_catalog_version()
+
+    async def get_database_stats(self):
         """
         Get database statistics.
 
         Returns:
             dict: Database statistics
         """
-        res = self.db_manager.get_database_stats()
+        res = await self.db_manager.get_database_stats()
         return from_dict_to_database_stats(res)
 
-    def get_rosbags_by_map_category(self, map_category: str):
+    async def get_rosbags_by_map_category(self, map_category: str) -> bytes:
         """
         Get all rosbag entries for a specific map category.
 
@@ -50,20 +72,71 @@ class DatabaseService:
             map_category: Map category to filter by
 
         Returns:
-            List of dictionaries containing rosbag data
+            JSON list of Rosbag responses
+        """
+        sync_manager = self.db_manager.db_manager
+        # Serializing a whole catalog is CPU bound, so it runs next to the query
+        return await self.db_manager.run(
+            lambda: dump_json(
+                from_dicts_to_rosbag_responses(
+                    sync_manager.get_rosbags_by_map_category(map_category)
+                )
+            )
+        )
+
+    async def list_rosbags(
+        self,
+        filters: Dict[str, Any],
+        sort: str,
+        cursor: Optional[str],
+        limit: int,
+    ) -> bytes:
         """
-        return self.db_manager.get_rosbags_by_map_category(map_category)
+        Get a page of rosbags and the number of rosbags matching the filters.
+
+        Args:
+            filters: Dictionary of DatabaseManager.list_rosbags filters
+            sort: Sort key, prefixed with "-" for descending order
+            cursor: next_cursor of the previous page, None for the first page
+            limit: Maximum number of rosbags of the page
+
+        Returns:
+            JSON RosbagListResponse
 
-    def get_all_rosbags(self) -> List[Rosbag]:
+        Raises:
+            HTTPException: For unknown sort keys or invalid cursors
+        """
+        sync_manager = self.db_manager.db_manager
+
+        def list_page() -> bytes:
+            columns = sync_manager.get_list_columns() + ["topic_counts"]
+            page = sync_manager.list_rosbags(filters, sort, cursor, limit, columns)
+            return dump_json(
+                {
+                    "items": from_dicts_to_rosbag_responses(page.rows),
+                    "total": sync_manager.count_rosbags(filters),
+                    "next_cursor": page.next_cursor,
+                }
+            )
+
+        try:
+            return await self.db_manager.run(list_page)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def get_rosbag_topics(self, rosbag_id: int) -> List[Topic]:
         """
-        Get all rosbag entries.
+        Get the topics of a rosbag.
+
+        Args:
+            rosbag_id: ID of the rosbag
 
         Returns:
-            List of dictionaries containing rosbag data
+            List of Topic objects, empty if the rosbag does not exist
         """
-        return from_dicts_to_rosbags(self.db_manager.get_all_rosbags())
+        return from_dicts_to_topics(await self.db_manager.get_rosbag_topics(rosbag_id))
 
-    def get_rosbag_by_path_or_404(self, bag_path: str) -> Rosbag:
+    async def get_rosbag_by_path_or_404(self, bag_path: str) -> Rosbag:
         """
         Get a rosbag by ID or raise a 404 error.
 
@@ -77,7 +150,7 @@ class DatabaseService:
         Raises:
             HTTPException: If the rosbag is not found
         """
-        rosbag = self.db_manager.get_rosbag_by_path(bag_path)
+        rosbag = await self.db_manager.get_rosbag_by_path(bag_path)
         if rosbag is None:
             raise HTTPException(status_code=404, detail=f"Rosbag with path {bag_path} not found")
         return from_dicts_to_rosbags([rosbag])[0]
@@ -515,10 +588,27 @@ class RosPublisherService:
 
 class OpenLoopTestService:
     def __init__(
-        self, docker_service: DockerService, bag_player: RosbagPlayer, database_service=None
+        self,
+        docker_service: DockerService,
+        bag_player: RosbagPlayer,
+        docker_executor: BlockingExecutor,
+        process_executor: BlockingExecutor,
+        database_service=None,
     ):
+        """
+        Initialize the OpenLoopTestService.
+
+        Args:
+            docker_service: DockerService running the test container
+            bag_player: RosbagPlayer playing the rosbags
+            docker_executor: Thread pool for the Docker calls
+            process_executor: Thread pool for playback and subprocess calls
+            database_service: DatabaseService, unused
+        """
         self.docker_service = docker_service
         self.bag_player = bag_player
+        self.docker_executor = docker_executor
+        self.process_executor = process_executor
         self.database_service = database_service
 
     async def execute_open_loop_test(
@@ -554,8 +644,8 @@ class OpenLoopTestService:
                     "source scripts/launch/launch_all_sim.bash && tail -f /dev/null",
                 ],
             )
-            container_response = self.docker_service.run_container_from_image(
-                image_tag, container_config
+            container_response = await self.docker_executor.run(
+                self.docker_service.run_container_from_image, image_tag, container_config
             )
             container_id = container_response.get("container_id")
             open_loop_test_logger.info(f"Started Docker container with ID: {container_id}")
@@ -565,15 +655,17 @@ class OpenLoopTestService:
                 open_loop_test_logger.info(
                     f"Processing rosbag {i+1}/{len(rosbag_paths)}: {rosbag_path}"
                 )
-                time.sleep(10)  # wait for the container to be ready
+                await asyncio.sleep(10)  # wait for the container to be ready
                 # Play rosbag
-                self.bag_player.play_bag(
-                    bag_path=rosbag_path, topics=["/rslidar_points", "/vehicle_state"]
+                await self.process_executor.run(
+                    self.bag_player.play_bag,
+                    bag_path=rosbag_path,
+                    topics=["/rslidar_points", "/vehicle_state"],
                 )
-                time.sleep(2)  # must wait for rosbag starting to playback
+                await asyncio.sleep(2)  # must wait for rosbag starting to playback
                 # Wait for rosbag playback to finish
                 while True:
-                    status = self.bag_player.get_playback_status()
+                    status = await self.process_executor.run(self.bag_player.get_playback_status)
 
                     if not status.get("running", False):
                         break
@@ -582,21 +674,25 @@ class OpenLoopTestService:
                     await asyncio.sleep(5)  # Use async sleep
 
                 # Stop playback
-                self.bag_player.stop_playback()
+                await self.process_executor.run(self.bag_player.stop_playback)
 
                 # Record results
                 results.append({"rosbag": rosbag_path, "status": "completed", "index": i + 1})
 
                 # If not the last rosbag, restart container
                 if i < len(rosbag_paths) - 1:
-                    self.docker_service.stop_container_by_id(container_id)
-                    self.docker_service.run_container_by_id(container_id)
+                    await self.docker_executor.run(
+                        self.docker_service.stop_container_by_id, container_id
+                    )
+                    await self.docker_executor.run(
+                        self.docker_service.run_container_by_id, container_id
+                    )
                     open_loop_test_logger.info(
                         f"Restarted Docker container with ID: {container_id}"
                     )
 
             # 3. After processing all rosbags, copy evaluation data
-            self.docker_service.stop_container_by_id(container_id)
+            await self.docker_executor.run(self.docker_service.stop_container_by_id, container_id)
 
             # 5. Copy all output files
             lidar_output_path_workspace = "/home/vscode/workspace/src/lidar/evaluation/"
@@ -605,7 +701,8 @@ class OpenLoopTestService:
 
             # Copy all pipeline logs
             pipeline_logs_path_backend = "/home/carmaker/tmp/output/pipeline_logs"
-            self.docker_service.copy_from_container(
+            await self.docker_executor.run(
+                self.docker_service.copy_from_container,
                 container_id,
                 pipeline_logs_path_workspace,
                 pipeline_logs_path_backend,
@@ -613,7 +710,8 @@ class OpenLoopTestService:
 
             # Copy lidar evaluation data
             lidar_output_path_backend = "/home/carmaker/tmp/output/lidar"
-            self.docker_service.copy_from_container(
+            await self.docker_executor.run(
+                self.docker_service.copy_from_container,
                 container_id,
                 lidar_output_path_workspace,  # username is set up in Dockerfile
                 lidar_output_path_backend,
@@ -621,7 +719,8 @@ class OpenLoopTestService:
 
             # Copy estimation evaluation data
             estimation_output_path_backend = "/home/carmaker/tmp/output/estimation"
-            self.docker_service.copy_from_container(
+            await self.docker_executor.run(
+                self.docker_service.copy_from_container,
                 container_id,
                 estimation_output_path_workspace,
                 estimation_output_path_backend,
@@ -630,18 +729,18 @@ class OpenLoopTestService:
 
             # change the access of the copied files
             command_to_run = f"chmod -R 777 {lidar_output_path_backend}"
-            subprocess.run(command_to_run, shell=True)
+            await self.process_executor.run(subprocess.run, command_to_run, shell=True)
 
             command_to_run = f"chmod -R 777 {estimation_output_path_backend}"
-            subprocess.run(command_to_run, shell=True)
+            await self.process_executor.run(subprocess.run, command_to_run, shell=True)
 
             command_to_run = f"chmod -R 777 {pipeline_logs_path_backend}"
-            subprocess.run(command_to_run, shell=True)
+            await self.process_executor.run(subprocess.run, command_to_run, shell=True)
 
             open_loop_test_logger.info("Changed the access of the copied files")
-            time.sleep(2)
+            await asyncio.sleep(2)
             # 4. Delete container
-            self.docker_service.remove_container_by_id(container_id)
+            await self.docker_executor.run(self.docker_service.remove_container_by_id, container_id)
             open_loop_test_logger.info(f"Deleted Docker container with ID: {container_id}")
             return {
                 "success": True,
@@ -699,7 +798,8 @@ class OpenLoopTestService:
             open_loop_test_logger.info(f"Running analysis script: {' '.join(cmd)}")
 
             try:
-                result = subprocess.run(
+                result = await self.process_executor.run(
+                    subprocess.run,
                     cmd,
                     capture_output=True,
                     text=True,
@@ -4,11 +4,15 @@ ROS Bag processing package for the Cockpit application.
 This package contains modules for parsing, playing, and analyzing ROS bag files.
 """
 
+from .fingerprint import FingerprintStore
 from .parser import RosbagParser
 from .player import RosbagPlayer
 from .utils import determine_map_category, sanitize_topic_name
+from .yaml_cache import MetadataYamlCache
 
 __all__ = [
+    "FingerprintStore",
+    "MetadataYamlCache",
     "RosbagParser",
     "RosbagPlayer",
     "determine_map_category",
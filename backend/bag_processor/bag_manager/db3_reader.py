@@ -0,0 +1,138 @@
+"""
+rosbag2 SQLite reader for the Cockpit application.
+
+This module reads bag metadata from a rosbag2 .db3 file with aggregate SQL
+queries. Message payloads are never loaded into Python.
+"""
+
+import os
+import sqlite3
+from typing import Any, Dict, List
+from urllib.parse import quote
+
+import numpy as np
+
+
+def open_db3_readonly(bag_path: str) -> sqlite3.Connection:
+    """
+    Open a rosbag2 .db3 file read-only.
+
+    The database is opened as immutable, so SQLite skips all locking and
+    change detection. Bags are never modified after recording, which makes
+    this safe and avoids lock traffic on network-mounted storage.
+
+    Args:
+        bag_path: Path to the .db3 file
+
+    Returns:
+        sqlite3 Connection to the bag
+    """
+    uri = f"file:{quote(os.path.abspath(bag_path))}?mode=ro&immutable=1"
+    return sqlite3.connect(uri, uri=True)
+
+
+def read_db3_bag_info(bag_path: str) -> Dict[str, Any]:
+    """
+    Build rosbag2 bag information from the messages and topics tables of a .db3 file.
+
+    The returned dictionary has the same layout as the "rosbag2_bagfile_information"
+    section of a rosbag2 metadata.yaml, so it can be converted the same way.
+
+    Args:
+        bag_path: Path to the .db3 file
+
+    Returns:
+        Dictionary containing the bag information
+    """
+    conn = open_db3_readonly(bag_path)
+    try:
+        topics = conn.execute(
+            "SELECT id, name, type, serialization_format FROM topics ORDER BY id"
+        ).fetchall()
+
+        # One pass over the messages table, grouped by topic. length() on a BLOB
+        # reads the size from the record header and does not touch the payload.
+        stats = {
+            topic_id: (count, size_bytes, first_ns, last_ns)
+            for topic_id, count, size_bytes, first_ns, last_ns in conn.execute("""
+                SELECT topic_id, COUNT(*), SUM(length(data)), MIN(timestamp), MAX(timestamp)
+                FROM messages
+                GROUP BY topic_id
+                """)
+        }
+    finally:
+        conn.close()
+
+    topics_with_message_count = []
+    for topic_id, name, msg_type, serialization_format in topics:
+        count, size_bytes, _, _ = stats.get(topic_id, (0, 0, None, None))
+        topics_with_message_count.append(
+            {
+                "topic_metadata": {
+                    "name": name,
+                    "type": msg_type,
+                    "serialization_format": serialization_format,
+                },
+                "message_count": count,
+                "bytes": size_bytes,
+            }
+        )
+
+    message_count = sum(count for count, _, _, _ in stats.values())
+    start_ns = min((first_ns for _, _, first_ns, _ in stats.values()), default=0)
+    end_ns = max((last_ns for _, _, _, last_ns in stats.values()), default=0)
+
+    return {
+        "storage_identifier": "sqlite3",
+        "relative_file_paths": [os.path.basename(bag_path)],
+        "duration": {"nanoseconds": end_ns - start_ns},
+        "starting_time": {"nanoseconds_since_epoch": start_ns},
+        "message_count": message_count,
+        "topics_with_message_count": topics_with_message_count,
+    }
+
+
+# Message rows converted to a numpy array at a time, bounds the Python tuples alive at once
+TIMESTAMP_BATCH_ROWS = 65536
+
+
+def read_db3_topic_timestamps(bag_path: str) -> Dict[str, np.ndarray]:
+    """
+    Read the timestamps of all messages of a .db3 file, grouped by topic.
+
+    Only the topic_id and timestamp columns are selected, so the message
+    payloads stored in overflow pages are not read. The rows are fetched in
+    batches of TIMESTAMP_BATCH_ROWS and grouped per batch, so memory grows with
+    the int64 timestamps and not with a Python tuple per message.
+
+    Args:
+        bag_path: Path to the .db3 file
+
+    Returns:
+        Dictionary mapping topic names to int64 arrays of timestamps in nanoseconds,
+        in the order the messages were written
+    """
+    topic_times: Dict[int, List[np.ndarray]] = {}
+    conn = open_db3_readonly(bag_path)
+    try:
+        topic_names = dict(conn.execute("SELECT id, name FROM topics"))
+        cursor = conn.execute("SELECT topic_id, timestamp FROM messages ORDER BY id")
+        while True:
+            batch = cursor.fetchmany(TIMESTAMP_BATCH_ROWS)
+            if not batch:
+                break
+            rows = np.array(batch, dtype=np.int64)
+            # A stable sort by topic keeps the write order within each topic
+            order = np.argsort(rows[:, 0], kind="stable")
+            topic_ids = rows[order, 0]
+            timestamps = rows[order, 1]
+            unique_ids, starts = np.unique(topic_ids, return_index=True)
+            for topic_id, times in zip(unique_ids, np.split(timestamps, starts[1:])):
+                topic_times.setdefault(int(topic_id), []).append(times)
+    finally:
+        conn.close()
+
+    return {
+        topic_names.get(topic_id, str(topic_id)): np.concatenate(times)
+        for topic_id, times in topic_times.items()
+    }
@@ -0,0 +1,89 @@
+"""
+Bag folder discovery for the Cockpit application.
+
+This module finds bag folders with a single os.scandir pass. A folder is a bag
+folder as soon as it contains a .db3 or .mcap file; its subdirectories are not
+visited. The stat results of the bag files and metadata.yaml are collected
+during the walk and reused for fingerprints and parsing, which keeps the number
+of stat calls on network-mounted storage to one per relevant file.
+"""
+
+import os
+from typing import Dict, Iterator, List, NamedTuple
+
+METADATA_FILE_NAME = "metadata.yaml"
+BAG_FILE_EXTENSIONS = (".db3", ".mcap")
+
+
+class BagFolder(NamedTuple):
+    """A discovered bag folder."""
+
+    path: str
+    map_category: str
+    # Stat results of the bag files and metadata.yaml, keyed by file name
+    file_stats: Dict[str, os.stat_result]
+
+
+def is_bag_file(name: str) -> bool:
+    """Check whether a file name is a rosbag2 storage file."""
+    return name.endswith(BAG_FILE_EXTENSIONS)
+
+
+def scan_bag_folder(bag_folder_path: str) -> Dict[str, os.stat_result]:
+    """
+    Stat the bag files and metadata.yaml of a single folder.
+
+    Args:
+        bag_folder_path: Path to the bag folder
+
+    Returns:
+        Stat results keyed by file name
+    """
+    with os.scandir(bag_folder_path) as it:
+        return {
+            entry.name: entry.stat()
+            for entry in it
+            if (is_bag_file(entry.name) or entry.name == METADATA_FILE_NAME) and entry.is_file()
+        }
+
+
+def iter_bag_folders(root: str, map_category: str) -> Iterator[BagFolder]:
+    """
+    Walk a directory tree and yield its bag folders.
+
+    Directories are listed once with os.scandir. Only the bag files and
+    metadata.yaml are stat'ed, and bag folders are not descended into.
+    Symlinked directories are not followed, like os.walk.
+
+    Args:
+        root: Top of the directory tree
+        map_category: Map category of all bag folders below root
+
+    Yields:
+        BagFolder tuples in depth-first, sorted order
+    """
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        subdirs: List[str] = []
+        file_stats: Dict[str, os.stat_result] = {}
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    name = entry.name
+                    if is_bag_file(name) or name == METADATA_FILE_NAME:
+                        if entry.is_file():
+                            file_stats[name] = entry.stat()
+                    elif entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+        except OSError as e:
+            # Unreadable or vanished directories are skipped, like os.walk does
+            print(f"Warning: Could not list directory {path}: {str(e)}")
+            continue
+
+        if any(is_bag_file(name) for name in file_stats):
+            yield BagFolder(path, map_category, file_stats)
+            continue
+
+        # Pushed in reverse so the folders are visited in sorted order
+        stack.extend(sorted(subdirs, reverse=True))
@@ -0,0 +1,101 @@
+"""
+Bag folder fingerprints for the Cockpit application.
+
+This module detects which bag folders changed since the last scan, so a
+rescan only parses new or modified recordings.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+from .discovery import METADATA_FILE_NAME, scan_bag_folder
+
+
+def compute_folder_fingerprint(
+    bag_folder_path: str, file_stats: Optional[Dict[str, os.stat_result]] = None
+) -> str:
+    """
+    Compute the fingerprint of a bag folder.
+
+    The fingerprint covers name, size, mtime and inode of every bag file and of
+    metadata.yaml. A missing metadata.yaml is part of the fingerprint too, so
+    the folder changes once rosbag2 writes it at the end of a recording.
+
+    Args:
+        bag_folder_path: Path to the bag folder
+        file_stats: Stat results of the bag files and metadata.yaml collected during
+            discovery, the folder is scanned if not given
+
+    Returns:
+        Fingerprint string
+    """
+    if file_stats is None:
+        file_stats = scan_bag_folder(bag_folder_path)
+
+    parts = []
+    for name, st in sorted(file_stats.items()):
+        parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}:{st.st_ino}")
+
+    if METADATA_FILE_NAME not in file_stats:
+        parts.append(f"{METADATA_FILE_NAME}:missing")
+    return "|".join(parts)
+
+
+class FingerprintStore:
+    """Tracks bag folder fingerprints between scans."""
+
+    def __init__(self, fingerprints: Optional[Dict[str, str]] = None):
+        """
+        Initialize the fingerprint store.
+
+        Args:
+            fingerprints: Fingerprints of already ingested folders, keyed by folder path
+        """
+        self.fingerprints: Dict[str, str] = dict(fingerprints or {})
+        self.pending: Dict[str, str] = {}
+        self.skipped: List[str] = []
+
+    def is_unchanged(
+        self, bag_folder_path: str, file_stats: Optional[Dict[str, os.stat_result]] = None
+    ) -> bool:
+        """
+        Check whether a bag folder is unchanged since it was last ingested.
+
+        Changed or new folders are remembered as pending until they are
+        committed or discarded.
+
+        Args:
+            bag_folder_path: Path to the bag folder
+            file_stats: Stat results collected during discovery, see compute_folder_fingerprint
+
+        Returns:
+            True if the folder can be skipped, False if it has to be parsed
+        """
+        fingerprint = compute_folder_fingerprint(bag_folder_path, file_stats)
+        if self.fingerprints.get(bag_folder_path) == fingerprint:
+            self.skipped.append(bag_folder_path)
+            return True
+
+        self.pending[bag_folder_path] = fingerprint
+        return False
+
+    def discard(self, bag_folder_path: str) -> None:
+        """
+        Forget the pending fingerprint of a folder, e.g. because parsing failed.
+
+        Args:
+            bag_folder_path: Path to the bag folder
+        """
+        self.pending.pop(bag_folder_path, None)
+
+    def commit(self) -> Dict[str, str]:
+        """
+        Mark all pending folders as ingested.
+
+        Returns:
+            The committed fingerprints, keyed by folder path
+        """
+        committed = self.pending
+        self.fingerprints.update(committed)
+        self.pending = {}
+        return committed
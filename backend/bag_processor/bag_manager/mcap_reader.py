@@ -0,0 +1,394 @@
+"""
+MCAP summary reader for the Cockpit application.
+
+This module reads bag metadata from the Summary section of an MCAP file.
+Only the footer and the summary records are decoded, so the cost of reading
+a bag does not depend on the size of its data section. Message counts of
+files without a Statistics record and message timestamps for a deep scan are
+read from the MessageIndex records.
+"""
+
+import os
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MCAP_MAGIC = b"\x89MCAP0\r\n"
+
+# Record opcodes used by the readers
+OP_FOOTER = 0x02
+OP_SCHEMA = 0x03
+OP_CHANNEL = 0x04
+OP_MESSAGE = 0x05
+OP_CHUNK = 0x06
+OP_MESSAGE_INDEX = 0x07
+OP_CHUNK_INDEX = 0x08
+OP_STATISTICS = 0x0B
+
+# opcode (1) + record length (8) + summary_start (8) + summary_offset_start (8) + crc (4)
+FOOTER_RECORD_SIZE = 1 + 8 + 8 + 8 + 4
+
+
+class _RecordDecoder:
+    """Decoder for the primitive field types of MCAP records."""
+
+    def __init__(self, data: bytes, offset: int = 0):
+        """
+        Initialize the decoder.
+
+        Args:
+            data: Buffer containing the record content
+            offset: Position of the first byte to decode
+        """
+        self.data = data
+        self.offset = offset
+
+    def _unpack(self, fmt: str) -> Any:
+        value = struct.unpack_from(fmt, self.data, self.offset)[0]
+        self.offset += struct.calcsize(fmt)
+        return value
+
+    def uint16(self) -> int:
+        return self._unpack("<H")
+
+    def uint32(self) -> int:
+        return self._unpack("<I")
+
+    def uint64(self) -> int:
+        return self._unpack("<Q")
+
+    def string(self) -> str:
+        length = self.uint32()
+        value = self.data[self.offset : self.offset + length].decode("utf-8")
+        self.offset += length
+        return value
+
+    def string_map(self) -> Dict[str, str]:
+        end = self.uint32() + self.offset
+        result = {}
+        while self.offset < end:
+            key = self.string()
+            result[key] = self.string()
+        return result
+
+    def uint16_uint64_map(self) -> Dict[int, int]:
+        end = self.uint32() + self.offset
+        result = {}
+        while self.offset < end:
+            key = self.uint16()
+            result[key] = self.uint64()
+        return result
+
+
+def _read_summary_offsets(f, file_size: int) -> Tuple[int, int]:
+    """
+    Read the footer of an MCAP file.
+
+    Args:
+        f: Binary file object opened on the MCAP file
+        file_size: Size of the file in bytes
+
+    Returns:
+        Tuple of (summary_start, summary_end) byte offsets
+    """
+    footer_start = file_size - len(MCAP_MAGIC) - FOOTER_RECORD_SIZE
+    if footer_start < len(MCAP_MAGIC):
+        raise ValueError("File is too small to be an MCAP file")
+
+    f.seek(0)
+    if f.read(len(MCAP_MAGIC)) != MCAP_MAGIC:
+        raise ValueError("File does not start with the MCAP magic")
+
+    f.seek(footer_start)
+    footer = f.read(FOOTER_RECORD_SIZE + len(MCAP_MAGIC))
+    if footer[FOOTER_RECORD_SIZE:] != MCAP_MAGIC:
+        raise ValueError("File does not end with the MCAP magic, it may still be recording")
+    if footer[0] != OP_FOOTER:
+        raise ValueError("MCAP footer record not found")
+
+    summary_start, summary_offset_start = struct.unpack_from("<QQ", footer, 9)
+    if summary_start == 0:
+        raise ValueError("MCAP file has no summary section")
+
+    # The summary offset section (if any) directly follows the summary section
+    summary_end = summary_offset_start if summary_offset_start else footer_start
+    return summary_start, summary_end
+
+
+def read_mcap_summary(bag_path: str) -> Dict[str, Any]:
+    """
+    Decode the Schema, Channel, Statistics and ChunkIndex records of an MCAP summary.
+
+    Args:
+        bag_path: Path to the MCAP file
+
+    Returns:
+        Dictionary with the keys "schemas", "channels", "statistics" and "chunk_indexes"
+    """
+    schemas: Dict[int, Dict[str, str]] = {}
+    channels: Dict[int, Dict[str, Any]] = {}
+    statistics: Dict[str, Any] = {}
+    chunk_indexes: List[Dict[str, int]] = []
+
+    with open(bag_path, "rb") as f:
+        summary_start, summary_end = _read_summary_offsets(f, os.fstat(f.fileno()).st_size)
+        f.seek(summary_start)
+        data = f.read(summary_end - summary_start)
+
+    offset = 0
+    while offset + 9 <= len(data):
+        opcode = data[offset]
+        (length,) = struct.unpack_from("<Q", data, offset + 1)
+        decoder = _RecordDecoder(data, offset + 9)
+        offset += 9 + length
+
+        if opcode == OP_SCHEMA:
+            schema_id = decoder.uint16()
+            schemas[schema_id] = {"name": decoder.string(), "encoding": decoder.string()}
+
+        elif opcode == OP_CHANNEL:
+            channel_id = decoder.uint16()
+            channels[channel_id] = {
+                "schema_id": decoder.uint16(),
+                "topic": decoder.string(),
+                "message_encoding": decoder.string(),
+                "metadata": decoder.string_map(),
+            }
+
+        elif opcode == OP_STATISTICS:
+            statistics["message_count"] = decoder.uint64()
+            decoder.uint16()  # schema_count
+            decoder.uint32()  # channel_count
+            decoder.uint32()  # attachment_count
+            decoder.uint32()  # metadata_count
+            decoder.uint32()  # chunk_count
+            statistics["message_start_time"] = decoder.uint64()
+            statistics["message_end_time"] = decoder.uint64()
+            statistics["channel_message_counts"] = decoder.uint16_uint64_map()
+
+        elif opcode == OP_CHUNK_INDEX:
+            chunk_indexes.append(
+                {
+                    "message_start_time": decoder.uint64(),
+                    "message_end_time": decoder.uint64(),
+                    "chunk_start_offset": decoder.uint64(),
+                    "chunk_length": decoder.uint64(),
+                    "message_index_offsets": decoder.uint16_uint64_map(),
+                    "message_index_length": decoder.uint64(),
+                }
+            )
+
+    return {
+        "schemas": schemas,
+        "channels": channels,
+        "statistics": statistics,
+        "chunk_indexes": chunk_indexes,
+    }
+
+
+def read_mcap_bag_info(bag_path: str) -> Dict[str, Any]:
+    """
+    Build rosbag2 bag information from the summary section of an MCAP file.
+
+    The returned dictionary has the same layout as the "rosbag2_bagfile_information"
+    section of a rosbag2 metadata.yaml, so it can be converted the same way.
+    Without a Statistics record, the message counts are taken from the
+    MessageIndex records of the chunks. Files without either have unknown
+    message counts, which are None.
+
+    Args:
+        bag_path: Path to the MCAP file
+
+    Returns:
+        Dictionary containing the bag information
+    """
+    summary = read_mcap_summary(bag_path)
+    statistics = summary["statistics"]
+    chunk_indexes = summary["chunk_indexes"]
+
+    if statistics:
+        start_ns = statistics["message_start_time"]
+        end_ns = statistics["message_end_time"]
+        message_count = statistics["message_count"]
+        channel_counts = statistics["channel_message_counts"]
+    else:
+        # Writers may omit statistics, the chunk indexes still bound the recording
+        start_ns = min((chunk["message_start_time"] for chunk in chunk_indexes), default=0)
+        end_ns = max((chunk["message_end_time"] for chunk in chunk_indexes), default=0)
+        channel_counts = _count_indexed_messages(bag_path, chunk_indexes)
+        if channel_counts is None:
+            print(f"MCAP file has no statistics and no message indexes, counts unknown: {bag_path}")
+            message_count = None
+        else:
+            message_count = sum(channel_counts.values())
+
+    topics_with_message_count = []
+    for channel_id, channel in sorted(summary["channels"].items()):
+        schema = summary["schemas"].get(channel["schema_id"], {})
+        topic_metadata = {
+            "name": channel["topic"],
+            "type": schema.get("name", ""),
+            "serialization_format": channel["message_encoding"],
+        }
+        if "offered_qos_profiles" in channel["metadata"]:
+            topic_metadata["offered_qos_profiles"] = channel["metadata"]["offered_qos_profiles"]
+
+        topics_with_message_count.append(
+            {
+                "topic_metadata": topic_metadata,
+                "message_count": (
+                    channel_counts.get(channel_id, 0) if channel_counts is not None else None
+                ),
+            }
+        )
+
+    return {
+        "storage_identifier": "mcap",
+        "relative_file_paths": [os.path.basename(bag_path)],
+        "duration": {"nanoseconds": end_ns - start_ns},
+        "starting_time": {"nanoseconds_since_epoch": start_ns},
+        "message_count": message_count,
+        "topics_with_message_count": topics_with_message_count,
+    }
+
+
+def _count_indexed_messages(
+    bag_path: str, chunk_indexes: List[Dict[str, int]]
+) -> Optional[Dict[int, int]]:
+    """
+    Count the messages per channel from the MessageIndex records of the chunks.
+
+    Only the record headers are decoded, every MessageIndex entry is 16 bytes.
+
+    Args:
+        bag_path: Path to the MCAP file
+        chunk_indexes: ChunkIndex records of the summary
+
+    Returns:
+        Dictionary mapping channel ids to message counts, None if the file is
+        unchunked or a chunk has no message indexes
+    """
+    if not chunk_indexes or any(not chunk["message_index_offsets"] for chunk in chunk_indexes):
+        return None
+
+    counts: Dict[int, int] = {}
+    with open(bag_path, "rb") as f:
+        for chunk in chunk_indexes:
+            f.seek(chunk["chunk_start_offset"] + chunk["chunk_length"])
+            block = f.read(chunk["message_index_length"])
+            offset = 0
+            while offset + 9 <= len(block):
+                opcode = block[offset]
+                (length,) = struct.unpack_from("<Q", block, offset + 1)
+                if opcode == OP_MESSAGE_INDEX:
+                    channel_id, entries_length = struct.unpack_from("<HI", block, offset + 9)
+                    counts[channel_id] = counts.get(channel_id, 0) + entries_length // 16
+                offset += 9 + length
+    return counts
+
+
+def read_mcap_topic_timestamps(bag_path: str) -> Dict[str, np.ndarray]:
+    """
+    Read the log times of all messages of an MCAP file, grouped by topic.
+
+    Chunked files are read from their MessageIndex records, which the ChunkIndex
+    records of the summary point to, so no chunk is decompressed. Unchunked files
+    are walked record by record, reading only the Message record headers.
+
+    Args:
+        bag_path: Path to the MCAP file
+
+    Returns:
+        Dictionary mapping topic names to int64 arrays of log times in nanoseconds,
+        in the order the messages were written
+    """
+    summary = read_mcap_summary(bag_path)
+    channel_times: Dict[int, List[np.ndarray]] = {}
+
+    with open(bag_path, "rb") as f:
+        if summary["chunk_indexes"]:
+            chunk_indexes = sorted(
+                summary["chunk_indexes"], key=lambda chunk: chunk["chunk_start_offset"]
+            )
+            for chunk in chunk_indexes:
+                if not chunk["message_index_offsets"]:
+                    continue
+                f.seek(chunk["chunk_start_offset"] + chunk["chunk_length"])
+                block = f.read(chunk["message_index_length"])
+                for channel_id, times in _decode_message_indexes(block):
+                    channel_times.setdefault(channel_id, []).append(times)
+        else:
+            summary_start, _ = _read_summary_offsets(f, os.fstat(f.fileno()).st_size)
+            for channel_id, times in _read_unchunked_message_times(f, summary_start):
+                channel_times.setdefault(channel_id, []).append(times)
+
+    topic_times: Dict[str, List[np.ndarray]] = {}
+    for channel_id, times in channel_times.items():
+        channel = summary["channels"].get(channel_id)
+        if channel is not None:
+            topic_times.setdefault(channel["topic"], []).extend(times)
+
+    return {topic: np.concatenate(times) for topic, times in topic_times.items()}
+
+
+# (log_time, offset) pairs of a MessageIndex record
+_MESSAGE_INDEX_ENTRY = np.dtype([("log_time", "<u8"), ("offset", "<u8")])
+
+
+def _decode_message_indexes(block: bytes) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Decode the MessageIndex records that follow a chunk.
+
+    Args:
+        block: Bytes of all MessageIndex records of the chunk
+
+    Yields:
+        (channel id, int64 array of log times in write order) tuples
+    """
+    offset = 0
+    while offset + 9 <= len(block):
+        opcode = block[offset]
+        (length,) = struct.unpack_from("<Q", block, offset + 1)
+        content_start = offset + 9
+        offset = content_start + length
+        if opcode != OP_MESSAGE_INDEX:
+            continue
+
+        channel_id, entries_length = struct.unpack_from("<HI", block, content_start)
+        entries = np.frombuffer(
+            block, dtype=_MESSAGE_INDEX_ENTRY, count=entries_length // 16, offset=content_start + 6
+        )
+        # Entries are not guaranteed to be in write order, their chunk offsets are
+        order = np.argsort(entries["offset"], kind="stable")
+        yield channel_id, entries["log_time"][order].astype(np.int64)
+
+
+def _read_unchunked_message_times(f, data_end: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Read the log times of the Message records of an unchunked MCAP file.
+
+    Args:
+        f: Binary file object opened on the MCAP file
+        data_end: Offset where the data section ends
+
+    Yields:
+        (channel id, int64 array of log times in write order) tuples
+    """
+    channel_times: Dict[int, List[int]] = {}
+    offset = len(MCAP_MAGIC)
+    while offset + 9 <= data_end:
+        f.seek(offset)
+        header = f.read(9 + 14)
+        opcode = header[0]
+        (length,) = struct.unpack_from("<Q", header, 1)
+        if opcode == OP_MESSAGE:
+            # channel_id (2) + sequence (4) + log_time (8), the payload is skipped
+            channel_id, _, log_time = struct.unpack_from("<HIQ", header, 9)
+            channel_times.setdefault(channel_id, []).append(log_time)
+        elif opcode == OP_CHUNK:
+            raise ValueError("MCAP file has chunks but no chunk index, it cannot be deep scanned")
+        offset += 9 + length
+
+    for channel_id, times in channel_times.items():
+        yield channel_id, np.array(times, dtype=np.int64)
@@ -5,113 +5,169 @@ This module provides functionality to parse ROS bag files and extract metadata.
 """
 
 import json
+import multiprocessing
 import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import partial
+from queue import Empty, Queue
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 
-import yaml
+import numpy as np
 
 from ..database import RosbagMetadata
-from .utils import sanitize_topic_name
+from .db3_reader import read_db3_bag_info, read_db3_topic_timestamps
+from .discovery import METADATA_FILE_NAME, BagFolder, iter_bag_folders, scan_bag_folder
+from .fingerprint import FingerprintStore
+from .mcap_reader import read_mcap_bag_info, read_mcap_topic_timestamps
+from .topic_timing import DEFAULT_GAP_FACTOR, compute_topic_timing
+from .yaml_cache import MetadataYamlCache, load_yaml_file
 
-# import rosbag
+# Category subdirectories expected below a scanned dataset directory
+BAG_CATEGORY_SUBDIRECTORIES = [
+    "skidpad",
+    "trackdrive",
+    "autox",
+    "acceleration",
+    "undefined",
+]
+
+# Maximum number of split files of one bag that are read in parallel
+MAX_SPLIT_READERS = 8
+
+T = TypeVar("T")
 
 
 class RosbagParser:
     """Parser for ROS bag files."""
 
-    def __init__(self):
-        """Initialize the ROS bag parser."""
-        pass
+    def __init__(
+        self,
+        yaml_cache_dir: Optional[str] = None,
+        deep_scan: bool = False,
+        gap_factor: float = DEFAULT_GAP_FACTOR,
+    ):
+        """
+        Initialize the ROS bag parser.
+
+        Args:
+            yaml_cache_dir: Directory of the parsed metadata.yaml cache, None disables caching
+            deep_scan: Whether to read all message timestamps and add per-topic timing
+                statistics (frequency, jitter, gaps, regressions) to topics_json
+            gap_factor: Gap threshold of the deep scan as a multiple of the median
+                inter-arrival time of a topic
+        """
+        self.yaml_cache = MetadataYamlCache(yaml_cache_dir) if yaml_cache_dir else None
+        self.deep_scan = deep_scan
+        self.gap_factor = gap_factor
 
-    def parse_bag_folder(self, bag_folder_path: str) -> Optional[RosbagMetadata]:
+    def parse_bag_folder(
+        self, bag_folder_path: str, file_stats: Optional[Dict[str, os.stat_result]] = None
+    ) -> Optional[RosbagMetadata]:
         """
         Parse a ROS bag file and extract metadata.
 
         Args:
             bag_path: Path to the ROS bag file
+            file_stats: Stat results of the bag files and metadata.yaml collected during
+                discovery, the folder is scanned if not given
 
         Returns:
             RosbagMetadata object containing the extracted metadata,
             or None if parsing failed
         """
-        if not os.path.exists(bag_folder_path):
+        try:
+            if file_stats is None:
+                file_stats = scan_bag_folder(bag_folder_path)
+        except FileNotFoundError:
             print(f"Error: Bag file does not exist: {bag_folder_path}")
             return None
 
         try:
-            return self._extract_bag_metadata(bag_folder_path)
+            return self._extract_bag_metadata(bag_folder_path, file_stats)
         except Exception as e:
             print(f"Error processing bag file {bag_folder_path}: {str(e)}")
             return None
 
-    def _extract_bag_metadata(self, bag_folder_path: str) -> RosbagMetadata:
+    def _extract_bag_metadata(
+        self, bag_folder_path: str, file_stats: Dict[str, os.stat_result]
+    ) -> RosbagMetadata:
         """
         Extract metadata from a ROS bag file. Input bag_path is validated.
 
+        Recordings split into several storage files (rosbag2 --max-bag-size or
+        --max-bag-duration) are aggregated into a single entry whose file_path is
+        the bag folder.
+
         Args:
             bag_path: Path to the ROS bag file.
+            file_stats: Stat results of the bag files and metadata.yaml, keyed by file name
 
         Returns:
             RosbagMetadata object containing the extracted metadata
         """
-        mcap_files = [f for f in os.listdir(bag_folder_path) if f.endswith(".mcap")]
-        db3_files = [f for f in os.listdir(bag_folder_path) if f.endswith(".db3")]
+        file_names = list(file_stats)
+        mcap_files = sorted(f for f in file_names if f.endswith(".mcap"))
+        db3_files = sorted(f for f in file_names if f.endswith(".db3"))
 
-        if len(mcap_files) + len(db3_files) > 1:
-            raise ValueError(f"Multiple bag files found in directory: {bag_folder_path}")
+        if mcap_files and db3_files:
+            raise ValueError(f"Both mcap and db3 files found in directory: {bag_folder_path}")
         elif len(mcap_files) + len(db3_files) == 0:
             raise ValueError(f"No bag files found in directory: {bag_folder_path}")
-        else:
-            bag_path = os.path.join(bag_folder_path, mcap_files[0] if mcap_files else db3_files[0])
-            file_size = os.path.getsize(bag_path) / (1024 * 1024)  # Convert to MB
-
-            if len(mcap_files) == 1:
-                if os.path.exists(bag_folder_path + "/metadata.yaml"):
-                    metadata = self._extract_bag_metadata_from_yaml(bag_folder_path)
-                    metadata.file_path = os.path.join(bag_folder_path, mcap_files[0])
-                    metadata.file_type = "mcap"
-                    metadata.file_name = mcap_files[0]
-                    metadata.size_mb = file_size
-                    return metadata
 
-                else:
-                    return self._extract_bag_metadata_from_mcap(
-                        os.path.join(bag_folder_path, mcap_files[0])
-                    )
-
-            elif len(db3_files) == 1:
-                if os.path.exists(bag_folder_path + "/metadata.yaml"):
-                    metadata = self._extract_bag_metadata_from_yaml(bag_folder_path)
-                    metadata.file_path = os.path.join(bag_folder_path, db3_files[0])
-                    metadata.file_type = "db3"
-                    metadata.file_name = db3_files[0]
-                    metadata.size_mb = file_size
-                    return metadata
-
-                else:
-                    return self._extract_bag_metadata_from_rosbag(
-                        os.path.join(bag_folder_path, db3_files[0])
-                    )
-            else:
-                raise ValueError(f"Unsupported bag file format in directory: {bag_folder_path}")
+        bag_files = mcap_files or db3_files
+        file_type = "mcap" if mcap_files else "db3"
+        bag_paths = [os.path.join(bag_folder_path, bag_file) for bag_file in bag_files]
+
+        if METADATA_FILE_NAME in file_stats:
+            metadata = self._extract_bag_metadata_from_yaml(
+                bag_folder_path, file_stats[METADATA_FILE_NAME]
+            )
+            if len(metadata.files) != len(bag_files):
+                # Older metadata.yaml versions have no per-file section
+                bag_info = self._merge_bag_infos(self._read_bag_files(bag_paths, file_type))
+                metadata.files_json = json.dumps(self._convert_files(bag_info))
+        else:
+            metadata = self._extract_bag_metadata_from_storage(bag_paths, file_type)
 
-    def _extract_bag_metadata_from_yaml(self, bag_path: str) -> RosbagMetadata:
+        if len(bag_files) == 1:
+            metadata.file_path = bag_paths[0]
+            metadata.file_name = bag_files[0]
+        else:
+            # ros2 bag play takes the folder and plays all splits in order
+            metadata.file_path = bag_folder_path
+            metadata.file_name = os.path.basename(os.path.normpath(bag_folder_path))
+        metadata.file_type = file_type
+        metadata.size_mb = sum(file_stats[name].st_size for name in bag_files) / (1024 * 1024)
+
+        if self.deep_scan:
+            self._add_topic_timing(metadata, bag_paths, file_type)
+        return metadata
+
+    def _extract_bag_metadata_from_yaml(
+        self, bag_path: str, yaml_stat: Optional[os.stat_result] = None
+    ) -> RosbagMetadata:
         """
         Extract metadata from a ROS bag file using YAML.
         Bag_path is validated.
 
         Args:
             bag_path: Path to the ROS bag file
+            yaml_stat: Stat result of metadata.yaml, used as the cache key if given
 
         Returns:
             RosbagMetadata object containing the extracted metadata
         """
-        with open(bag_path + "/metadata.yaml", "r") as f:
-            metadata = yaml.safe_load(f)
-            metadata = self._convert_metaData_toRosbagMetadata(metadata, bag_path)
-            print(f"Converted matadata from yaml: {bag_path + '/metadata.yaml'}")
-            return metadata
+        yaml_path = bag_path + "/metadata.yaml"
+        if self.yaml_cache is not None:
+            metadata = self.yaml_cache.load(yaml_path, yaml_stat)
+        else:
+            metadata = load_yaml_file(yaml_path)
+        metadata = self._convert_metaData_toRosbagMetadata(metadata, bag_path)
+        print(f"Converted matadata from yaml: {yaml_path}")
+        return metadata
 
     def _convert_metaData_toRosbagMetadata(
         self, metadata: Dict[str, Any], bag_folder_path: str = ""
@@ -148,17 +204,19 @@ class RosbagParser:
         for i, topic_with_count in enumerate(metadata["topics_with_message_count"]):
             # 将 message_count 直接添加到对应的 topic 字典中
             topics[i]["message_count"] = topic_with_count["message_count"]
+            if "bytes" in topic_with_count:
+                topics[i]["bytes"] = topic_with_count["bytes"]
         topics_json = json.dumps(topics)
 
-        #  Extract topic-specific counts and other metadata
+        # Per-topic counts live in topics_json and the rosbag_topics table, so new
+        # topic names no longer add columns to the rosbags table
         additional_metadata = {}
-        for topic in topics:
-            topic_key = f"topic_{sanitize_topic_name(topic['name'])}_count"
-            additional_metadata[topic_key] = topic["message_count"]
 
         # Look for custom metadata in specific message types
         # This is where you would implement logic to extract specific data from messages
 
+        files_json = json.dumps(self._convert_files(metadata))
+
         # 创建RosbagMetadata对象
         rosbag_metadata = RosbagMetadata(
             file_path=bag_folder_path,
@@ -173,115 +231,436 @@ class RosbagParser:
             topic_count=len(topics),
             topics_json=topics_json,
             metadata_json=json.dumps(additional_metadata),
+            files_json=files_json,
         )
 
         return rosbag_metadata
 
-    def _extract_bag_metadata_from_mcap(self, bag_path: str) -> RosbagMetadata:
+    def _convert_files(self, bag_info: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
-        Extract metadata from a ROS bag file using MCAP.
+        Get the time bounds and message count of each storage file of a bag.
+
+        Later reads use this to open only the split that covers a time range.
 
         Args:
-            bag_path: Path to the ROS bag file
+            bag_info: Content of the "rosbag2_bagfile_information" section
+
+        Returns:
+            List of dictionaries with path, start_time_ns, end_time_ns and message_count
+        """
+        files = []
+        for file_info in bag_info.get("files") or []:
+            start_ns = file_info["starting_time"]["nanoseconds_since_epoch"]
+            files.append(
+                {
+                    "path": file_info["path"],
+                    "start_time_ns": start_ns,
+                    "end_time_ns": start_ns + file_info["duration"]["nanoseconds"],
+                    "message_count": file_info["message_count"],
+                }
+            )
+
+        relative_file_paths = bag_info.get("relative_file_paths") or []
+        if not files and len(relative_file_paths) == 1:
+            # A single file covers the whole bag
+            start_ns = bag_info["starting_time"]["nanoseconds_since_epoch"]
+            files.append(
+                {
+                    "path": relative_file_paths[0],
+                    "start_time_ns": start_ns,
+                    "end_time_ns": start_ns + bag_info["duration"]["nanoseconds"],
+                    "message_count": bag_info["message_count"],
+                }
+            )
+        return files
+
+    def _extract_bag_metadata_from_storage(
+        self, bag_paths: List[str], file_type: str
+    ) -> RosbagMetadata:
+        """
+        Extract metadata directly from the storage files of a bag.
+
+        MCAP files are read from their summary section, db3 files with aggregate
+        SQL queries. Split files are read in parallel and merged.
+
+        Args:
+            bag_paths: Paths to the storage files of one bag
+            file_type: "mcap" or "db3"
 
         Returns:
             RosbagMetadata object containing the extracted metadata
         """
-        # Placeholder for MCAP extraction logic
-        pass
+        bag_info = self._merge_bag_infos(self._read_bag_files(bag_paths, file_type))
+        metadata = self._convert_metaData_toRosbagMetadata(
+            {"rosbag2_bagfile_information": bag_info}, os.path.dirname(bag_paths[0])
+        )
+        print(f"Converted metadata from {file_type}: {', '.join(bag_paths)}")
+        return metadata
 
-    def _extract_bag_metadata_from_rosbag(self, bag_path: str) -> RosbagMetadata:
+    def _read_bag_files(self, bag_paths: List[str], file_type: str) -> List[Dict[str, Any]]:
         """
-        Extract metadata from a ROS bag file.
+        Read the bag information of each storage file.
 
         Args:
-            bag_path: Path to the ROS bag file
+            bag_paths: Paths to the storage files of one bag
+            file_type: "mcap" or "db3"
 
         Returns:
-            RosbagMetadata object containing the extracted metadata
+            List of bag information dictionaries, one per file
+        """
+        reader = read_mcap_bag_info if file_type == "mcap" else read_db3_bag_info
+        return _map_bag_files(reader, bag_paths)
+
+    def _add_topic_timing(
+        self, metadata: RosbagMetadata, bag_paths: List[str], file_type: str
+    ) -> None:
+        """
+        Add timing statistics to every topic of a bag by reading all message timestamps.
+
+        Args:
+            metadata: Metadata of the bag, its topics_json is updated in place
+            bag_paths: Paths to the storage files of the bag
+            file_type: "mcap" or "db3"
+        """
+        reader = read_mcap_topic_timestamps if file_type == "mcap" else read_db3_topic_timestamps
+        file_timestamps = _map_bag_files(reader, bag_paths)
+
+        # Split files are concatenated in recording order. File names do not sort
+        # naturally (bag_10 < bag_2), so order by the first timestamp of each file.
+        file_timestamps.sort(
+            key=lambda topics: min(
+                (int(times.min()) for times in topics.values() if times.size), default=0
+            )
+        )
+
+        topics = metadata.topics
+        for topic in topics:
+            times = [
+                file_topics[topic["name"]]
+                for file_topics in file_timestamps
+                if topic["name"] in file_topics
+            ]
+            timestamps_ns = np.concatenate(times) if times else np.empty(0, dtype=np.int64)
+            topic.update(compute_topic_timing(timestamps_ns, self.gap_factor))
+        metadata.topics_json = json.dumps(topics)
+        print(f"Computed topic timing for {len(topics)} topics: {', '.join(bag_paths)}")
+
+    def _merge_bag_infos(self, bag_infos: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge the bag information of the split files of one recording.
+
+        Args:
+            bag_infos: Bag information dictionaries, one per file
+
+        Returns:
+            Bag information for the whole recording, with a "files" section holding
+            the time bounds and message count of every split
         """
-        # bag = rosbag.Bag(bag_path)
-        # info = bag.get_type_and_topic_info()
-
-        # # Get basic info
-        # file_size = os.path.getsize(bag_path) / (1024 * 1024)  # Convert to MB
-
-        # # Extract topic-specific counts and other metadata
-        # additional_metadata = {}
-        # for topic_name, topic_info in info.topics.items():
-        #     topic_key = f"topic_{sanitize_topic_name(topic_name)}_count"
-        #     additional_metadata[topic_key] = topic_info.message_count
-
-        # # Look for custom metadata in specific message types
-        # # This is where you would implement logic to extract specific data from
-        # messages
-
-        # # Create and return the metadata object
-        # metadata = RosbagMetadata(
-        #     file_path=bag_path,
-        #     map_category=determine_map_category(bag_path),
-        #     start_time=datetime.fromtimestamp(bag.get_start_time()),
-        #     end_time=datetime.fromtimestamp(bag.get_end_time()),
-        #     duration=bag.get_end_time() - bag.get_start_time(),
-        #     size_mb=file_size,
-        #     message_count=bag.get_message_count(),
-        #     topic_count=len(info.topics),
-        #     topics_json=json.dumps(list(info.topics.keys())),
-        #     metadata_json=json.dumps(additional_metadata),
-        # )
-
-        # bag.close()
-        # return metadata
-        pass
-
-    def scan_directory(self, directory_path: str, recursive: bool = True) -> List[RosbagMetadata]:
+        bag_infos = sorted(
+            bag_infos, key=lambda info: info["starting_time"]["nanoseconds_since_epoch"]
+        )
+
+        topics: Dict[str, Dict[str, Any]] = {}
+        for info in bag_infos:
+            for topic in info["topics_with_message_count"]:
+                name = topic["topic_metadata"]["name"]
+                if name not in topics:
+                    topics[name] = {
+                        "topic_metadata": dict(topic["topic_metadata"]),
+                        "message_count": 0,
+                    }
+                # Unknown in one split, unknown for the recording
+                if topic["message_count"] is None or topics[name]["message_count"] is None:
+                    topics[name]["message_count"] = None
+                else:
+                    topics[name]["message_count"] += topic["message_count"]
+                if "bytes" in topic:
+                    topics[name]["bytes"] = topics[name].get("bytes", 0) + topic["bytes"]
+
+        # Empty splits have no time bounds
+        bounded = [info for info in bag_infos if info["starting_time"]["nanoseconds_since_epoch"]]
+        start_ns = min(
+            (info["starting_time"]["nanoseconds_since_epoch"] for info in bounded), default=0
+        )
+        end_ns = max(
+            (
+                info["starting_time"]["nanoseconds_since_epoch"] + info["duration"]["nanoseconds"]
+                for info in bounded
+            ),
+            default=0,
+        )
+
+        return {
+            "storage_identifier": bag_infos[0]["storage_identifier"],
+            "relative_file_paths": [info["relative_file_paths"][0] for info in bag_infos],
+            "duration": {"nanoseconds": end_ns - start_ns},
+            "starting_time": {"nanoseconds_since_epoch": start_ns},
+            "message_count": (
+                None
+                if any(info["message_count"] is None for info in bag_infos)
+                else sum(info["message_count"] for info in bag_infos)
+            ),
+            "topics_with_message_count": list(topics.values()),
+            "files": [
+                {
+                    "path": info["relative_file_paths"][0],
+                    "starting_time": info["starting_time"],
+                    "duration": info["duration"],
+                    "message_count": info["message_count"],
+                }
+                for info in bag_infos
+            ],
+        }
+
+    def scan_directory(
+        self,
+        directory_path: str,
+        recursive: bool = True,
+        workers: int = 1,
+        timeout: Optional[float] = None,
+        fingerprints: Optional[FingerprintStore] = None,
+    ) -> List[RosbagMetadata]:
         """
         Scan a directory for ROS bag files and parse them.
 
+        With more than one worker the bag folders are parsed in a process pool.
+        The result is the same as for the serial scan, in the same order.
+
+        With a fingerprint store only new or changed bag folders are parsed.
+        Skipped folders are listed in `fingerprints.skipped`, parsed folders stay
+        pending in the store until the caller commits them.
+
         Args:
             directory_path: Path to the directory containing ROS bag files
             recursive: Whether to search recursively through subdirectories
+            workers: Number of worker processes, 1 parses in the calling process
+            timeout: Seconds a worker may spend on a single bag folder before it is
+                killed and the folder is skipped (only used with more than one worker)
+            fingerprints: Fingerprints of already ingested folders, None parses everything
 
         Returns:
             List of RosbagMetadata objects for the found bag files
         """
+        # Results arrive in completion order, sort them back into discovery order
+        parsed = sorted(
+            self._iter_parsed_bag_folders(directory_path, workers, timeout, fingerprints),
+            key=lambda item: item[0],
+        )
+        return [metadata for _, metadata in parsed]
+
+    def iter_scan_directory(
+        self,
+        directory_path: str,
+        recursive: bool = True,
+        workers: int = 1,
+        timeout: Optional[float] = None,
+        fingerprints: Optional[FingerprintStore] = None,
+    ) -> Iterator[RosbagMetadata]:
+        """
+        Scan a directory for ROS bag files and yield their metadata as they are parsed.
+
+        Unlike scan_directory, nothing is accumulated: memory stays bounded by the
+        number of workers and the first bag is available as soon as it is parsed.
+        With more than one worker the metadata is yielded in completion order.
+
+        Args:
+            directory_path: Path to the directory containing ROS bag files
+            recursive: Whether to search recursively through subdirectories
+            workers: Number of worker processes, 1 parses in the calling process
+            timeout: Seconds a worker may spend on a single bag folder
+            fingerprints: Fingerprints of already ingested folders, None parses everything
+
+        Yields:
+            RosbagMetadata objects for the found bag files
+        """
+        for _, metadata in self._iter_parsed_bag_folders(
+            directory_path, workers, timeout, fingerprints
+        ):
+            yield metadata
+
+    def _iter_parsed_bag_folders(
+        self,
+        directory_path: str,
+        workers: int,
+        timeout: Optional[float],
+        fingerprints: Optional[FingerprintStore],
+    ) -> Iterator[Tuple[int, RosbagMetadata]]:
+        """
+        Discover and parse the bag folders of a directory.
+
+        Args:
+            directory_path: Path to the directory containing ROS bag files
+            workers: Number of worker processes, 1 parses in the calling process
+            timeout: Seconds a worker may spend on a single bag folder
+            fingerprints: Fingerprints of already ingested folders, None parses everything
+
+        Yields:
+            (discovery index, RosbagMetadata) tuples in completion order
+        """
         if not os.path.isdir(directory_path):
             print(f"Error: Directory does not exist: {directory_path}")
-            return []
+            return
+
+        bag_folders = self._find_bag_folders(directory_path)
+        if fingerprints is not None:
+            bag_folders = [
+                bag_folder
+                for bag_folder in bag_folders
+                if not fingerprints.is_unchanged(bag_folder.path, bag_folder.file_stats)
+            ]
+
+        if workers > 1:
+            parsed = self._parse_bag_folders_parallel(bag_folders, workers, timeout)
+        else:
+            parsed = (
+                (index, self.parse_bag_folder(bag_folder.path, bag_folder.file_stats))
+                for index, bag_folder in enumerate(bag_folders)
+            )
+
+        for index, metadata in parsed:
+            bag_folder = bag_folders[index]
+            if metadata:
+                metadata.map_category = bag_folder.map_category
+                yield index, metadata
+            elif fingerprints is not None:
+                # Retry the folder on the next scan
+                fingerprints.discard(bag_folder.path)
+
+    def _find_bag_folders(self, directory_path: str) -> List[BagFolder]:
+        """
+        Find all bag folders below the category subdirectories of a directory.
+
+        Args:
+            directory_path: Path to the directory containing ROS bag files
 
+        Returns:
+            List of BagFolder tuples in discovery order
+        """
         # check the directory structure is correct
-        subdirectories = [
-            "skidpad",
-            "trackdrive",
-            "autox",
-            "acceleration",
-            "undefined",
-        ]
-        for subdir in subdirectories:
+        for subdir in BAG_CATEGORY_SUBDIRECTORIES:
             if not os.path.exists(os.path.join(directory_path, subdir)):
                 raise ValueError(
                     f"Directory structure is incorrect, expected: {directory_path}/{subdir}"
                 )
 
-        result = []
-        for subdir in subdirectories:
-            map_category = subdir
-
-            for root, dirs, files in os.walk(directory_path + "/" + subdir):
-                for file in files:
-                    if file.endswith(".db3") or file.endswith(".mcap"):
-                        metadata = self.parse_bag_folder(root)
-                        if metadata:
-                            metadata.map_category = map_category
-                            result.append(metadata)
-                        break
-
-            # subdir_path = os.path.join(directory_path, subdir)
-            # res = next(os.walk(subdir_path))
-            # _, dirs, files = res
-            # for dir in dirs:
-            #     metadata = self.parse_bag_folder(os.path.join(subdir_path, dir))
-            #     if metadata:
-            #         result.append(metadata)
-
-        return result
+        bag_folders = []
+        for subdir in BAG_CATEGORY_SUBDIRECTORIES:
+            bag_folders.extend(iter_bag_folders(directory_path + "/" + subdir, subdir))
+
+        return bag_folders
+
+    def _parse_bag_folders_parallel(
+        self, bag_folders: List[BagFolder], workers: int, timeout: Optional[float]
+    ) -> Iterator[Tuple[int, Optional[RosbagMetadata]]]:
+        """
+        Parse bag folders in a process pool.
+
+        At most `workers` folders are in flight at any time, so every submitted
+        folder starts immediately and its timeout is measured from submission.
+        A worker that exceeds the timeout can only be stopped by terminating the
+        pool; the other in-flight folders are then resubmitted to a new pool.
+
+        Args:
+            bag_folders: Bag folders to parse
+            workers: Number of worker processes
+            timeout: Seconds allowed per bag folder, None waits indefinitely
+
+        Yields:
+            (index in bag_folders, RosbagMetadata or None) tuples in completion order
+        """
+        pending = deque(enumerate(bag_folders))
+
+        while pending:
+            done: "Queue[Tuple[int, Optional[RosbagMetadata]]]" = Queue()
+            in_flight: Dict[int, Tuple[str, float]] = {}
+            pool = multiprocessing.Pool(workers)
+            try:
+                while pending or in_flight:
+                    while pending and len(in_flight) < workers:
+                        index, bag_folder = pending.popleft()
+                        folder = bag_folder.path
+                        pool.apply_async(
+                            _parse_bag_folder_task,
+                            (self, folder, bag_folder.file_stats),
+                            callback=partial(_put_result, done, index),
+                            error_callback=partial(_put_error, done, index, folder),
+                        )
+                        deadline = time.monotonic() + timeout if timeout else float("inf")
+                        in_flight[index] = (folder, deadline)
+
+                    wait = min(deadline for _, deadline in in_flight.values()) - time.monotonic()
+                    try:
+                        index, metadata = done.get(timeout=max(wait, 0) if timeout else None)
+                    except Empty:
+                        now = time.monotonic()
+                        expired = [
+                            (index, folder)
+                            for index, (folder, deadline) in in_flight.items()
+                            if deadline <= now
+                        ]
+                        for index, folder in expired:
+                            print(f"Error: Timed out after {timeout}s parsing: {folder}")
+                            del in_flight[index]
+                            yield index, None
+                        if expired:
+                            break
+                        continue
+
+                    del in_flight[index]
+                    yield index, metadata
+            finally:
+                pool.terminate()
+                pool.join()
+
+            # Keep results that finished before the pool was terminated, retry the rest
+            while not done.empty():
+                index, metadata = done.get()
+                if in_flight.pop(index, None) is not None:
+                    yield index, metadata
+            pending.extendleft(
+                (index, bag_folders[index]) for index in sorted(in_flight, reverse=True)
+            )
+
+
+def _map_bag_files(reader: Callable[[str], T], bag_paths: List[str]) -> List[T]:
+    """
+    Apply a reader to every storage file of a bag, reading split files in parallel.
+
+    Args:
+        reader: Function reading one storage file
+        bag_paths: Paths to the storage files of one bag
+
+    Returns:
+        Results of the reader, in the order of bag_paths
+    """
+    if len(bag_paths) == 1:
+        return [reader(bag_paths[0])]
+
+    # The readers spend their time in file I/O, SQLite and NumPy, which release the GIL
+    with ThreadPoolExecutor(max_workers=min(len(bag_paths), MAX_SPLIT_READERS)) as executor:
+        return list(executor.map(reader, bag_paths))
+
+
+def _parse_bag_folder_task(
+    parser: RosbagParser, bag_folder_path: str, file_stats: Dict[str, os.stat_result]
+) -> Optional[RosbagMetadata]:
+    """Parse a single bag folder in a worker process."""
+    return parser.parse_bag_folder(bag_folder_path, file_stats)
+
+
+def _put_result(
+    done: "Queue[Tuple[int, Optional[RosbagMetadata]]]",
+    index: int,
+    metadata: Optional[RosbagMetadata],
+) -> None:
+    done.put((index, metadata))
+
+
+def _put_error(
+    done: "Queue[Tuple[int, Optional[RosbagMetadata]]]",
+    index: int,
+    bag_folder_path: str,
+    error: BaseException,
+) -> None:
+    print(f"Error processing bag file {bag_folder_path}: {str(error)}")
+    done.put((index, None))
@@ -0,0 +1,61 @@
+"""
+Per-topic timing statistics for the Cockpit application.
+
+This module computes publishing frequency, jitter, gaps and timestamp
+regressions of a topic from the timestamps collected by a deep scan.
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# A gap is an inter-arrival time longer than this many median periods of the topic
+DEFAULT_GAP_FACTOR = 2.0
+
+
+def compute_topic_timing(
+    timestamps_ns: np.ndarray, gap_factor: float = DEFAULT_GAP_FACTOR
+) -> Dict[str, Optional[Any]]:
+    """
+    Compute timing statistics of a topic.
+
+    The gap threshold is relative to the median inter-arrival time, so one factor
+    fits a 10 Hz lidar and a 1 kHz IMU alike: with the default factor of 2 a gap
+    means at least one dropped message.
+
+    Args:
+        timestamps_ns: Message timestamps in nanoseconds, in the order they were written
+        gap_factor: Gap threshold as a multiple of the median inter-arrival time
+
+    Returns:
+        Dictionary with frequency (Hz), jitter_s (std of the inter-arrival times),
+        max_gap_s, gap_threshold_s, gap_count and regression_count (timestamps
+        smaller than their predecessor). The frequency and time values are None
+        for topics with fewer than two messages.
+    """
+    timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+    if timestamps_ns.size < 2:
+        return {
+            "frequency": None,
+            "jitter_s": None,
+            "max_gap_s": None,
+            "gap_threshold_s": None,
+            "gap_count": 0,
+            "regression_count": 0,
+        }
+
+    regression_count = int(np.count_nonzero(np.diff(timestamps_ns) < 0))
+
+    # Inter-arrival times in time order, regressions are reported separately
+    intervals_s = np.diff(np.sort(timestamps_ns)) / 1e9
+    span_s = float(intervals_s.sum())
+    gap_threshold_s = gap_factor * float(np.median(intervals_s))
+
+    return {
+        "frequency": (timestamps_ns.size - 1) / span_s if span_s > 0 else None,
+        "jitter_s": float(intervals_s.std()),
+        "max_gap_s": float(intervals_s.max()),
+        "gap_threshold_s": gap_threshold_s,
+        "gap_count": int(np.count_nonzero(intervals_s > gap_threshold_s)),
+        "regression_count": regression_count,
+    }
@@ -0,0 +1,346 @@
+"""
+ROS bag folder watcher for the Cockpit application.
+
+This module watches a dataset directory and ingests bag folders into the
+database as soon as their recording is complete. Changes are detected with
+inotify on Linux, or with a cheap polling diff of folder fingerprints where
+inotify is not available (e.g. network mounts or other platforms).
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..database import DatabaseManager
+from .discovery import METADATA_FILE_NAME, is_bag_file, scan_bag_folder
+from .fingerprint import FingerprintStore, compute_folder_fingerprint
+from .parser import BAG_CATEGORY_SUBDIRECTORIES, RosbagParser
+
+# inotify event masks, see inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# IN_MODIFY is left out on purpose: a recording lidar bag would flood the queue,
+# and a folder is only ingested once its fingerprint stops changing anyway
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal ctypes binding for the Linux inotify API."""
+
+    def __init__(self):
+        """
+        Create an inotify instance.
+
+        Raises:
+            OSError: If inotify is not available on this system
+        """
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found, inotify is not available")
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """
+        Watch a directory.
+
+        Args:
+            path: Directory to watch
+            mask: inotify event mask
+
+        Returns:
+            Watch descriptor
+        """
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read_events(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """
+        Wait for events.
+
+        Args:
+            timeout: Seconds to wait for the first event
+
+        Returns:
+            List of (watch descriptor, mask, name) tuples
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + INOTIFY_EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = INOTIFY_EVENT_HEADER.unpack_from(data, offset)
+            offset += INOTIFY_EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class BagFolderWatcher:
+    """Watches a dataset directory and ingests completed bag folders."""
+
+    def __init__(
+        self,
+        directory_path: str,
+        parser: RosbagParser,
+        db_manager: DatabaseManager,
+        settle_seconds: float = 2.0,
+        poll_interval: float = 10.0,
+        use_inotify: bool = True,
+    ):
+        """
+        Initialize the watcher.
+
+        Args:
+            directory_path: Dataset directory with the category subdirectories
+            parser: Parser used for the bag folders
+            db_manager: Database manager the bags are written to
+            settle_seconds: Time a folder must stay unchanged before it is ingested
+            poll_interval: Seconds between polling diffs when inotify is not used
+            use_inotify: Whether to try inotify before falling back to polling
+        """
+        self.directory_path = directory_path
+        self.parser = parser
+        self.db_manager = db_manager
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+
+        self.fingerprints = FingerprintStore(db_manager.get_bag_fingerprints())
+        # folder -> time of the last observed change
+        self.dirty: Dict[str, float] = {}
+        # folder -> fingerprint at the last readiness check
+        self.last_seen: Dict[str, str] = {}
+
+        self.stop_event = threading.Event()
+        self._inotify: Optional[_Inotify] = None
+        self._watches: Dict[int, str] = {}
+
+    def stop(self) -> None:
+        """Ask a running watcher to stop."""
+        self.stop_event.set()
+
+    def run(self) -> None:
+        """Watch the dataset directory until stop() is called."""
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+                # Folder paths are built like in RosbagParser._find_bag_folders, so they
+                # match the fingerprints and file paths written by a directory scan
+                for subdir in BAG_CATEGORY_SUBDIRECTORIES:
+                    self._add_watches(self.directory_path + "/" + subdir)
+                print(f"Watching {self.directory_path} with inotify")
+            except OSError as e:
+                print(f"inotify not available ({e}), falling back to polling")
+                self._close_inotify()
+
+        if self._inotify is None:
+            print(f"Polling {self.directory_path} every {self.poll_interval}s")
+
+        # Catch up on everything that changed while the watcher was not running
+        self.poll_once()
+        next_poll = time.monotonic() + self.poll_interval
+        try:
+            while not self.stop_event.is_set():
+                if self._inotify is not None:
+                    self._process_inotify_events(timeout=min(self.settle_seconds, 1.0))
+                else:
+                    self.stop_event.wait(min(self.settle_seconds, self.poll_interval, 1.0))
+                    if time.monotonic() >= next_poll:
+                        self.poll_once()
+                        next_poll = time.monotonic() + self.poll_interval
+                self.ingest_ready_folders()
+        finally:
+            self._close_inotify()
+
+    def poll_once(self) -> None:
+        """Diff all bag folders against their ingested fingerprints and mark changes."""
+        now = time.monotonic()
+        try:
+            for bag_folder in self.parser._find_bag_folders(self.directory_path):
+                fingerprint = compute_folder_fingerprint(bag_folder.path, bag_folder.file_stats)
+                if self.fingerprints.fingerprints.get(bag_folder.path) != fingerprint:
+                    self.dirty.setdefault(bag_folder.path, now)
+        except (OSError, ValueError) as e:
+            # A category directory was renamed or unmounted, try again on the next poll
+            print(f"Error polling {self.directory_path}, retrying on the next poll: {str(e)}")
+
+    def ingest_ready_folders(self, now: Optional[float] = None) -> List[str]:
+        """
+        Ingest every dirty folder whose recording is complete.
+
+        A folder is complete once metadata.yaml exists and its fingerprint did not
+        change for settle_seconds. rosbag2 writes metadata.yaml when the bag is
+        closed, and an upload is still running while the fingerprint changes.
+
+        Args:
+            now: Current monotonic time, defaults to time.monotonic()
+
+        Returns:
+            List of ingested folder paths
+        """
+        now = time.monotonic() if now is None else now
+        ingested = []
+        for folder, changed_at in list(self.dirty.items()):
+            if now - changed_at < self.settle_seconds:
+                continue
+
+            try:
+                file_stats = scan_bag_folder(folder)
+            except OSError:
+                # The folder was removed or renamed
+                self._forget(folder)
+                continue
+            fingerprint = compute_folder_fingerprint(folder, file_stats)
+
+            has_bag_file = any(is_bag_file(name) for name in file_stats)
+            if not has_bag_file or METADATA_FILE_NAME not in file_stats:
+                # Still recording, a later close/move event marks the folder again
+                self._forget(folder)
+                continue
+
+            if self.last_seen.get(folder) != fingerprint:
+                # Changed since the last look, wait for another settle period
+                self.last_seen[folder] = fingerprint
+                self.dirty[folder] = now
+                continue
+
+            self._forget(folder)
+            if self.fingerprints.is_unchanged(folder, file_stats):
+                continue
+            if self._ingest(folder, file_stats):
+                ingested.append(folder)
+        # Only a directory scan reports the skipped folders, don't let them pile up
+        self.fingerprints.skipped.clear()
+        return ingested
+
+    def _ingest(self, folder: str, file_stats: Dict[str, os.stat_result]) -> bool:
+        """
+        Parse a single bag folder and write it to the database.
+
+        Args:
+            folder: Path to the bag folder
+            file_stats: Stat results of the bag files and metadata.yaml
+
+        Returns:
+            True if the folder was ingested
+        """
+        metadata = self.parser.parse_bag_folder(folder, file_stats)
+        if metadata is None:
+            self.fingerprints.discard(folder)
+            return False
+
+        metadata.map_category = self._map_category(folder)
+        try:
+            self.db_manager.insert_rosbag_metadata(metadata)
+        except Exception as e:
+            print(f"Error ingesting bag folder {folder}: {str(e)}")
+            self.fingerprints.discard(folder)
+            return False
+
+        self.db_manager.save_bag_fingerprints(self.fingerprints.commit())
+        return True
+
+    def _map_category(self, folder: str) -> str:
+        """Get the map category from the first path component below the dataset directory."""
+        category = os.path.relpath(folder, self.directory_path).split(os.sep)[0]
+        return category if category in BAG_CATEGORY_SUBDIRECTORIES else "undefined"
+
+    def _forget(self, folder: str) -> None:
+        self.dirty.pop(folder, None)
+        self.last_seen.pop(folder, None)
+
+    def _add_watches(self, root: str, mark_changed: bool = False) -> None:
+        """
+        Watch a directory tree.
+
+        Args:
+            root: Top of the directory tree
+            mark_changed: Whether to mark every folder of the tree as changed. A folder
+                that is moved into the dataset in one piece produces no further file
+                events, so new trees are checked once.
+        """
+        now = time.monotonic()
+        for dirpath, _, _ in os.walk(root):
+            wd = self._inotify.add_watch(dirpath, WATCH_MASK)
+            self._watches[wd] = dirpath
+            if mark_changed:
+                self.dirty.setdefault(dirpath, now)
+
+    def _process_inotify_events(self, timeout: float) -> None:
+        """
+        Read inotify events and mark the affected folders as changed.
+
+        Args:
+            timeout: Seconds to wait for the first event
+        """
+        now = time.monotonic()
+        for wd, mask, name in self._inotify.read_events(timeout):
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, fall back to a full diff
+                print("inotify queue overflow, rescanning")
+                self.poll_once()
+                continue
+
+            folder = self._watches.get(wd)
+            if folder is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+
+            path = os.path.join(folder, name)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                try:
+                    self._add_watches(path, mark_changed=True)
+                except OSError as e:
+                    if e.errno == errno.ENOSPC:
+                        print("inotify watch limit reached, falling back to polling")
+                        self._close_inotify()
+                        return
+                    # The directory disappeared again
+                continue
+
+            self.dirty[folder] = now
+
+    def _close_inotify(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+            self._watches = {}
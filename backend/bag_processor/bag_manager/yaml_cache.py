@@ -0,0 +1,113 @@
+"""
+metadata.yaml loading for the Cockpit application.
+
+This module parses rosbag2 metadata.yaml files with the libyaml C loader when
+PyYAML was built with it, and keeps the parsed results in an on-disk cache so
+unchanged files are not parsed again on the next scan.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Optional
+
+import yaml
+
+try:
+    # Roughly 10x faster than the pure Python loader, same safe subset of YAML
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+def load_yaml_file(yaml_path: str) -> Any:
+    """
+    Parse a YAML file with the fastest available safe loader.
+
+    Args:
+        yaml_path: Path to the YAML file
+
+    Returns:
+        Parsed YAML content
+    """
+    with open(yaml_path, "rb") as f:
+        return yaml.load(f, Loader=SafeLoader)
+
+
+class MetadataYamlCache:
+    """Caches parsed metadata.yaml files on disk, keyed by path, mtime and size."""
+
+    def __init__(self, cache_dir: str):
+        """
+        Initialize the cache.
+
+        Each entry is a small JSON file in cache_dir, so worker processes can read
+        and write the cache concurrently and only the parser's cache_dir is sent
+        to them.
+
+        Args:
+            cache_dir: Directory holding the cache entries, created when needed
+        """
+        self.cache_dir = cache_dir
+
+    def load(self, yaml_path: str, st: Optional[os.stat_result] = None) -> Any:
+        """
+        Get the parsed content of a YAML file, parsing it only if it changed.
+
+        Args:
+            yaml_path: Path to the YAML file
+            st: Stat result of the YAML file if the caller already has it
+
+        Returns:
+            Parsed YAML content
+        """
+        yaml_path = os.path.abspath(yaml_path)
+        if st is None:
+            st = os.stat(yaml_path)
+        entry_path = self._entry_path(yaml_path)
+
+        cached = self._read_entry(entry_path)
+        if (
+            cached is not None
+            and cached.get("path") == yaml_path
+            and cached.get("mtime_ns") == st.st_mtime_ns
+            and cached.get("size") == st.st_size
+        ):
+            return cached["data"]
+
+        data = load_yaml_file(yaml_path)
+        self._write_entry(
+            entry_path,
+            {"path": yaml_path, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "data": data},
+        )
+        return data
+
+    def _entry_path(self, yaml_path: str) -> str:
+        digest = hashlib.sha1(yaml_path.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".json")
+
+    @staticmethod
+    def _read_entry(entry_path: str) -> Optional[dict]:
+        try:
+            with open(entry_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # Missing or partially written entries are treated as cache misses
+            return None
+
+    def _write_entry(self, entry_path: str, entry: dict) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(entry, f)
+                # Atomic, so concurrent readers never see a partial entry
+                os.replace(tmp_path, entry_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except (OSError, TypeError, ValueError) as e:
+            # The cache is an optimization, a failed write must not fail the scan
+            print(f"Warning: Could not write metadata cache entry {entry_path}: {str(e)}")
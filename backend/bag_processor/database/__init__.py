@@ -4,15 +4,23 @@ Database package for the Cockpit application.
 This package contains modules for database models, schemas, and operations.
 """
 
-from .db_connection_pool import DBConnectionPool
+from .async_operations import AsyncDatabaseManager
+from .db_connection_pool import DEFAULT_SQLITE_PROFILE, DBConnectionPool, SQLiteProfile
 from .db_initializer import DBInitializer
 from .modles import RosbagMetadata, SchemaModification
-from .operations import DatabaseManager
+from .operations import CatalogVersion, DatabaseManager, UpsertCounts
+from .pagination import RosbagPage
 
 __all__ = [
     "RosbagMetadata",
     "SchemaModification",
     "DatabaseManager",
+    "AsyncDatabaseManager",
+    "UpsertCounts",
+    "CatalogVersion",
+    "RosbagPage",
     "DBInitializer",
     "DBConnectionPool",
+    "SQLiteProfile",
+    "DEFAULT_SQLITE_PROFILE",
 ]
@@ -0,0 +1,94 @@
+"""
+Async database access for the Cockpit application.
+
+The FastAPI routes are coroutines, so a synchronous SQLite query would stall the
+event loop and every other request with it. AsyncDatabaseManager runs the
+DatabaseManager operations on a dedicated thread pool and awaits them instead.
+aiosqlite is not a dependency, and the pool keeps one code path for the CLI and
+the API.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from .operations import CatalogVersion, DatabaseManager
+from .pagination import RosbagPage
+
+T = TypeVar("T")
+
+
+class AsyncDatabaseManager:
+    """Awaitable wrapper running DatabaseManager operations on a dedicated thread pool."""
+
+    def __init__(self, db_manager: DatabaseManager, max_workers: Optional[int] = None):
+        """
+        Initialize the async database manager.
+
+        Args:
+            db_manager: DatabaseManager doing the actual work
+            max_workers: Number of database threads, defaults to the connection pool size
+        """
+        self.db_manager = db_manager
+        if max_workers is None:
+            max_workers = db_manager.conn_pool.get_engine().pool.size()
+        # Never more threads than pooled connections, so no thread waits for a connection
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="database")
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking function on the database thread pool.
+
+        Also used for work that belongs to a query, like converting its rows to
+        response models, so that work does not run on the event loop either.
+
+        Args:
+            func: Function to run
+            *args: Positional arguments of func
+            **kwargs: Keyword arguments of func
+
+        Returns:
+            Return value of func
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def get_database_stats(self) -> Dict[str, Any]:
+        """Run DatabaseManager.get_database_stats on the database thread pool."""
+        return await self.run(self.db_manager.get_database_stats)
+
+    async def get_catalog_version(self) -> CatalogVersion:
+        """Run DatabaseManager.get_catalog_version on the database thread pool."""
+        return await self.run(self.db_manager.get_catalog_version)
+
+    async def get_all_rosbags(self) -> List[Dict[str, Any]]:
+        """Run DatabaseManager.get_all_rosbags on the database thread pool."""
+        return await self.run(self.db_manager.get_all_rosbags)
+
+    async def search_rosbags(self, search: str) -> List[Dict[str, Any]]:
+        """Run DatabaseManager.search_rosbags on the database thread pool."""
+        return await self.run(self.db_manager.search_rosbags, search)
+
+    async def list_rosbags(self, **kwargs: Any) -> RosbagPage:
+        """Run DatabaseManager.list_rosbags on the database thread pool, same arguments."""
+        return await self.run(self.db_manager.list_rosbags, **kwargs)
+
+    async def get_rosbags_by_map_category(self, category: str) -> List[Dict[str, Any]]:
+        """Run DatabaseManager.get_rosbags_by_map_category on the database thread pool."""
+        return await self.run(self.db_manager.get_rosbags_by_map_category, category)
+
+    async def get_rosbag_by_path(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Run DatabaseManager.get_rosbag_by_path on the database thread pool."""
+        return await self.run(self.db_manager.get_rosbag_by_path, file_path)
+
+    async def get_rosbag_topics(self, rosbag_id: int) -> List[Dict[str, Any]]:
+        """Run DatabaseManager.get_rosbag_topics on the database thread pool."""
+        return await self.run(self.db_manager.get_rosbag_topics, rosbag_id)
+
+    def close_db(self) -> None:
+        """
+        Wait for running operations, then close the thread pool and connection pool.
+        """
+        self.executor.shutdown(wait=True)
+        self.db_manager.close_db()
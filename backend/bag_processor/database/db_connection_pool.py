@@ -1,11 +1,62 @@
+import os
 from contextlib import contextmanager
-from typing import Generator
+from typing import Any, Generator, List, NamedTuple, Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.pool import QueuePool
 
 
+class SQLiteProfile(NamedTuple):
+    """
+    PRAGMA settings applied to every pooled SQLite connection.
+
+    The defaults let API readers keep reading while an ingest writes: in WAL mode
+    readers see the last committed snapshot instead of waiting for the writer,
+    and synchronous=NORMAL only syncs on checkpoints, which is still safe against
+    corruption in WAL mode (a power loss can drop the last commits).
+    """
+
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    # Bytes of the database file read through a memory map, 0 disables it
+    mmap_size: int = 256 * 1024 * 1024
+    # Negative values are KiB, so 64 MiB of page cache per connection
+    cache_size: int = -64 * 1024
+    temp_store: str = "MEMORY"
+    # Milliseconds a connection waits for a lock before failing with "database is locked"
+    busy_timeout: int = 5000
+
+    def pragmas(self) -> List[str]:
+        """
+        Get the PRAGMA statements of the profile.
+
+        Returns:
+            List of PRAGMA statements
+        """
+        return [f"PRAGMA {name} = {value}" for name, value in self._asdict().items()]
+
+    @classmethod
+    def from_env(cls) -> "SQLiteProfile":
+        """
+        Create a profile from the defaults, overridden by SQLITE_<FIELD> environment variables.
+
+        For example SQLITE_JOURNAL_MODE=DELETE or SQLITE_MMAP_SIZE=0.
+
+        Returns:
+            SQLiteProfile
+        """
+        overrides = {}
+        for name, default in cls._field_defaults.items():
+            value = os.getenv(f"SQLITE_{name.upper()}")
+            if value is not None:
+                overrides[name] = type(default)(value)
+        return cls(**overrides)
+
+
+DEFAULT_SQLITE_PROFILE = SQLiteProfile()
+
+
 class DBConnectionPool:
     """Manages SQLAlchemy connection pool for database operations."""
 
@@ -16,6 +67,7 @@ class DBConnectionPool:
         max_overflow: int = 10,
         pool_timeout: int = 30,
         pool_recycle: int = 3600,
+        sqlite_profile: Optional[SQLiteProfile] = DEFAULT_SQLITE_PROFILE,
     ):
         """
         Initialize connection pool for database.
@@ -26,6 +78,8 @@ class DBConnectionPool:
             max_overflow: Maximum number of connections to create beyond pool_size
             pool_timeout: Seconds to wait for a connection from the pool
             pool_recycle: Seconds after which a connection is recycled
+            sqlite_profile: PRAGMA settings for SQLite connections, None keeps the
+                SQLite defaults
         """
         connect_args = {}
         if db_url.startswith("sqlite"):
@@ -42,6 +96,25 @@ class DBConnectionPool:
             pool_recycle=pool_recycle,
         )
 
+        self.sqlite_profile = sqlite_profile
+        if db_url.startswith("sqlite") and sqlite_profile is not None:
+            event.listen(self.engine, "connect", self._apply_sqlite_profile)
+
+    def _apply_sqlite_profile(self, dbapi_connection: Any, connection_record: Any) -> None:
+        """
+        Apply the SQLite profile to a new DB-API connection, registered as connect event.
+
+        Args:
+            dbapi_connection: sqlite3 connection
+            connection_record: Pool record of the connection
+        """
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in self.sqlite_profile.pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
     @contextmanager
     def get_connection(self) -> Generator[Connection, None, None]:
         """
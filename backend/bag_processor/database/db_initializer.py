@@ -35,15 +35,17 @@ class DBInitializer:
         This method should be called to create the necessary tables and indexes.
         """
         if self.db_exists():
-            print(f"Database already exists at {self.db_path}. Initialization skipped.")
-            return
-
-        db_dir = os.path.dirname(self.db_path)
-        if not os.path.exists(db_dir):
-            os.makedirs(db_dir)
-            print(f"Created directory for database: {db_dir}")
+            # Existing databases still get tables added by newer versions
+            print(f"Database already exists at {self.db_path}. Checking schema.")
+        else:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir)
+                print(f"Created directory for database: {db_dir}")
 
         engine = create_engine(f"sqlite:///{self.db_path}")
         with engine.connect() as connection:
             DatabaseSchema.initialize_database(connection)
+            connection.commit()
             print("Database schema initialized successfully")
+        engine.dispose()
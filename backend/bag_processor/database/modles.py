@@ -26,6 +26,7 @@ class RosbagMetadata:
         topic_count: int,
         topics_json: str,
         metadata_json: str,
+        files_json: str = "[]",
         **additional_fields: Any,
     ):
         """
@@ -42,6 +43,7 @@ class RosbagMetadata:
             topic_count: Number of topics
             topics_json: JSON array of topic names
             metadata_json: Additional metadata in JSON format
+            files_json: JSON array with path, time bounds and message count of each storage file
             additional_fields: Any additional metadata fields discovered in the bag
         """
         self.file_path = file_path
@@ -56,6 +58,7 @@ class RosbagMetadata:
         self.topic_count = topic_count
         self.topics_json = topics_json
         self.metadata_json = metadata_json
+        self.files_json = files_json
 
         # Add any additional fields
         for key, value in additional_fields.items():
@@ -71,6 +74,11 @@ class RosbagMetadata:
         """Get the additional metadata as a dictionary."""
         return json.loads(self.metadata_json)
 
+    @property
+    def files(self) -> List[Dict[str, Any]]:
+        """Get the storage files of the bag from the JSON string."""
+        return json.loads(self.files_json)
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert the object to a dictionary for database insertion."""
         result = {
@@ -86,6 +94,7 @@ class RosbagMetadata:
             "topic_count": self.topic_count,
             "topics_json": self.topics_json,
             "metadata_json": self.metadata_json,
+            "files_json": self.files_json,
         }
 
         # Add any additional attributes
@@ -93,7 +102,7 @@ class RosbagMetadata:
             if (
                 not attr.startswith("_")
                 and attr not in result
-                and attr not in ["topics", "metadata", "to_dict"]
+                and attr not in ["topics", "metadata", "files", "to_dict"]
             ):
                 result[attr] = getattr(self, attr)
 
@@ -6,13 +6,54 @@ including connecting, inserting, updating, and querying data.
 """
 
 import json
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
+from sqlalchemy.engine import Connection
 from sqlalchemy.sql import text
+from sqlalchemy.sql.elements import TextClause
 
 from .db_connection_pool import DBConnectionPool
 from .modles import RosbagMetadata
+from .pagination import (
+    RosbagPage,
+    decode_cursor,
+    encode_cursor,
+    filter_clauses,
+    keyset_segments,
+    parse_sort,
+)
 from .schema import DatabaseSchema
+from .search import to_fts5_query
+
+# Large JSON columns left out of list_rosbags unless requested
+LIST_EXCLUDED_COLUMNS = ("topics_json", "metadata_json", "files_json")
+
+
+class UpsertCounts(NamedTuple):
+    """Outcome of writing ROS bag metadata rows."""
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.unchanged
+
+
+class CatalogVersion(NamedTuple):
+    """Version of the catalog, changes with every write to rosbags or its columns."""
+
+    epoch: str
+    generation: int
+    schema_version: int
+    modified_at: float
+
+    @property
+    def etag(self) -> str:
+        # Weak, the same catalog may be sent in different content encodings
+        return f'W/"{self.epoch}-{self.generation}-{self.schema_version}"'
 
 
 class DatabaseManager:
@@ -26,6 +67,8 @@ class DatabaseManager:
             db_path: Path to the SQLite database file
         """
         self.conn_pool = db_conn_pool
+        # (PRAGMA schema_version, rosbags columns), see _get_columns
+        self._column_cache: Optional[Tuple[int, List[str]]] = None
 
     def close_db(self) -> None:
         """
@@ -47,60 +90,416 @@ class DatabaseManager:
             True if a new column was added, False otherwise
         """
         with self.conn_pool.get_connection() as conn:
+            if column_name in self._get_columns(conn):
+                return False
+
             result = DatabaseSchema.add_column_if_not_exists(conn, column_name, data_type)
             if result:
                 conn.commit()
+                self._column_cache = None
                 print(f"Added new column: {column_name} ({data_type})")
             return result
 
-    def insert_rosbag_metadata(self, metadata: RosbagMetadata) -> None:
+    def _get_columns(self, conn: Connection) -> List[str]:
+        """
+        Get the columns of the rosbags table from the in-process column cache.
+
+        SQLite increments PRAGMA schema_version on every schema change, including
+        ALTER TABLE from other connections and processes, so the cache is checked
+        with that single PRAGMA and the table is only inspected after a change.
+
+        Args:
+            conn: SQLAlchemy connection
+
+        Returns:
+            List of column names
+        """
+        schema_version = DatabaseSchema.get_schema_version(conn)
+        cache = self._column_cache
+        if cache is None or cache[0] != schema_version:
+            cache = (schema_version, DatabaseSchema.get_existing_columns(conn))
+            self._column_cache = cache
+        return cache[1]
+
+    def insert_rosbag_metadata(self, metadata: RosbagMetadata) -> UpsertCounts:
         """
         Insert or update ROS bag metadata in the database.
 
         Args:
             metadata: RosbagMetadata object containing the data to insert
+
+        Returns:
+            UpsertCounts with a single inserted, updated or unchanged row
+        """
+        metadata_dict = self._prepare_metadata_rows([metadata])[0]
+
+        with self.conn_pool.get_connection() as conn:
+            counts = self._upsert_rows(conn, [metadata_dict])
+            conn.commit()
+
+        if counts.inserted:
+            print(f"Added bag file to database: {metadata_dict['file_path']}")
+        elif counts.updated:
+            print(f"Updated bag file in database: {metadata_dict['file_path']}")
+        else:
+            print(f"Bag file unchanged in database: {metadata_dict['file_path']}")
+        return counts
+
+    def insert_many(
+        self, metadata_iter: Iterable[RosbagMetadata], batch_size: int = 100
+    ) -> UpsertCounts:
         """
-        metadata_dict = metadata.to_dict()
+        Insert or update ROS bag metadata from an iterable, committing once per batch.
 
-        # Check for additional metadata fields that might need new columns
-        additional_metadata = json.loads(metadata_dict.get("metadata_json", "{}"))
-        for key, value in additional_metadata.items():
-            data_type = DatabaseSchema.determine_sqlite_type(value)
-            self.add_column_if_not_exists(key, data_type)
-            metadata_dict[key] = value
+        The iterable is consumed lazily, so it can be a generator that is still
+        scanning: at most one batch is held in memory and each committed batch is
+        visible to readers right away. Bags that are already in the database are
+        updated in place, rows whose values did not change are not written.
+
+        Args:
+            metadata_iter: Iterable of RosbagMetadata objects
+            batch_size: Number of rows per transaction
+
+        Returns:
+            UpsertCounts of inserted, updated and unchanged rows
+        """
+        inserted = updated = unchanged = 0
+        insert_time = 0.0
+        batch: List[RosbagMetadata] = []
+        for metadata in metadata_iter:
+            batch.append(metadata)
+            if len(batch) >= batch_size:
+                start = time.perf_counter()
+                counts = self._insert_batch(batch)
+                insert_time += time.perf_counter() - start
+                inserted += counts.inserted
+                updated += counts.updated
+                unchanged += counts.unchanged
+                batch = []
+        if batch:
+            start = time.perf_counter()
+            counts = self._insert_batch(batch)
+            insert_time += time.perf_counter() - start
+            inserted += counts.inserted
+            updated += counts.updated
+            unchanged += counts.unchanged
+
+        counts = UpsertCounts(inserted, updated, unchanged)
+        if inserted or updated:
+            # The planner chooses between the rosbags indexes based on these statistics
+            start = time.perf_counter()
+            self.analyze()
+            insert_time += time.perf_counter() - start
+
+        # Only the database time counts, the iterator may still be parsing bags
+        if counts.total:
+            print(
+                f"Wrote {counts.total} bag files in {insert_time:.2f}s "
+                f"({counts.total / max(insert_time, 1e-9):.0f} rows/s): {inserted} inserted, "
+                f"{updated} updated, {unchanged} unchanged"
+            )
+        return counts
+
+    def analyze(self) -> None:
+        """
+        Update the query planner statistics of the database.
+
+        analysis_limit makes ANALYZE sample each index instead of reading it whole,
+        so this stays fast on large catalogs.
+        """
+        with self.conn_pool.get_connection() as conn:
+            conn.execute(text("PRAGMA analysis_limit = 1000"))
+            conn.execute(text("ANALYZE"))
+            conn.commit()
+
+    def _insert_batch(self, batch: List[RosbagMetadata]) -> UpsertCounts:
+        """
+        Insert or update a batch of ROS bag metadata in a single transaction.
+
+        Args:
+            batch: RosbagMetadata objects to insert
+
+        Returns:
+            UpsertCounts of the batch
+        """
+        # New columns are added before the insert transaction starts, otherwise the
+        # ALTER TABLE on another pooled connection would wait for its write lock
+        rows = self._prepare_metadata_rows(batch)
 
         with self.conn_pool.get_connection() as conn:
-            # Build the INSERT statement dynamically based on available columns
-            columns = DatabaseSchema.get_existing_columns(conn)
-            valid_columns = [
-                col for col in columns if col in metadata_dict or col == "id" or col == "created_at"
+            counts = self._upsert_rows(conn, rows)
+            conn.commit()
+
+        print(f"Committed batch of {len(rows)} bag files to database")
+        return counts
+
+    def _prepare_metadata_rows(self, batch: List[RosbagMetadata]) -> List[Dict[str, Any]]:
+        """
+        Build the rows for a batch of ROS bags and add columns for new metadata fields.
+
+        The table columns come from the column cache, so a batch without new
+        metadata fields runs no schema introspection.
+
+        Args:
+            batch: RosbagMetadata objects to insert
+
+        Returns:
+            List of dictionaries mapping column names to values
+        """
+        rows = []
+        column_types: Dict[str, str] = {}
+        for metadata in batch:
+            metadata_dict = metadata.to_dict()
+            additional_metadata = json.loads(metadata_dict.get("metadata_json", "{}"))
+            for key, value in additional_metadata.items():
+                if DatabaseSchema.is_topic_count_column(key):
+                    # Topic counts are stored in rosbag_topics, not as columns
+                    continue
+                column_types.setdefault(key, DatabaseSchema.determine_sqlite_type(value))
+                metadata_dict[key] = value
+            rows.append(metadata_dict)
+
+        with self.conn_pool.get_connection() as conn:
+            existing_columns = set(self._get_columns(conn))
+            new_columns = [
+                (column, data_type)
+                for column, data_type in column_types.items()
+                if column not in existing_columns
             ]
+            for column, data_type in new_columns:
+                conn.execute(text(f"ALTER TABLE rosbags ADD COLUMN {column} {data_type}"))
+                print(f"Added new column: {column} ({data_type})")
+            if new_columns:
+                conn.commit()
+                self._column_cache = None
+
+        return rows
+
+    def _upsert_rows(self, conn: Connection, rows: List[Dict[str, Any]]) -> UpsertCounts:
+        """
+        Insert or update prepared rows and their topics without committing.
+
+        Args:
+            conn: SQLAlchemy connection
+            rows: Rows built by _prepare_metadata_rows
 
-            column_names = ", ".join(
-                [col for col in valid_columns if col != "id" and col != "created_at"]
+        Returns:
+            UpsertCounts of the rows
+        """
+        existing = self._get_existing_topics_json(conn, [row["file_path"] for row in rows])
+        columns = self._get_columns(conn)
+
+        # Bags with the same metadata fields share a column set, each group is one executemany
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for metadata_dict in rows:
+            column_list = self._insert_columns(columns, metadata_dict)
+            groups.setdefault(tuple(column_list), []).append(
+                {col: metadata_dict.get(col) for col in column_list}
             )
-            placeholders = ", ".join(["?"] * (len(valid_columns) - 2))  # Exclude id and created_at
 
-            params = {}
-            column_list = []
+        # Inserted rows and updated rows with changed values count as one change each
+        changed = 0
+        for column_list, params in groups.items():
+            result = conn.execute(self._upsert_statement(list(column_list)), params)
+            changed += result.rowcount
+
+        # Topic rows are only rewritten for new bags and bags whose topics changed
+        inserted = len({row["file_path"] for row in rows} - existing.keys())
+        topic_rows = [
+            row
+            for row in rows
+            if row["file_path"] not in existing
+            or existing[row["file_path"]][1] != row.get("topics_json")
+        ]
+        self._delete_topic_rows(
+            conn,
+            [existing[row["file_path"]][0] for row in topic_rows if row["file_path"] in existing],
+        )
+        self._insert_topic_rows(conn, topic_rows)
+
+        return UpsertCounts(inserted, changed - inserted, len(rows) - changed)
+
+    def _insert_topic_rows(self, conn: Connection, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert the rosbag_topics rows of already inserted bags without committing.
 
-            for col in valid_columns:
-                if col != "id" and col != "created_at":
-                    column_list.append(col)
-                    params[col] = metadata_dict.get(col)
+        Args:
+            conn: SQLAlchemy connection
+            rows: Rows built by _prepare_metadata_rows
+        """
+        rosbag_ids = self._get_rosbag_ids(conn, [row["file_path"] for row in rows])
+        params = [
+            (rosbag_ids[metadata_dict["file_path"]], topic["name"])
+            + tuple(topic.get(col) for col in DatabaseSchema.TOPIC_COLUMNS[1:])
+            for metadata_dict in rows
+            for topic in json.loads(metadata_dict.get("topics_json") or "[]")
+        ]
+        if not params:
+            return
+
+        # Hundreds of rows per bag: plain DB-API executemany with positional
+        # parameters skips SQLAlchemy's per-row parameter processing
+        column_names = ", ".join(["rosbag_id"] + DatabaseSchema.TOPIC_COLUMNS)
+        placeholders = ", ".join("?" * (len(DatabaseSchema.TOPIC_COLUMNS) + 1))
+        conn.exec_driver_sql(
+            f"INSERT OR REPLACE INTO rosbag_topics ({column_names}) VALUES ({placeholders})",
+            params,
+        )
+
+    @staticmethod
+    def _get_rosbag_ids(conn: Connection, file_paths: List[str]) -> Dict[str, int]:
+        """
+        Look up the IDs of rosbags by file path.
 
-            placeholders = ", ".join([f":{col}" for col in column_list])
+        Args:
+            conn: SQLAlchemy connection
+            file_paths: File paths of the rosbags
 
-            sql = text(
-                f"""
-            INSERT INTO rosbags ({column_names})
-            VALUES ({placeholders})
-            """
+        Returns:
+            Dictionary mapping file paths to rosbag IDs
+        """
+        rosbag_ids = {}
+        # Stay below SQLite's limit of bound parameters per statement
+        for start in range(0, len(file_paths), 500):
+            chunk = file_paths[start : start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            res = conn.exec_driver_sql(
+                f"SELECT file_path, id FROM rosbags WHERE file_path IN ({placeholders})",
+                tuple(chunk),
             )
+            rosbag_ids.update(res.fetchall())
+        return rosbag_ids
 
-            conn.execute(sql, params)
-            conn.commit()
-            print(f"Added/updated bag file in database: {metadata_dict['file_path']}")
+    @staticmethod
+    def _get_existing_topics_json(
+        conn: Connection, file_paths: List[str]
+    ) -> Dict[str, Tuple[int, Optional[str]]]:
+        """
+        Look up the IDs and topics_json of rosbags that are already in the database.
+
+        Args:
+            conn: SQLAlchemy connection
+            file_paths: File paths of the rosbags
+
+        Returns:
+            Dictionary mapping file paths to (rosbag ID, topics_json) tuples
+        """
+        existing = {}
+        # Stay below SQLite's limit of bound parameters per statement
+        for start in range(0, len(file_paths), 500):
+            chunk = file_paths[start : start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            res = conn.exec_driver_sql(
+                "SELECT file_path, id, topics_json FROM rosbags "
+                f"WHERE file_path IN ({placeholders})",
+                tuple(chunk),
+            )
+            for file_path, rosbag_id, topics_json in res:
+                existing[file_path] = (rosbag_id, topics_json)
+        return existing
+
+    @staticmethod
+    def _delete_topic_rows(conn: Connection, rosbag_ids: List[int]) -> None:
+        """
+        Delete the rosbag_topics rows of rosbags without committing.
+
+        Args:
+            conn: SQLAlchemy connection
+            rosbag_ids: IDs of the rosbags
+        """
+        for start in range(0, len(rosbag_ids), 500):
+            chunk = rosbag_ids[start : start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            conn.exec_driver_sql(
+                f"DELETE FROM rosbag_topics WHERE rosbag_id IN ({placeholders})", tuple(chunk)
+            )
+
+    def _attach_topic_counts(self, conn: Connection, rows: List[Dict[str, Any]]) -> None:
+        """
+        Add a topic_counts dictionary from rosbag_topics to each rosbag row.
+
+        Args:
+            conn: SQLAlchemy connection
+            rows: Rosbag rows, changed in place
+        """
+        topic_counts: Dict[int, Dict[str, int]] = {row["id"]: {} for row in rows}
+        ids = list(topic_counts)
+        # Stay below SQLite's limit of bound parameters per statement
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            placeholders = ", ".join(f":id_{index}" for index in range(len(chunk)))
+            res = conn.execute(
+                text(
+                    "SELECT rosbag_id, topic, message_count FROM rosbag_topics "
+                    f"WHERE rosbag_id IN ({placeholders})"
+                ),
+                {f"id_{index}": rosbag_id for index, rosbag_id in enumerate(chunk)},
+            )
+            for rosbag_id, topic, message_count in res:
+                topic_counts[rosbag_id][topic] = message_count
+
+        for row in rows:
+            row["topic_counts"] = topic_counts[row["id"]]
+
+    def get_rosbag_topics(self, rosbag_id: int) -> List[Dict[str, Any]]:
+        """
+        Get the topics of a rosbag.
+
+        Args:
+            rosbag_id: ID of the rosbag
+
+        Returns:
+            List of dictionaries containing rosbag_topics rows, ordered by topic name
+        """
+        with self.conn_pool.get_connection() as conn:
+            res = conn.execute(
+                text("SELECT * FROM rosbag_topics WHERE rosbag_id = :rosbag_id ORDER BY topic"),
+                {"rosbag_id": rosbag_id},
+            )
+            return [dict(row._mapping) for row in res]
+
+    @staticmethod
+    def _insert_columns(columns: List[str], metadata_dict: Dict[str, Any]) -> List[str]:
+        """
+        Get the columns of a row that are written on insert.
+
+        Args:
+            columns: Existing columns of the rosbags table
+            metadata_dict: Row built by _prepare_metadata_rows
+
+        Returns:
+            Column names in table order
+        """
+        return [
+            col for col in columns if col in metadata_dict and col != "id" and col != "created_at"
+        ]
+
+    @staticmethod
+    def _upsert_statement(column_list: List[str]) -> TextClause:
+        """
+        Build the INSERT ... ON CONFLICT(file_path) DO UPDATE statement for a column set.
+
+        The update only runs when at least one value differs from the stored row,
+        so re-ingesting an unchanged bag writes nothing and does not count as a change.
+
+        Args:
+            column_list: Columns to insert
+
+        Returns:
+            SQLAlchemy text statement with one named parameter per column
+        """
+        column_names = ", ".join(column_list)
+        placeholders = ", ".join([f":{col}" for col in column_list])
+        update_columns = [col for col in column_list if col != "file_path"]
+        assignments = ", ".join(f"{col} = excluded.{col}" for col in update_columns)
+        changed = " OR ".join(f"rosbags.{col} IS NOT excluded.{col}" for col in update_columns)
+
+        return text(f"""
+        INSERT INTO rosbags ({column_names})
+        VALUES ({placeholders})
+        ON CONFLICT(file_path) DO UPDATE SET {assignments}
+        WHERE {changed}
+        """)
 
     def get_rosbag_by_path(self, file_path: str) -> Optional[Dict[str, Any]]:
         """
@@ -118,7 +517,9 @@ class DatabaseManager:
             )
             row = res.fetchone()
             if row:
-                return dict(row._mapping)
+                rosbag = dict(row._mapping)
+                self._attach_topic_counts(conn, [rosbag])
+                return rosbag
             return None
 
     def get_all_rosbags(self) -> List[Dict[str, Any]]:
@@ -130,8 +531,155 @@ class DatabaseManager:
         """
         with self.conn_pool.get_connection() as conn:
             res = conn.execute(text("SELECT * FROM rosbags"))
-            rows = res.fetchall()
-            return [dict(row._mapping) for row in rows]
+            rows = [dict(row._mapping) for row in res.fetchall()]
+            self._attach_topic_counts(conn, rows)
+            return rows
+
+    def search_rosbags(self, search: str) -> List[Dict[str, Any]]:
+        """
+        Get the rosbag entries matching a full-text search.
+
+        File paths, file names, map categories, start times and topic names are
+        searched, see to_fts5_query for the search syntax.
+
+        Args:
+            search: Search text, e.g. "trackdrive 2024-07*" or "/rslidar*"
+
+        Returns:
+            List of dictionaries containing rosbag data, best matches first
+        """
+        query = to_fts5_query(search)
+        if query is None:
+            return self.get_all_rosbags()
+
+        with self.conn_pool.get_connection() as conn:
+            res = conn.execute(
+                text(
+                    "SELECT rosbags.* FROM rosbags_fts "
+                    "JOIN rosbags ON rosbags.id = rosbags_fts.rowid "
+                    "WHERE rosbags_fts MATCH :query ORDER BY rosbags_fts.rank"
+                ),
+                {"query": query},
+            )
+            rows = [dict(row._mapping) for row in res.fetchall()]
+            self._attach_topic_counts(conn, rows)
+            return rows
+
+    def list_rosbags(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: str = "id",
+        after_cursor: Optional[str] = None,
+        limit: int = 50,
+        columns: Optional[List[str]] = None,
+    ) -> RosbagPage:
+        """
+        Get a page of rosbag entries with keyset pagination.
+
+        The page continues after the (sort key, id) encoded in after_cursor, so
+        reading page N costs the same as reading the first page.
+
+        Args:
+            filters: Dictionary of filters, see pagination.FILTER_CLAUSES
+            sort: Sort column from pagination.SORT_COLUMNS, prefixed with "-" for
+                descending order
+            after_cursor: next_cursor of the previous page, None for the first page
+            limit: Maximum number of rows of the page
+            columns: rosbags columns to return, plus "topic_counts" for the topic
+                message counts. id and the sort column are always included. Defaults
+                to all columns except the large JSON columns.
+
+        Returns:
+            RosbagPage with the rows and the cursor of the next page
+
+        Raises:
+            ValueError: For unknown sort keys, filters or columns, a limit below 1
+                or a cursor of another sort key
+        """
+        sort_column, descending = parse_sort(sort)
+        if limit < 1:
+            raise ValueError(f"limit must be positive: {limit}")
+        cursor = decode_cursor(after_cursor, sort) if after_cursor else None
+        where, params = filter_clauses(filters)
+
+        with self.conn_pool.get_connection() as conn:
+            table_columns = self._get_columns(conn)
+            if columns is None:
+                columns = [col for col in table_columns if col not in LIST_EXCLUDED_COLUMNS]
+            unknown = [col for col in columns if col not in table_columns and col != "topic_counts"]
+            if unknown:
+                raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+            select = ["id", sort_column] + [
+                col for col in columns if col in table_columns and col not in ("id", sort_column)
+            ]
+
+            # One more row than requested tells whether there is a next page
+            rows: List[Dict[str, Any]] = []
+            for segment in keyset_segments(sort_column, descending, cursor):
+                res = conn.execute(
+                    text(
+                        f"SELECT {', '.join(select)} FROM rosbags "
+                        f"WHERE {' AND '.join(where + [segment.where])} "
+                        f"ORDER BY {segment.order_by} LIMIT :limit"
+                    ),
+                    {**params, **segment.params, "limit": limit + 1 - len(rows)},
+                )
+                rows.extend(dict(row._mapping) for row in res)
+                if len(rows) > limit:
+                    break
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(sort, rows[-1][sort_column], rows[-1]["id"])
+            if "topic_counts" in columns:
+                self._attach_topic_counts(conn, rows)
+            return RosbagPage(rows, next_cursor)
+
+    def get_list_columns(self) -> List[str]:
+        """
+        Get the columns list_rosbags returns by default.
+
+        Returns:
+            rosbags columns without the large JSON columns
+        """
+        with self.conn_pool.get_connection() as conn:
+            return [col for col in self._get_columns(conn) if col not in LIST_EXCLUDED_COLUMNS]
+
+    def count_rosbags(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Count the rosbag entries matching list_rosbags filters.
+
+        Without filters, or filtered by map category only, the count comes from
+        catalog_stats instead of counting rows.
+
+        Args:
+            filters: Dictionary of filters, see pagination.FILTER_CLAUSES
+
+        Returns:
+            Number of matching rosbags
+
+        Raises:
+            ValueError: For unknown filters
+        """
+        where, params = filter_clauses(filters)
+
+        with self.conn_pool.get_connection() as conn:
+            if not where:
+                res = conn.execute(text("SELECT COALESCE(SUM(rosbag_count), 0) FROM catalog_stats"))
+            elif list(params) == ["map_category"]:
+                res = conn.execute(
+                    text(
+                        "SELECT COALESCE(SUM(rosbag_count), 0) FROM catalog_stats "
+                        "WHERE map_category = :map_category"
+                    ),
+                    params,
+                )
+            else:
+                res = conn.execute(
+                    text(f"SELECT COUNT(*) FROM rosbags WHERE {' AND '.join(where)}"), params
+                )
+            return res.scalar()
 
     def get_rosbags_by_map_category(self, category: str) -> List[Dict[str, Any]]:
         """
@@ -147,8 +695,43 @@ class DatabaseManager:
             res = conn.execute(
                 text("SELECT * FROM rosbags WHERE map_category = :category"), {"category": category}
             )
-            rows = res.fetchall()
-            return [dict(row._mapping) for row in rows]
+            rows = [dict(row._mapping) for row in res.fetchall()]
+            self._attach_topic_counts(conn, rows)
+            return rows
+
+    def get_bag_fingerprints(self) -> Dict[str, str]:
+        """
+        Get the fingerprints of all ingested bag folders.
+
+        Returns:
+            Dictionary mapping bag folder paths to fingerprints
+        """
+        with self.conn_pool.get_connection() as conn:
+            res = conn.execute(text("SELECT folder_path, fingerprint FROM bag_fingerprints"))
+            return {row.folder_path: row.fingerprint for row in res}
+
+    def save_bag_fingerprints(self, fingerprints: Dict[str, str]) -> None:
+        """
+        Store the fingerprints of ingested bag folders.
+
+        Args:
+            fingerprints: Dictionary mapping bag folder paths to fingerprints
+        """
+        if not fingerprints:
+            return
+
+        with self.conn_pool.get_connection() as conn:
+            conn.execute(
+                text(
+                    "INSERT OR REPLACE INTO bag_fingerprints (folder_path, fingerprint) "
+                    "VALUES (:folder_path, :fingerprint)"
+                ),
+                [
+                    {"folder_path": folder_path, "fingerprint": fingerprint}
+                    for folder_path, fingerprint in fingerprints.items()
+                ],
+            )
+            conn.commit()
 
     # def delete_rosbag(self, file_path: str) -> bool:
     #     """
@@ -165,31 +748,55 @@ class DatabaseManager:
     #     self.conn.commit()
     #     return deleted
 
-    def get_database_stats(self) -> Dict[str, Any]:
-        """Print statistics about the database."""
+    def get_catalog_version(self) -> CatalogVersion:
+        """
+        Read the version of the catalog from the trigger-maintained catalog_generation row.
 
-        try:
-            with self.conn_pool.get_connection() as conn:
-                result = conn.execute(text("SELECT COUNT(*) FROM rosbags"))
-                rosbag_count = result.scalar()
+        The row is read on every call. The database files do not tell reliably
+        whether a commit happened: after a WAL reset, a commit within the same
+        timestamp tick can leave inode, mtime and size unchanged.
 
-                result = conn.execute(
-                    text("SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='rosbags'")
+        Returns:
+            CatalogVersion of the catalog_generation row
+        """
+        with self.conn_pool.get_connection() as conn:
+            row = conn.execute(
+                text(
+                    "SELECT epoch, generation, "
+                    "(SELECT schema_version FROM pragma_schema_version) AS schema_version, "
+                    "modified_at FROM catalog_generation WHERE id = 1"
                 )
-                total_columns = result.scalar()
+            ).one()
+        return CatalogVersion(*row)
 
-                # TODO: return category counts like:
-                # skidpad: 5
-                # acceleration: 3
+    def get_database_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics about the catalog from the trigger-maintained catalog_stats table.
 
-                # result = conn.execute(
-                #     "SELECT map_category, COUNT(*) FROM rosbags GROUP BY map_category"
-                # )
-                # category_counts = result.fetchall()
+        Returns:
+            Dictionary with the rosbag count, number of rosbags columns, total size and
+            duration, and the same values per map category. Bags without a map category
+            are listed with map_category None.
+        """
+
+        try:
+            with self.conn_pool.get_connection() as conn:
+                res = conn.execute(
+                    text(
+                        "SELECT map_category, rosbag_count, total_size_mb, total_duration "
+                        "FROM catalog_stats ORDER BY map_category"
+                    )
+                )
+                categories = [
+                    {**row._mapping, "map_category": row.map_category or None} for row in res
+                ]
 
                 return {
-                    "rosbag_count": rosbag_count,
-                    "total_columns": total_columns,
+                    "rosbag_count": sum(c["rosbag_count"] for c in categories),
+                    "total_columns": len(self._get_columns(conn)),
+                    "total_size_mb": sum(c["total_size_mb"] for c in categories),
+                    "total_duration": sum(c["total_duration"] for c in categories),
+                    "categories": categories,
                 }
         except Exception as e:
             print(f"Error occurred while getting database stats: {e}")
@@ -0,0 +1,198 @@
+"""
+Keyset pagination for the Cockpit application.
+
+Pages of rosbags are ordered by (sort key, id) and a page continues after the
+(sort key, id) of the previous page's last row, so every page is an index range
+scan no matter how deep into the catalog it is. The position is passed around
+as an opaque cursor string.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .search import to_fts5_query
+
+# Sort keys of list_rosbags. id is the rowid and file_path has the index of its UNIQUE
+# constraint, each other key has a single-column index in DatabaseSchema.ROSBAGS_INDEXES,
+# which gives the (key, id) order of the pages without a sort.
+SORT_COLUMNS = ("id", "file_path", "map_category", "start_time", "duration", "size_mb")
+NOT_NULL_SORT_COLUMNS = ("id", "file_path")
+
+# Filters of list_rosbags and their WHERE clauses, the filter value is bound as :<name>
+FILTER_CLAUSES = {
+    "map_category": "map_category = :map_category",
+    # Start times are stored as YYYY-MM-DD-HH-MM-SS text, so prefixes like a date compare too
+    "start_time_from": "start_time >= :start_time_from",
+    "start_time_before": "start_time < :start_time_before",
+    "min_duration": "duration >= :min_duration",
+    "max_duration": "duration <= :max_duration",
+    "min_size_mb": "size_mb >= :min_size_mb",
+    "max_size_mb": "size_mb <= :max_size_mb",
+    "search": "id IN (SELECT rowid FROM rosbags_fts WHERE rosbags_fts MATCH :search)",
+}
+
+
+class RosbagPage(NamedTuple):
+    """A page of list_rosbags."""
+
+    rows: List[Dict[str, Any]]
+    # Cursor of the next page, None on the last page
+    next_cursor: Optional[str]
+
+
+class KeysetSegment(NamedTuple):
+    """One ORDER BY range of a page query, see keyset_segments."""
+
+    where: str
+    order_by: str
+    params: Dict[str, Any]
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """
+    Parse a sort key like "start_time" or "-start_time" (descending).
+
+    Args:
+        sort: Sort key
+
+    Returns:
+        Tuple of the sort column and whether the order is descending
+
+    Raises:
+        ValueError: If the column is not one of SORT_COLUMNS
+    """
+    descending = sort.startswith("-")
+    column = sort[1:] if descending else sort
+    if column not in SORT_COLUMNS:
+        raise ValueError(f"Unsupported sort key: {sort}")
+    return column, descending
+
+
+def encode_cursor(sort: str, value: Any, rosbag_id: int) -> str:
+    """
+    Encode the position after a row as a cursor.
+
+    Args:
+        sort: Sort key of the listing
+        value: Sort column value of the row
+        rosbag_id: ID of the row
+
+    Returns:
+        URL-safe cursor string
+    """
+    data = json.dumps([sort, value, rosbag_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    """
+    Decode a cursor created by encode_cursor.
+
+    Args:
+        cursor: Cursor string
+        sort: Sort key of the listing, must be the one the cursor was created for
+
+    Returns:
+        Tuple of the sort column value and ID of the last row of the previous page
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another sort key
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, rosbag_id = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if cursor_sort != sort or not isinstance(rosbag_id, int):
+        raise ValueError(f"Cursor does not belong to sort key {sort}")
+    return value, rosbag_id
+
+
+def keyset_segments(
+    column: str, descending: bool, cursor: Optional[Tuple[Any, int]]
+) -> List[KeysetSegment]:
+    """
+    Build the ranges a page is read from, in order.
+
+    SQLite sorts NULLs before all values, and a comparison with NULL is never
+    true, so rows without a sort value are a separate range ordered by id: first
+    in ascending order, last in descending order. Within the non-NULL range,
+    "col >= :v AND (col > :v OR id > :id)" is an index range starting at the
+    cursor row; the OR only skips rows with the same sort value.
+
+    Args:
+        column: Sort column
+        descending: Whether the order is descending
+        cursor: (sort value, id) of the previous page's last row, None for the first page
+
+    Returns:
+        List of KeysetSegment, read until the page is full
+    """
+    op, direction = ("<", "DESC") if descending else (">", "ASC")
+    values_order = f"{column} {direction}, id {direction}"
+    nulls_order = f"id {direction}"
+
+    if column in NOT_NULL_SORT_COLUMNS:
+        if cursor is None:
+            return [KeysetSegment("1", values_order, {})]
+        value, rosbag_id = cursor
+        if column == "id":
+            return [KeysetSegment(f"id {op} :cursor_id", values_order, {"cursor_id": rosbag_id})]
+        return [
+            KeysetSegment(
+                f"{column} {op}= :cursor_value AND ({column} {op} :cursor_value "
+                f"OR id {op} :cursor_id)",
+                values_order,
+                {"cursor_value": value, "cursor_id": rosbag_id},
+            )
+        ]
+
+    all_values = KeysetSegment(f"{column} IS NOT NULL", values_order, {})
+    all_nulls = KeysetSegment(f"{column} IS NULL", nulls_order, {})
+    if cursor is None:
+        return [all_values, all_nulls] if descending else [all_nulls, all_values]
+
+    value, rosbag_id = cursor
+    if value is None:
+        nulls_after = KeysetSegment(
+            f"{column} IS NULL AND id {op} :cursor_id", nulls_order, {"cursor_id": rosbag_id}
+        )
+        return [nulls_after] if descending else [nulls_after, all_values]
+
+    values_after = KeysetSegment(
+        f"{column} {op}= :cursor_value AND ({column} {op} :cursor_value OR id {op} :cursor_id)",
+        values_order,
+        {"cursor_value": value, "cursor_id": rosbag_id},
+    )
+    return [values_after, all_nulls] if descending else [values_after]
+
+
+def filter_clauses(filters: Optional[Dict[str, Any]]) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Build the WHERE clauses of list_rosbags filters.
+
+    Args:
+        filters: Dictionary mapping FILTER_CLAUSES keys to values, None values are ignored
+
+    Returns:
+        Tuple of the WHERE clauses and their parameters
+
+    Raises:
+        ValueError: If a filter is not one of FILTER_CLAUSES
+    """
+    clauses = []
+    params = {}
+    for name, value in (filters or {}).items():
+        if name not in FILTER_CLAUSES:
+            raise ValueError(f"Unsupported filter: {name}")
+        if value is None:
+            continue
+        if name == "search":
+            value = to_fts5_query(value)
+            if value is None:
+                continue
+        clauses.append(FILTER_CLAUSES[name])
+        params[name] = value
+    return clauses, params
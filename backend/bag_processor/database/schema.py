@@ -1,40 +1,489 @@
-from typing import Any, List
+import json
+from typing import Any, Dict, List
 
-from sqlalchemy import Column, DateTime, Float, Integer, MetaData, Table, Text, inspect, text
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    Text,
+    UniqueConstraint,
+    inspect,
+    text,
+)
 from sqlalchemy.engine import Connection
 
 
 class DatabaseSchema:
     """Manages the database schema for the Cockpit application."""
 
+    # Columns of rosbag_topics filled from the topics_json entries of a bag
+    TOPIC_COLUMNS = [
+        "topic",
+        "type",
+        "message_count",
+        "frequency",
+        "bytes",
+        "jitter_s",
+        "max_gap_s",
+        "gap_count",
+        "regression_count",
+    ]
+
+    # Current time in unix seconds with milliseconds, for the catalog_generation triggers
+    UNIX_TIME_SQL = "(julianday('now') - 2440587.5) * 86400.0"
+
+    # Secondary indexes of rosbags, created and dropped by ensure_rosbags_indexes. SQLite
+    # appends the rowid (id) to every index, so each one also orders by (columns..., id),
+    # which is the order of the keyset pagination in list_rosbags. The composite indexes
+    # serve filtering by category sorted by start time or duration without a sort. Sorting
+    # by category needs the (map_category, id) order, which only the single-column index has.
+    ROSBAGS_INDEXES = {
+        "ix_rosbags_map_category": ("map_category",),
+        "ix_rosbags_map_category_start_time": ("map_category", "start_time"),
+        "ix_rosbags_map_category_duration": ("map_category", "duration"),
+        "ix_rosbags_start_time": ("start_time",),
+        "ix_rosbags_duration": ("duration",),
+        "ix_rosbags_size_mb": ("size_mb",),
+    }
+
     @staticmethod
     def initialize_database(conn: Connection) -> None:
-        """Initialize the database schema using SQLAlchemy."""
+        """
+        Initialize the database schema using SQLAlchemy.
+
+        Only missing tables are created, so this is safe to run on an existing database.
+        """
+        metadata = MetaData()
+
+        DatabaseSchema._rosbags_table(metadata, "rosbags")
+
+        # One row per topic of a bag, replaces the former topic_<name>_count columns.
+        # SQLite does not enforce the foreign key, see ensure_topic_rows_cleanup.
+        Table(
+            "rosbag_topics",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column(
+                "rosbag_id", Integer, ForeignKey("rosbags.id", ondelete="CASCADE"), nullable=False
+            ),
+            Column("topic", Text, nullable=False),
+            Column("type", Text),
+            Column("message_count", Integer),
+            Column("frequency", Float),
+            Column("bytes", Integer),
+            # Deep scan timing statistics, see bag_manager.topic_timing
+            Column("jitter_s", Float),
+            Column("max_gap_s", Float),
+            Column("gap_count", Integer),
+            Column("regression_count", Integer),
+            # Also serves lookups by rosbag_id, its leading column
+            UniqueConstraint("rosbag_id", "topic", name="uq_rosbag_topics_rosbag_id_topic"),
+            Index("ix_rosbag_topics_topic", "topic"),
+        )
+
+        # Fingerprints of ingested bag folders, used to skip unchanged folders on rescan
+        Table(
+            "bag_fingerprints",
+            metadata,
+            Column("folder_path", Text, primary_key=True),
+            Column("fingerprint", Text, nullable=False),
+        )
+
+        # Aggregates per map category, maintained by triggers on rosbags, see
+        # ensure_catalog_stats. Bags without a map category are counted under ''.
+        Table(
+            "catalog_stats",
+            metadata,
+            Column("map_category", Text, primary_key=True),
+            Column("rosbag_count", Integer, nullable=False, server_default="0"),
+            Column("total_size_mb", Float, nullable=False, server_default="0"),
+            Column("total_duration", Float, nullable=False, server_default="0"),
+        )
+
+        # One row counting the writes to rosbags, see ensure_catalog_generation
+        Table(
+            "catalog_generation",
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("epoch", Text, nullable=False),
+            Column("generation", Integer, nullable=False, server_default="0"),
+            Column("modified_at", Float, nullable=False),
+        )
+
+        # Create the tables that don't exist yet
+        metadata.create_all(conn)
+
+        # Columns added after the first release, create_all does not alter existing tables
+        DatabaseSchema.add_column_if_not_exists(conn, "files_json", "TEXT")
+
+        DatabaseSchema.migrate_topic_count_columns(conn)
+
+        # After the migrations, a table rebuild drops the indexes and triggers of the old table
+        DatabaseSchema.ensure_rosbags_indexes(conn)
+        DatabaseSchema.ensure_topic_rows_cleanup(conn)
+        DatabaseSchema.ensure_search_index(conn)
+        DatabaseSchema.ensure_catalog_stats(conn)
+        DatabaseSchema.ensure_catalog_generation(conn)
+
+    @staticmethod
+    def _rosbags_table(metadata: MetaData, name: str) -> Table:
+        """
+        Define the rosbags table.
+
+        Args:
+            metadata: SQLAlchemy MetaData the table is added to
+            name: Table name, migrations build the table under a temporary name
+
+        Returns:
+            SQLAlchemy Table
+        """
+        return Table(
+            name,
+            metadata,
+            Column("id", Integer, primary_key=True),
+            Column("file_path", Text, unique=True, nullable=False),
+            Column("file_name", Text),
+            Column("file_type", Text),
+            Column("map_category", Text),
+            Column("size_mb", Float),
+            Column("start_time", Text),
+            Column("end_time", Text),
+            Column("duration", Float),
+            Column("message_count", Integer),
+            Column("topic_count", Integer),
+            Column("topics_json", Text),
+            Column("metadata_json", Text),
+            Column("files_json", Text),
+            Column("created_at", DateTime, server_default="CURRENT_TIMESTAMP"),
+        )
+
+    @staticmethod
+    def is_topic_count_column(column_name: str) -> bool:
+        """
+        Check whether a column is a per-topic message count column of the old wide schema.
+
+        Args:
+            column_name: Name of the column
+
+        Returns:
+            True for topic_<sanitized topic name>_count columns
+        """
+        return (
+            column_name != "topic_count"
+            and column_name.startswith("topic_")
+            and column_name.endswith("_count")
+        )
+
+    @staticmethod
+    def migrate_topic_count_columns(conn: Connection) -> None:
+        """
+        Move the topic_<name>_count columns of rosbags into rosbag_topics.
+
+        Topic names and types come from topics_json. Counts of topics that are
+        only known from a column get the name the API used to derive from the
+        column name. The rosbags table is then rebuilt without those columns,
+        following the SQLite procedure for schema changes ALTER TABLE cannot do.
+
+        Args:
+            conn: SQLAlchemy connection, the caller commits
+        """
+        # bag_manager imports this package, so the import cannot be at module level
+        from ..bag_manager.utils import sanitize_topic_name
+
+        columns = inspect(conn).get_columns("rosbags")
+        count_columns = [
+            c["name"] for c in columns if DatabaseSchema.is_topic_count_column(c["name"])
+        ]
+        if not count_columns:
+            return
+
+        topic_rows = []
+        column_list = ", ".join(["id", "topics_json"] + count_columns)
+        for row in conn.execute(text(f"SELECT {column_list} FROM rosbags")):
+            row = row._mapping
+            counts = {name: row[name] for name in count_columns if row[name] is not None}
+            topics = json.loads(row["topics_json"]) if row["topics_json"] else []
+            for topic in topics:
+                column = f"topic_{sanitize_topic_name(topic['name'])}_count"
+                topic = {"message_count": counts.pop(column, None), **topic}
+                topic_rows.append({"rosbag_id": row["id"], **DatabaseSchema.topic_row(topic)})
+            for column, message_count in counts.items():
+                # Same lossy reconstruction as the former API model
+                name = "/" + column[7:-6].replace("_", "/")
+                topic = {"name": name, "message_count": message_count}
+                topic_rows.append({"rosbag_id": row["id"], **DatabaseSchema.topic_row(topic)})
+
+        if topic_rows:
+            column_list = ", ".join(["rosbag_id"] + DatabaseSchema.TOPIC_COLUMNS)
+            placeholders = ", ".join(
+                f":{col}" for col in ["rosbag_id"] + DatabaseSchema.TOPIC_COLUMNS
+            )
+            conn.execute(
+                text(
+                    f"INSERT OR IGNORE INTO rosbag_topics ({column_list}) VALUES ({placeholders})"
+                ),
+                topic_rows,
+            )
+
+        # Rebuild rosbags without the count columns, keeping any other added column
         metadata = MetaData()
+        new_table = DatabaseSchema._rosbags_table(metadata, "rosbags_new")
+        new_table.create(conn)
+        kept = [c for c in columns if not DatabaseSchema.is_topic_count_column(c["name"])]
+        for column in kept:
+            if column["name"] not in new_table.c:
+                column_type = column["type"].compile(dialect=conn.dialect)
+                conn.execute(
+                    text(f"ALTER TABLE rosbags_new ADD COLUMN {column['name']} {column_type}")
+                )
+
+        kept_list = ", ".join(c["name"] for c in kept)
+        conn.execute(text(f"INSERT INTO rosbags_new ({kept_list}) SELECT {kept_list} FROM rosbags"))
+        conn.execute(text("DROP TABLE rosbags"))
+        conn.execute(text("ALTER TABLE rosbags_new RENAME TO rosbags"))
+        print(
+            f"Migrated {len(count_columns)} topic count columns to rosbag_topics "
+            f"({len(topic_rows)} rows)"
+        )
+
+    @staticmethod
+    def ensure_rosbags_indexes(conn: Connection) -> None:
+        """
+        Create the ROSBAGS_INDEXES that are missing and drop managed indexes no longer listed.
+
+        Args:
+            conn: SQLAlchemy connection, the caller commits
+        """
+        res = conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'rosbags'")
+        )
+        existing = {row[0] for row in res}
+
+        for name in sorted(existing - DatabaseSchema.ROSBAGS_INDEXES.keys()):
+            if name.startswith("ix_rosbags_"):
+                conn.execute(text(f"DROP INDEX {name}"))
+                print(f"Dropped index: {name}")
+
+        for name, columns in DatabaseSchema.ROSBAGS_INDEXES.items():
+            if name not in existing:
+                conn.execute(text(f"CREATE INDEX {name} ON rosbags ({', '.join(columns)})"))
+                print(f"Created index: {name}")
+
+    @staticmethod
+    def ensure_topic_rows_cleanup(conn: Connection) -> None:
+        """
+        Create the trigger deleting the rosbag_topics rows of deleted rosbags.
+
+        The ON DELETE CASCADE of rosbag_topics.rosbag_id needs PRAGMA foreign_keys,
+        which is off, and turning it on would make the table rebuild of
+        migrate_topic_count_columns delete every topic row. When the trigger is
+        created, topic rows left behind by earlier deletes are removed.
 
-        # Define the rosbags table if it doesn't exist
-        if not inspect(conn).has_table("rosbags"):
-            Table(
-                "rosbags",
-                metadata,
-                Column("id", Integer, primary_key=True),
-                Column("file_path", Text, unique=True, nullable=False),
-                Column("file_name", Text),
-                Column("file_type", Text),
-                Column("map_category", Text),
-                Column("size_mb", Float),
-                Column("start_time", Text),
-                Column("end_time", Text),
-                Column("duration", Float),
-                Column("message_count", Integer),
-                Column("topic_count", Integer),
-                Column("topics_json", Text),
-                Column("metadata_json", Text),
-                Column("created_at", DateTime, server_default="CURRENT_TIMESTAMP"),
+        Args:
+            conn: SQLAlchemy connection, the caller commits
+        """
+        res = conn.execute(
+            text(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE type = 'trigger' AND name = 'rosbag_topics_cleanup'"
             )
+        )
+        if res.first() is not None:
+            return
+
+        res = conn.execute(
+            text("DELETE FROM rosbag_topics WHERE rosbag_id NOT IN (SELECT id FROM rosbags)")
+        )
+        if res.rowcount:
+            print(f"Deleted {res.rowcount} topic rows of deleted rosbags")
+        conn.execute(text("""
+        CREATE TRIGGER rosbag_topics_cleanup AFTER DELETE ON rosbags BEGIN
+            DELETE FROM rosbag_topics WHERE rosbag_id = OLD.id;
+        END
+        """))
+
+    @staticmethod
+    def ensure_search_index(conn: Connection) -> None:
+        """
+        Create the rosbags_fts full-text index and the triggers keeping it in sync.
+
+        rosbags_fts has one row per rosbag with the same rowid. Its topics column
+        holds the topic names from topics_json, which is written together with the
+        rosbag_topics rows, so one index write per bag covers both. An index that
+        is created for an existing database is filled from rosbags.
+
+        Args:
+            conn: SQLAlchemy connection, the caller commits
+        """
+        res = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rosbags_fts'")
+        )
+        if res.first() is None:
+            # Prefix indexes keep short prefixes like "2024-07-1*" from expanding to a
+            # merge of every token starting with "1"
+            conn.execute(
+                text(
+                    "CREATE VIRTUAL TABLE rosbags_fts USING fts5("
+                    "file_path, file_name, map_category, start_time, topics, prefix='1 2 3')"
+                )
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO rosbags_fts (rowid, file_path, file_name, map_category, "
+                    "start_time, topics) SELECT id, file_path, file_name, map_category, "
+                    "start_time, "
+                    f"{DatabaseSchema._topic_names_sql('topics_json')} FROM rosbags"
+                )
+            )
+            print("Created full-text search index rosbags_fts")
+
+        new_topics = DatabaseSchema._topic_names_sql("NEW.topics_json")
+        conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS rosbags_fts_insert AFTER INSERT ON rosbags BEGIN
+            INSERT INTO rosbags_fts (rowid, file_path, file_name, map_category, start_time, topics)
+            VALUES (NEW.id, NEW.file_path, NEW.file_name, NEW.map_category, NEW.start_time,
+                    {new_topics});
+        END
+        """))
+        conn.execute(text(f"""
+        CREATE TRIGGER IF NOT EXISTS rosbags_fts_update
+        AFTER UPDATE OF file_path, file_name, map_category, start_time, topics_json ON rosbags
+        BEGIN
+            UPDATE rosbags_fts
+            SET file_path = NEW.file_path, file_name = NEW.file_name,
+                map_category = NEW.map_category, start_time = NEW.start_time,
+                topics = {new_topics}
+            WHERE rowid = NEW.id;
+        END
+        """))
+        conn.execute(text("""
+        CREATE TRIGGER IF NOT EXISTS rosbags_fts_delete AFTER DELETE ON rosbags BEGIN
+            DELETE FROM rosbags_fts WHERE rowid = OLD.id;
+        END
+        """))
+
+    @staticmethod
+    def ensure_catalog_stats(conn: Connection) -> None:
+        """
+        Create the triggers maintaining catalog_stats and fill it if it is out of date.
+
+        Every insert, update and delete of a rosbag adjusts the row of its map
+        category, so reading the statistics costs the same for any catalog size.
+        Rows of categories without bags are removed.
+
+        Args:
+            conn: SQLAlchemy connection, the caller commits
+        """
+        # A new table, or one emptied by hand, while there are rosbags
+        res = conn.execute(
+            text(
+                "SELECT NOT EXISTS (SELECT 1 FROM catalog_stats) "
+                "AND EXISTS (SELECT 1 FROM rosbags)"
+            )
+        )
+        if res.scalar():
+            conn.execute(text("""
+        INSERT INTO catalog_stats (map_category, rosbag_count, total_size_mb, total_duration)
+        SELECT COALESCE(map_category, ''), COUNT(*), COALESCE(SUM(size_mb), 0),
+               COALESCE(SUM(duration), 0)
+        FROM rosbags GROUP BY COALESCE(map_category, '')
+        """))
+            print("Filled catalog_stats from rosbags")
+
+        add_new = """
+            INSERT INTO catalog_stats (map_category, rosbag_count, total_size_mb, total_duration)
+            VALUES (COALESCE(NEW.map_category, ''), 1, COALESCE(NEW.size_mb, 0),
+                    COALESCE(NEW.duration, 0))
+            ON CONFLICT (map_category) DO UPDATE SET
+                rosbag_count = rosbag_count + 1,
+                total_size_mb = total_size_mb + excluded.total_size_mb,
+                total_duration = total_duration + excluded.total_duration;
+        """
+        remove_old = """
+            UPDATE catalog_stats SET
+                rosbag_count = rosbag_count - 1,
+                total_size_mb = total_size_mb - COALESCE(OLD.size_mb, 0),
+                total_duration = total_duration - COALESCE(OLD.duration, 0)
+            WHERE map_category = COALESCE(OLD.map_category, '');
+            DELETE FROM catalog_stats
+            WHERE map_category = COALESCE(OLD.map_category, '') AND rosbag_count <= 0;
+        """
+        triggers = {
+            "catalog_stats_insert": ("AFTER INSERT ON rosbags", add_new),
+            "catalog_stats_update": (
+                "AFTER UPDATE OF map_category, size_mb, duration ON rosbags",
+                remove_old + add_new,
+            ),
+            "catalog_stats_delete": ("AFTER DELETE ON rosbags", remove_old),
+        }
+        for name, (event, body) in triggers.items():
+            conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END"))
+
+    @staticmethod
+    def ensure_catalog_generation(conn: Connection) -> None:
+        """
+        Create the catalog_generation row and the triggers counting writes to rosbags.
+
+        Every insert, update and delete of a rosbag increments generation and sets
+        modified_at, in unix seconds. The API derives its ETags from them. Topic rows
+        only change together with the topics_json of their rosbag, so they need no
+        triggers of their own. epoch is random per database, so a recreated database
+        does not repeat the ETags of the old one.
+
+        Args:
+            conn: SQLAlchemy connection, the caller commits
+        """
+        conn.execute(text(f"""
+        INSERT OR IGNORE INTO catalog_generation (id, epoch, generation, modified_at)
+        VALUES (1, lower(hex(randomblob(8))), 0, {DatabaseSchema.UNIX_TIME_SQL})
+        """))
 
-            # Create the table
-            metadata.create_all(conn)
+        bump = f"""
+            UPDATE catalog_generation
+            SET generation = generation + 1, modified_at = {DatabaseSchema.UNIX_TIME_SQL}
+            WHERE id = 1;
+        """
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(text(f"""
+            CREATE TRIGGER IF NOT EXISTS catalog_generation_{event.lower()}
+            AFTER {event} ON rosbags BEGIN {bump} END
+            """))
+
+    @staticmethod
+    def _topic_names_sql(topics_json: str) -> str:
+        """
+        Build the SQL expression joining the topic names of a topics_json value.
+
+        Args:
+            topics_json: SQL expression of the topics_json value
+
+        Returns:
+            SQL expression, NULL for missing or invalid JSON
+        """
+        return (
+            "(SELECT group_concat(json_extract(value, '$.name'), ' ') FROM json_each("
+            f"CASE WHEN json_valid({topics_json}) THEN {topics_json} END))"
+        )
+
+    @staticmethod
+    def topic_row(topic: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Build the rosbag_topics values of a topics_json entry.
+
+        Args:
+            topic: Topic dictionary as stored in topics_json
+
+        Returns:
+            Dictionary mapping TOPIC_COLUMNS to values, without rosbag_id
+        """
+        row = {column: topic.get(column) for column in DatabaseSchema.TOPIC_COLUMNS}
+        row["topic"] = topic["name"]
+        return row
 
     @staticmethod
     def determine_sqlite_type(value: Any) -> str:
@@ -100,3 +549,19 @@ class DatabaseSchema:
         """
         insp = inspect(conn)
         return [column["name"] for column in insp.get_columns("rosbags")]
+
+    @staticmethod
+    def get_schema_version(conn: Connection) -> int:
+        """
+        Get the schema version of the database.
+
+        SQLite increments it on every schema change, so it identifies the current
+        set of tables and columns.
+
+        Args:
+            conn: SQLAlchemy connection
+
+        Returns:
+            Value of PRAGMA schema_version
+        """
+        return conn.execute(text("PRAGMA schema_version")).scalar()
@@ -0,0 +1,38 @@
+"""
+Full-text search for the Cockpit application.
+
+Search text is translated into an FTS5 query for the rosbags_fts table, see
+DatabaseSchema.ensure_search_index.
+"""
+
+import re
+from typing import Optional
+
+# unicode61, the FTS5 default tokenizer, indexes runs of letters and digits only,
+# so "/rslidar_points" is stored as the tokens "rslidar" and "points"
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+def to_fts5_query(search: str) -> Optional[str]:
+    """
+    Translate search text into an FTS5 MATCH expression.
+
+    Every whitespace separated term must match. A term is split into tokens like
+    the tokenizer splits the indexed text, and its tokens must appear in sequence,
+    so "2024-07" matches a start time of 2024-07-01 and "/vehicle/sensor" matches
+    that topic. A trailing "*" makes the last token a prefix: "trackdrive 2024-07*"
+    or "/rslidar*". Characters with a meaning in FTS5 queries never reach FTS5.
+
+    Args:
+        search: Search text as typed by the user
+
+    Returns:
+        FTS5 query, or None if the search text has no searchable characters
+    """
+    phrases = []
+    for term in search.split():
+        tokens = _TOKEN_PATTERN.findall(term)
+        if tokens:
+            prefix = "*" if term.endswith("*") else ""
+            phrases.append(f'"{" ".join(tokens)}"{prefix}')
+    return " ".join(phrases) or None
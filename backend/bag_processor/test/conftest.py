@@ -0,0 +1,44 @@
+import docker
+import pytest
+
+from ..database import AsyncDatabaseManager, DatabaseManager, DBConnectionPool, DBInitializer
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """Fixture to create a DatabaseManager on a fresh SQLite database."""
+    db_path = str(tmp_path / "rosbag_metadata.db")
+    DBInitializer(db_path).initialize_db()
+    manager = DatabaseManager(DBConnectionPool(db_url=f"sqlite:///{db_path}"))
+    yield manager
+    manager.close_db()
+
+
+@pytest.fixture
+def api_routes(db_manager, tmp_path, monkeypatch):
+    """
+    Fixture to import the API routes with their database service on db_manager.
+
+    The routes module opens DATABASE_PATH and a Docker client on import, so the
+    import runs with a temporary database and without a Docker daemon.
+    """
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "rosbag_metadata.db"))
+    monkeypatch.setattr(docker, "from_env", lambda: None)
+    from ..api import routes
+    from ..api.services import DatabaseService
+
+    async_manager = AsyncDatabaseManager(db_manager)
+    monkeypatch.setattr(routes, "database_service", DatabaseService(async_manager))
+    yield routes
+    async_manager.executor.shutdown()
+
+
+@pytest.fixture
+def api_client(api_routes):
+    """Fixture to create a TestClient of the API app, see api_routes."""
+    from fastapi.testclient import TestClient
+
+    from ..api import app
+
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,59 @@
+from .test_database_operations import make_metadata
+
+
+def test_negotiate_encoding_follows_q_values_and_server_preference(api_routes):
+    """The highest q-value wins, ties go to the server's order, q=0 refuses a coding."""
+    from ..api.compression import negotiate_encoding
+
+    encodings = ["zstd", "br", "gzip"]
+    assert negotiate_encoding("gzip, deflate, br, zstd", encodings) == "zstd"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5", encodings) == "gzip"
+    assert negotiate_encoding("*;q=0.1, gzip;q=0", encodings) == "zstd"
+    assert negotiate_encoding("gzip;q=0", encodings) is None
+    assert negotiate_encoding("identity", encodings) is None
+    assert negotiate_encoding("", encodings) is None
+
+
+def test_large_responses_are_compressed_and_small_ones_are_not(api_client, db_manager):
+    """Catalog listings above the threshold are gzipped when the client accepts it."""
+    db_manager.insert_many([make_metadata(index) for index in range(50)], batch_size=100)
+
+    response = api_client.get("/api/rosbags", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.num_bytes_downloaded < len(response.content) / 3
+    assert len(response.json()["items"]) == 50
+
+    response = api_client.get("/api/rosbags", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.num_bytes_downloaded == len(response.content)
+
+    # Below minimum_size
+    response = api_client.get("/api/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_cached_catalog_responses_are_served_until_the_catalog_changes(
+    api_client, db_manager, monkeypatch
+):
+    """A repeated listing comes from the response cache, a write invalidates it."""
+    db_manager.insert_many([make_metadata(index) for index in range(5)], batch_size=100)
+    headers = {"Accept-Encoding": "gzip"}
+    first = api_client.get("/api/rosbags", params={"limit": 3}, headers=headers)
+    assert first.status_code == 200
+
+    def no_query(*args, **kwargs):
+        raise AssertionError("the endpoint ran")
+
+    with monkeypatch.context() as m:
+        m.setattr(db_manager, "list_rosbags", no_query)
+        cached = api_client.get("/api/rosbags", params={"limit": 3}, headers=headers)
+        assert cached.status_code == 200
+        assert cached.json() == first.json()
+        assert cached.headers["etag"] == first.headers["etag"]
+        assert cached.headers["content-encoding"] == "gzip"
+
+    db_manager.insert_many([make_metadata(5)], batch_size=100)
+    changed = api_client.get("/api/rosbags", params={"limit": 3}, headers=headers)
+    assert changed.json()["total"] == 6
+    assert changed.headers["etag"] != first.headers["etag"]
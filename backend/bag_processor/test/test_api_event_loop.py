@@ -0,0 +1,139 @@
+import asyncio
+import subprocess
+import time
+
+import httpx
+
+from .test_database_operations import make_metadata
+
+# Every fake blocking call takes BLOCK_SECONDS, a handler calling one on the
+# event loop stalls it far beyond MAX_LAG_SECONDS
+BLOCK_SECONDS = 0.3
+MAX_LAG_SECONDS = 0.1
+
+
+def block(result=None):
+    """Create a function that blocks its thread like a slow Docker or subprocess call."""
+
+    def blocking_call(*args, **kwargs):
+        time.sleep(BLOCK_SECONDS)
+        return result
+
+    return blocking_call
+
+
+class SlowDockerService:
+    """DockerService whose calls block like a slow Docker daemon."""
+
+    run_container_from_image = staticmethod(block({"container_id": "c1"}))
+    run_container_by_id = staticmethod(block({"container_id": "c1"}))
+    stop_container_by_id = staticmethod(block({"container_id": "c1"}))
+    remove_container_by_id = staticmethod(block({"container_id": "c1"}))
+    copy_from_container = staticmethod(block({"status": "success"}))
+    list_all_images = staticmethod(block([]))
+    list_all_containers = staticmethod(block([]))
+
+
+class SlowRosbagPlayer:
+    """RosbagPlayer whose calls block like starting and stopping ros2 bag play."""
+
+    play_bag = staticmethod(block(True))
+    stop_playback = staticmethod(block("Playback stopped"))
+    get_playback_status = staticmethod(block({"running": False}))
+
+
+class SlowPublishService:
+    """RosPublisherService whose calls block like starting ros2 topic pub."""
+
+    publish_masterlogic = staticmethod(block())
+    stop_publish_masterlogic = staticmethod(block({"status": "success"}))
+
+
+async def max_event_loop_lag(app, method, url, **kwargs):
+    """
+    Send a request to the app while measuring the event loop lag.
+
+    Args:
+        app: ASGI app
+        method: HTTP method
+        url: URL of the request
+        **kwargs: Keyword arguments of httpx.AsyncClient.request
+
+    Returns:
+        The response and the longest delay of a 5 ms sleep on the event loop in seconds
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        lag = 0.0
+
+        async def monitor():
+            nonlocal lag
+            while True:
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lag = max(lag, time.perf_counter() - start - 0.005)
+
+        monitor_task = asyncio.create_task(monitor())
+        # Let the monitor start sleeping before the handler can block the loop
+        await asyncio.sleep(0.01)
+        response = await client.request(method, url, **kwargs)
+        # And let it wake up once more, to measure a block at the end of the request
+        await asyncio.sleep(0.01)
+        monitor_task.cancel()
+    return response, lag
+
+
+def test_blocking_handlers_do_not_block_the_event_loop(
+    api_routes, db_manager, tmp_path, monkeypatch
+):
+    """Docker, playback, publishing, analysis and log file calls run off the event loop."""
+    from ..api import app
+
+    db_manager.insert_many([make_metadata(0)], batch_size=10)
+    monkeypatch.setattr(api_routes, "docker_service", SlowDockerService())
+    monkeypatch.setattr(api_routes, "bag_player", SlowRosbagPlayer())
+    monkeypatch.setattr(api_routes, "publish_service", SlowPublishService())
+    # Like reading a large log file
+    monkeypatch.setattr(api_routes, "read_last_lines", block(["line\n"]))
+    monkeypatch.setattr(
+        subprocess, "run", block(subprocess.CompletedProcess([], 0, stdout="ok", stderr=""))
+    )
+    script_path = tmp_path / "analyze.py"
+    script_path.write_text("")
+
+    requests = [
+        ("POST", "/api/docker/run", {"params": {"container_id": "c1"}}),
+        ("POST", "/api/docker/stop/c1", {}),
+        ("DELETE", "/api/docker/remove/c1", {}),
+        ("GET", "/api/docker/images", {}),
+        ("GET", "/api/docker/containers", {}),
+        (
+            "POST",
+            "/api/docker/copy/c1",
+            {"json": {"source_path": "/src", "destination_path": "/dst"}},
+        ),
+        ("POST", "/api/rosbags/play/start", {"params": {"bag_path": make_metadata(0).file_path}}),
+        ("POST", "/api/rosbags/play/stop", {}),
+        ("POST", "/api/rosbags/play/status", {}),
+        (
+            "POST",
+            "/api/topics/master_logic/publish",
+            {"params": {"as_state": 1, "active_mission": 2}},
+        ),
+        ("POST", "/api/topics/master_logic/stop", {}),
+        (
+            "POST",
+            "/api/test/analyze",
+            {
+                "json": {
+                    "evaluation_folder_path": str(tmp_path),
+                    "script_path": str(script_path),
+                }
+            },
+        ),
+        ("GET", "/api/logs/server", {"params": {"lines": 10}}),
+    ]
+    for method, url, kwargs in requests:
+        response, lag = asyncio.run(max_event_loop_lag(app, method, url, **kwargs))
+        assert response.status_code == 200, (url, response.text)
+        assert lag < MAX_LAG_SECONDS, f"{method} {url} blocked the event loop for {lag:.3f} s"
@@ -0,0 +1,87 @@
+from .test_database_operations import make_metadata
+
+
+def test_list_rosbags_endpoint_pages_filters_and_counts(api_client, db_manager):
+    """GET /api/rosbags returns one filtered, sorted page with the total and next cursor."""
+    rows = [make_metadata(index, ("autox", "skidpad")[index % 2]) for index in range(7)]
+    db_manager.insert_many(rows, batch_size=10)
+
+    response = api_client.get("/api/rosbags", params={"category": "autox", "limit": 3})
+    assert response.status_code == 200
+    page = response.json()
+    assert page["total"] == 4
+    # Newest first, ties by id descending
+    assert [item["id"] for item in page["items"]] == [7, 5, 3]
+    assert page["items"][0]["topic_counts"] == {"/vehicle_state": 10}
+
+    page = api_client.get(
+        "/api/rosbags",
+        params={"category": "autox", "limit": 3, "cursor": page["next_cursor"]},
+    ).json()
+    assert [item["id"] for item in page["items"]] == [1]
+    assert page["next_cursor"] is None
+
+    page = api_client.get(
+        "/api/rosbags", params={"min_duration": 62, "max_size_mb": 105, "sort": "duration"}
+    ).json()
+    assert [item["duration"] for item in page["items"]] == [62.0, 63.0, 64.0, 65.0]
+    assert page["total"] == 4
+
+    response = api_client.get("/api/rosbags", params={"sort": "weather"})
+    assert response.status_code == 400
+    response = api_client.get("/api/rosbags", params={"sort": "duration", "cursor": "x"})
+    assert response.status_code == 400
+
+
+def test_catalog_endpoints_answer_304_while_the_catalog_is_unchanged(
+    api_client, db_manager, monkeypatch
+):
+    """Revalidating an unchanged catalog returns 304 without running the endpoint."""
+    db_manager.insert_many([make_metadata(index) for index in range(2)], batch_size=10)
+
+    response = api_client.get("/api/stats")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    last_modified = response.headers["last-modified"]
+    assert response.headers["cache-control"] == "no-cache"
+
+    def no_query(*args, **kwargs):
+        raise AssertionError("the endpoint queried the catalog")
+
+    with monkeypatch.context() as m:
+        for name in ("get_database_stats", "get_rosbags_by_map_category", "list_rosbags"):
+            m.setattr(db_manager, name, no_query)
+        for url in ("/api/stats", "/api/rosbags", "/api/rosbags/autox"):
+            response = api_client.get(url, headers={"If-None-Match": etag})
+            assert response.status_code == 304
+            assert response.content == b""
+            assert response.headers["etag"] == etag
+        response = api_client.get("/api/stats", headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+
+    db_manager.insert_many([make_metadata(2)], batch_size=10)
+    response = api_client.get("/api/stats", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["rosbag_count"] == 3
+    assert response.headers["etag"] != etag
+
+
+def test_rosbag_responses_match_the_validated_models(api_routes, db_manager):
+    """The unvalidated response dictionaries equal the validated Rosbag model dumps."""
+    import json
+
+    from ..api.models import Rosbag
+    from ..api.schema import dump_json, from_dicts_to_rosbag_responses
+
+    db_manager.insert_many([make_metadata(index) for index in range(3)], batch_size=10)
+    rows = db_manager.get_all_rosbags()
+    page = db_manager.list_rosbags(columns=db_manager.get_list_columns() + ["topic_counts"])
+    # A row of a database that still has the wide topic count columns
+    legacy = {key: value for key, value in page.rows[0].items() if key != "topic_counts"}
+    legacy["topic__rslidar_points_count"] = 5
+
+    for data in (rows, page.rows, [legacy]):
+        expected = [Rosbag(**dict(item)).model_dump(mode="json") for item in data]
+        assert from_dicts_to_rosbag_responses(data) == expected
+        assert json.loads(dump_json(from_dicts_to_rosbag_responses(data))) == expected
+    assert from_dicts_to_rosbag_responses([legacy])[0]["topic_counts"] == {"/rslidar/points": 5}
@@ -1,6 +1,12 @@
+import os
+import sqlite3
+import struct
+
 import pytest
 
-from ..bag_manager.parser import RosbagParser
+from ..bag_manager.fingerprint import FingerprintStore
+from ..bag_manager.mcap_reader import MCAP_MAGIC
+from ..bag_manager.parser import BAG_CATEGORY_SUBDIRECTORIES, RosbagParser
 
 
 @pytest.fixture
@@ -29,3 +35,287 @@ def test_scan_directory():
     )
     metadata_list = parser.scan_directory(directory_path, recursive=True)
     assert len(metadata_list) > 0, "metadata found in the directory"
+
+
+def _mcap_record(opcode: int, content: bytes) -> bytes:
+    return struct.pack("<BQ", opcode, len(content)) + content
+
+
+def _mcap_string(value: str) -> bytes:
+    encoded = value.encode("utf-8")
+    return struct.pack("<I", len(encoded)) + encoded
+
+
+def write_mcap_with_summary(path, channels, start_ns, end_ns, statistics=True):
+    """
+    Write a minimal MCAP file containing only a summary section.
+
+    Args:
+        path: Output file path
+        channels: List of (topic, type, message_count) tuples
+        start_ns: Timestamp of the first message
+        end_ns: Timestamp of the last message
+        statistics: Whether the summary has a Statistics record
+    """
+    data = MCAP_MAGIC + _mcap_record(0x01, _mcap_string("ros2") + _mcap_string("test"))
+    data += _mcap_record(0x0F, struct.pack("<I", 0))
+
+    summary = b""
+    counts = b""
+    for index, (topic, msg_type, count) in enumerate(channels, start=1):
+        summary += _mcap_record(
+            0x03,
+            struct.pack("<H", index)
+            + _mcap_string(msg_type)
+            + _mcap_string("ros2msg")
+            + struct.pack("<I", 0),
+        )
+        summary += _mcap_record(
+            0x04,
+            struct.pack("<HH", index, index)
+            + _mcap_string(topic)
+            + _mcap_string("cdr")
+            + struct.pack("<I", 0),
+        )
+        counts += struct.pack("<HQ", index, count)
+
+    total = sum(count for _, _, count in channels)
+    if statistics:
+        summary += _mcap_record(
+            0x0B,
+            struct.pack("<QHIIIIQQ", total, len(channels), len(channels), 0, 0, 0, start_ns, end_ns)
+            + struct.pack("<I", len(counts))
+            + counts,
+        )
+
+    summary_start = len(data)
+    data += summary
+    data += _mcap_record(0x02, struct.pack("<QQI", summary_start, 0, 0)) + MCAP_MAGIC
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_parse_mcap_bag_without_metadata_yaml(bag_parser, tmp_path):
+    """MCAP folders without metadata.yaml are parsed from the summary section."""
+    bag_folder = tmp_path / "bag_0"
+    bag_folder.mkdir()
+    start_ns = 1_700_000_000_000_000_000
+    write_mcap_with_summary(
+        bag_folder / "bag_0.mcap",
+        [
+            ("/rslidar_points", "sensor_msgs/msg/PointCloud2", 100),
+            ("/tf", "tf2_msgs/msg/TFMessage", 7),
+        ],
+        start_ns,
+        start_ns + 10_000_000_000,
+    )
+
+    metadata = bag_parser.parse_bag_folder(str(bag_folder))
+
+    assert metadata is not None
+    assert metadata.file_type == "mcap"
+    assert metadata.file_name == "bag_0.mcap"
+    assert metadata.duration == 10.0
+    assert metadata.message_count == 107
+    assert metadata.topic_count == 2
+    topics = {topic["name"]: topic for topic in metadata.topics}
+    assert topics["/rslidar_points"]["type"] == "sensor_msgs/msg/PointCloud2"
+    assert topics["/rslidar_points"]["message_count"] == 100
+    assert topics["/tf"]["message_count"] == 7
+
+
+def test_parse_mcap_bag_without_statistics_or_message_indexes(bag_parser, tmp_path):
+    """Message counts that the summary does not give are stored as unknown, not as 0."""
+    bag_folder = tmp_path / "bag_0"
+    bag_folder.mkdir()
+    write_mcap_with_summary(
+        bag_folder / "bag_0.mcap",
+        [("/tf", "tf2_msgs/msg/TFMessage", 7)],
+        0,
+        0,
+        statistics=False,
+    )
+
+    metadata = bag_parser.parse_bag_folder(str(bag_folder))
+
+    assert metadata is not None
+    assert metadata.message_count is None
+    assert [topic["message_count"] for topic in metadata.topics] == [None]
+
+
+def test_parse_split_mcap_bag(bag_parser, tmp_path):
+    """Split recordings are merged into one entry with per-file offsets."""
+    bag_folder = tmp_path / "split"
+    bag_folder.mkdir()
+    start_ns = 1_700_000_000_000_000_000
+    write_mcap_with_summary(
+        bag_folder / "split_1.mcap",
+        [("/tf", "tf2_msgs/msg/TFMessage", 20), ("/imu", "sensor_msgs/msg/Imu", 5)],
+        start_ns + 10_000_000_000,
+        start_ns + 25_000_000_000,
+    )
+    write_mcap_with_summary(
+        bag_folder / "split_0.mcap",
+        [("/tf", "tf2_msgs/msg/TFMessage", 30)],
+        start_ns,
+        start_ns + 10_000_000_000,
+    )
+
+    metadata = bag_parser.parse_bag_folder(str(bag_folder))
+
+    assert metadata is not None
+    assert metadata.file_path == str(bag_folder)
+    assert metadata.file_name == "split"
+    assert metadata.duration == 25.0
+    assert metadata.message_count == 55
+    assert metadata.topic_count == 2
+    topics = {topic["name"]: topic for topic in metadata.topics}
+    assert topics["/tf"]["message_count"] == 50
+    assert topics["/imu"]["message_count"] == 5
+    assert metadata.size_mb == pytest.approx(
+        sum(os.path.getsize(path) for path in bag_folder.iterdir()) / (1024 * 1024)
+    )
+    assert metadata.files == [
+        {
+            "path": "split_0.mcap",
+            "start_time_ns": start_ns,
+            "end_time_ns": start_ns + 10_000_000_000,
+            "message_count": 30,
+        },
+        {
+            "path": "split_1.mcap",
+            "start_time_ns": start_ns + 10_000_000_000,
+            "end_time_ns": start_ns + 25_000_000_000,
+            "message_count": 25,
+        },
+    ]
+
+
+def write_rosbag2_db3(path, messages):
+    """
+    Write a minimal rosbag2 SQLite bag.
+
+    Args:
+        path: Output file path
+        messages: List of (topic, type, timestamp_ns, payload) tuples
+    """
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE topics(id INTEGER PRIMARY KEY, name TEXT NOT NULL, type TEXT NOT NULL, "
+        "serialization_format TEXT NOT NULL, offered_qos_profiles TEXT NOT NULL)"
+    )
+    conn.execute(
+        "CREATE TABLE messages(id INTEGER PRIMARY KEY, topic_id INTEGER NOT NULL, "
+        "timestamp INTEGER NOT NULL, data BLOB NOT NULL)"
+    )
+    topic_ids = {}
+    for topic, msg_type, timestamp, payload in messages:
+        if topic not in topic_ids:
+            topic_ids[topic] = len(topic_ids) + 1
+            conn.execute(
+                "INSERT INTO topics VALUES (?, ?, ?, 'cdr', '')",
+                (topic_ids[topic], topic, msg_type),
+            )
+        conn.execute(
+            "INSERT INTO messages(topic_id, timestamp, data) VALUES (?, ?, ?)",
+            (topic_ids[topic], timestamp, payload),
+        )
+    conn.commit()
+    conn.close()
+
+
+def test_parse_db3_bag_without_metadata_yaml(bag_parser, tmp_path):
+    """db3 folders without metadata.yaml are parsed with aggregate queries."""
+    bag_folder = tmp_path / "bag_0"
+    bag_folder.mkdir()
+    start_ns = 1_700_000_000_000_000_000
+    write_rosbag2_db3(
+        bag_folder / "bag_0_0.db3",
+        [
+            ("/vehicle_state", "comm_pkg/msg/VehicleState", start_ns, b"\x00" * 16),
+            ("/rslidar_points", "sensor_msgs/msg/PointCloud2", start_ns + 1, b"\x00" * 4096),
+            ("/vehicle_state", "comm_pkg/msg/VehicleState", start_ns + 2_000_000_000, b"\x00" * 16),
+        ],
+    )
+
+    metadata = bag_parser.parse_bag_folder(str(bag_folder))
+
+    assert metadata is not None
+    assert metadata.file_type == "db3"
+    assert metadata.duration == 2.0
+    assert metadata.message_count == 3
+    topics = {topic["name"]: topic for topic in metadata.topics}
+    assert topics["/vehicle_state"]["message_count"] == 2
+    assert topics["/vehicle_state"]["bytes"] == 32
+    assert topics["/rslidar_points"]["bytes"] == 4096
+
+
+@pytest.fixture
+def dataset_directory(tmp_path):
+    """Create a dataset tree with MCAP bags in every category subdirectory."""
+    start_ns = 1_700_000_000_000_000_000
+    for category_index, category in enumerate(BAG_CATEGORY_SUBDIRECTORIES):
+        for bag_index in range(3):
+            bag_folder = tmp_path / category / f"{category}_{bag_index}"
+            bag_folder.mkdir(parents=True)
+            write_mcap_with_summary(
+                bag_folder / f"{category}_{bag_index}.mcap",
+                [("/vehicle_state", "comm_pkg/msg/VehicleState", 10 * category_index + bag_index)],
+                start_ns,
+                start_ns + (bag_index + 1) * 1_000_000_000,
+            )
+    return tmp_path
+
+
+def test_parallel_scan_matches_serial_scan(bag_parser, dataset_directory):
+    """The process-pool scan returns the same metadata in the same order."""
+    serial = bag_parser.scan_directory(str(dataset_directory))
+    parallel = bag_parser.scan_directory(str(dataset_directory), workers=3, timeout=30)
+
+    assert len(serial) == 3 * len(BAG_CATEGORY_SUBDIRECTORIES)
+    assert [m.to_dict() for m in parallel] == [m.to_dict() for m in serial]
+
+
+def test_rescan_skips_unchanged_bag_folders(bag_parser, dataset_directory):
+    """Only new or changed folders are parsed when a fingerprint store is given."""
+    fingerprints = FingerprintStore()
+    first_scan = bag_parser.scan_directory(str(dataset_directory), fingerprints=fingerprints)
+    fingerprints = FingerprintStore(fingerprints.commit())
+
+    changed_bag = dataset_directory / "autox" / "autox_1" / "autox_1.mcap"
+    stat = changed_bag.stat()
+    os.utime(changed_bag, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    rescan = bag_parser.scan_directory(str(dataset_directory), fingerprints=fingerprints)
+
+    assert len(first_scan) == 3 * len(BAG_CATEGORY_SUBDIRECTORIES)
+    assert [metadata.file_path for metadata in rescan] == [str(changed_bag)]
+    assert len(fingerprints.skipped) == len(first_scan) - 1
+    assert list(fingerprints.pending) == [str(changed_bag.parent)]
+
+
+def test_find_bag_folders_stops_at_bag_folders(bag_parser, dataset_directory, monkeypatch):
+    """Subdirectories of bag folders are not visited, and nested non-bag folders are."""
+    nested = dataset_directory / "skidpad" / "2024-07" / "day_1"
+    nested.mkdir(parents=True)
+    write_mcap_with_summary(nested / "day_1.mcap", [("/tf", "tf2_msgs/msg/TFMessage", 1)], 0, 1)
+    inside_bag = dataset_directory / "skidpad" / "skidpad_0" / "exported"
+    inside_bag.mkdir()
+    write_mcap_with_summary(
+        inside_bag / "export.mcap", [("/tf", "tf2_msgs/msg/TFMessage", 1)], 0, 1
+    )
+    (dataset_directory / "skidpad" / "skidpad_0" / "metadata.yaml").write_text("")
+
+    listed = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: listed.append(path) or scandir(path))
+    bag_folders = bag_parser._find_bag_folders(str(dataset_directory))
+
+    skidpad = [folder for folder in bag_folders if folder.map_category == "skidpad"]
+    assert [folder.path for folder in skidpad] == [
+        str(nested),
+        str(dataset_directory / "skidpad" / "skidpad_0"),
+        str(dataset_directory / "skidpad" / "skidpad_1"),
+        str(dataset_directory / "skidpad" / "skidpad_2"),
+    ]
+    assert str(inside_bag) not in listed
+    assert sorted(skidpad[1].file_stats) == ["metadata.yaml", "skidpad_0.mcap"]
@@ -0,0 +1,193 @@
+import struct
+
+import numpy as np
+import pytest
+
+from ..bag_manager import db3_reader
+from ..bag_manager.mcap_reader import (
+    MCAP_MAGIC,
+    read_mcap_bag_info,
+    read_mcap_topic_timestamps,
+)
+from ..bag_manager.parser import RosbagParser
+from ..bag_manager.topic_timing import compute_topic_timing
+from .test_bag_manager_parser import _mcap_record, _mcap_string, write_rosbag2_db3
+
+START_NS = 1_700_000_000_000_000_000
+
+
+def test_compute_topic_timing():
+    """Frequency, jitter, gaps and regressions of a 10 Hz topic with a dropout."""
+    period_ns = 100_000_000
+    timestamps = START_NS + period_ns * np.array([0, 1, 2, 3, 7, 8, 10, 9, 11], dtype=np.int64)
+
+    timing = compute_topic_timing(timestamps)
+
+    assert timing["frequency"] == pytest.approx(8 / 1.1)
+    assert timing["max_gap_s"] == pytest.approx(0.4)
+    assert timing["gap_threshold_s"] == pytest.approx(0.2)
+    assert timing["gap_count"] == 1
+    assert timing["regression_count"] == 1
+    assert timing["jitter_s"] == pytest.approx(np.std([0.1, 0.1, 0.1, 0.4, 0.1, 0.1, 0.1, 0.1]))
+
+    assert compute_topic_timing(timestamps[:1])["frequency"] is None
+
+
+def write_chunked_mcap(path, messages):
+    """
+    Write an MCAP file with one uncompressed chunk, message indexes and a chunk index.
+
+    Args:
+        path: Output file path
+        messages: List of (topic, log_time_ns) tuples in write order
+    """
+    channel_ids = {}
+    for topic, _ in messages:
+        channel_ids.setdefault(topic, len(channel_ids) + 1)
+
+    records = b""
+    index_entries = {channel_id: b"" for channel_id in channel_ids.values()}
+    for sequence, (topic, log_time) in enumerate(messages):
+        channel_id = channel_ids[topic]
+        index_entries[channel_id] += struct.pack("<QQ", log_time, len(records))
+        records += _mcap_record(
+            0x05, struct.pack("<HIQQ", channel_id, sequence, log_time, log_time) + b"payload"
+        )
+
+    times = [log_time for _, log_time in messages]
+    data = MCAP_MAGIC + _mcap_record(0x01, _mcap_string("ros2") + _mcap_string("test"))
+    chunk_start = len(data)
+    data += _mcap_record(
+        0x06,
+        struct.pack("<QQQI", min(times), max(times), len(records), 0)
+        + _mcap_string("")
+        + struct.pack("<Q", len(records))
+        + records,
+    )
+    chunk_length = len(data) - chunk_start
+
+    offsets = b""
+    message_index_start = len(data)
+    for channel_id, entries in index_entries.items():
+        offsets += struct.pack("<HQ", channel_id, len(data))
+        data += _mcap_record(0x07, struct.pack("<HI", channel_id, len(entries)) + entries)
+    message_index_length = len(data) - message_index_start
+    data += _mcap_record(0x0F, struct.pack("<I", 0))
+
+    summary = b""
+    for topic, channel_id in channel_ids.items():
+        summary += _mcap_record(
+            0x03,
+            struct.pack("<H", channel_id)
+            + _mcap_string("std_msgs/msg/Header")
+            + _mcap_string("ros2msg")
+            + struct.pack("<I", 0),
+        )
+        summary += _mcap_record(
+            0x04,
+            struct.pack("<HH", channel_id, channel_id)
+            + _mcap_string(topic)
+            + _mcap_string("cdr")
+            + struct.pack("<I", 0),
+        )
+    summary += _mcap_record(
+        0x08,
+        struct.pack("<QQQQ", min(times), max(times), chunk_start, chunk_length)
+        + struct.pack("<I", len(offsets))
+        + offsets
+        + struct.pack("<Q", message_index_length)
+        + _mcap_string("")
+        + struct.pack("<QQ", len(records), len(records)),
+    )
+
+    summary_start = len(data)
+    data += summary
+    data += _mcap_record(0x02, struct.pack("<QQI", summary_start, 0, 0)) + MCAP_MAGIC
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_read_mcap_topic_timestamps_from_message_index(tmp_path):
+    """Timestamps come from the MessageIndex records, in write order."""
+    messages = [
+        ("/a", START_NS),
+        ("/b", START_NS + 5),
+        ("/a", START_NS + 20),
+        ("/a", START_NS + 10),
+    ]
+    write_chunked_mcap(tmp_path / "bag.mcap", messages)
+
+    timestamps = read_mcap_topic_timestamps(str(tmp_path / "bag.mcap"))
+
+    assert timestamps["/a"].tolist() == [START_NS, START_NS + 20, START_NS + 10]
+    assert timestamps["/b"].tolist() == [START_NS + 5]
+
+
+def test_read_mcap_bag_info_counts_messages_without_statistics(tmp_path):
+    """Without a Statistics record, the counts come from the MessageIndex records."""
+    messages = [
+        ("/a", START_NS),
+        ("/b", START_NS + 5),
+        ("/a", START_NS + 20),
+        ("/a", START_NS + 10),
+    ]
+    write_chunked_mcap(tmp_path / "bag.mcap", messages)
+
+    info = read_mcap_bag_info(str(tmp_path / "bag.mcap"))
+
+    assert info["message_count"] == 4
+    assert info["starting_time"]["nanoseconds_since_epoch"] == START_NS
+    assert info["duration"]["nanoseconds"] == 20
+    counts = {
+        topic["topic_metadata"]["name"]: topic["message_count"]
+        for topic in info["topics_with_message_count"]
+    }
+    assert counts == {"/a": 3, "/b": 1}
+
+
+def test_read_db3_topic_timestamps_in_batches(tmp_path, monkeypatch):
+    """Timestamps are grouped per topic across fetch batches, in write order."""
+    monkeypatch.setattr(db3_reader, "TIMESTAMP_BATCH_ROWS", 2)
+    offsets = [("/a", 0), ("/b", 5), ("/a", 20), ("/a", 10), ("/b", 3)]
+    write_rosbag2_db3(
+        tmp_path / "bag.db3",
+        [(topic, "std_msgs/msg/Empty", START_NS + offset, b"") for topic, offset in offsets],
+    )
+
+    timestamps = db3_reader.read_db3_topic_timestamps(str(tmp_path / "bag.db3"))
+
+    assert timestamps["/a"].tolist() == [START_NS, START_NS + 20, START_NS + 10]
+    assert timestamps["/b"].tolist() == [START_NS + 5, START_NS + 3]
+    assert timestamps["/a"].dtype == np.int64
+
+
+def test_deep_scan_stores_topic_timing(tmp_path):
+    """A deep scan of a split db3 bag stores the timing of the whole recording per topic."""
+    bag_folder = tmp_path / "bag"
+    bag_folder.mkdir()
+    period_ns = 100_000_000
+    # /rslidar_points drops two frames at the split boundary
+    write_rosbag2_db3(
+        bag_folder / "bag_10.db3",
+        [
+            ("/rslidar_points", "sensor_msgs/msg/PointCloud2", START_NS + i * period_ns, b"x")
+            for i in range(13, 20)
+        ],
+    )
+    write_rosbag2_db3(
+        bag_folder / "bag_2.db3",
+        [
+            ("/rslidar_points", "sensor_msgs/msg/PointCloud2", START_NS + i * period_ns, b"x")
+            for i in range(10)
+        ],
+    )
+
+    metadata = RosbagParser(deep_scan=True).parse_bag_folder(str(bag_folder))
+
+    assert metadata is not None
+    (topic,) = metadata.topics
+    assert topic["message_count"] == 17
+    assert topic["frequency"] == pytest.approx(16 / 1.9)
+    assert topic["max_gap_s"] == pytest.approx(0.4)
+    assert topic["gap_count"] == 1
+    assert topic["regression_count"] == 0
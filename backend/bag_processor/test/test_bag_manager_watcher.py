@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+import yaml
+
+from ..bag_manager.parser import BAG_CATEGORY_SUBDIRECTORIES, RosbagParser
+from ..bag_manager.watcher import BagFolderWatcher
+from .test_bag_manager_parser import write_mcap_with_summary
+
+START_NS = 1_700_000_000_000_000_000
+
+
+@pytest.fixture
+def dataset_root(tmp_path):
+    """Create an empty dataset tree."""
+    root = tmp_path / "rosbags"
+    for category in BAG_CATEGORY_SUBDIRECTORIES:
+        (root / category).mkdir(parents=True)
+    return root
+
+
+def record_bag(bag_folder, with_metadata_yaml=True):
+    """Write an MCAP bag, and the metadata.yaml rosbag2 writes when the bag is closed."""
+    bag_folder.mkdir()
+    write_mcap_with_summary(
+        bag_folder / f"{bag_folder.name}.mcap",
+        [("/vehicle_state", "comm_pkg/msg/VehicleState", 10)],
+        START_NS,
+        START_NS + 1_000_000_000,
+    )
+    if with_metadata_yaml:
+        write_metadata_yaml(bag_folder)
+
+
+def write_metadata_yaml(bag_folder):
+    info = {
+        "duration": {"nanoseconds": 1_000_000_000},
+        "starting_time": {"nanoseconds_since_epoch": START_NS},
+        "message_count": 10,
+        "topics_with_message_count": [
+            {
+                "topic_metadata": {
+                    "name": "/vehicle_state",
+                    "type": "comm_pkg/msg/VehicleState",
+                    "serialization_format": "cdr",
+                },
+                "message_count": 10,
+            }
+        ],
+    }
+    with open(bag_folder / "metadata.yaml", "w") as f:
+        yaml.safe_dump({"rosbag2_bagfile_information": info}, f)
+
+
+def test_polling_watcher_waits_for_metadata_yaml(dataset_root, db_manager):
+    """A bag folder is ingested once metadata.yaml exists and the folder is stable."""
+    watcher = BagFolderWatcher(
+        str(dataset_root), RosbagParser(), db_manager, settle_seconds=0, use_inotify=False
+    )
+    bag_folder = dataset_root / "autox" / "autox_0"
+    record_bag(bag_folder, with_metadata_yaml=False)
+
+    watcher.poll_once()
+    assert watcher.ingest_ready_folders() == []
+
+    write_metadata_yaml(bag_folder)
+    watcher.poll_once()
+    # The first look only records the fingerprint, the second one sees it stable
+    assert watcher.ingest_ready_folders() == []
+    assert watcher.ingest_ready_folders() == [str(bag_folder)]
+
+    watcher.poll_once()
+    assert watcher.ingest_ready_folders() == []
+
+    rows = db_manager.get_all_rosbags()
+    assert [(row["file_name"], row["map_category"]) for row in rows] == [("autox_0.mcap", "autox")]
+
+
+def test_polling_watcher_survives_a_missing_category_directory(dataset_root, db_manager):
+    """A vanished category directory is retried on the next poll instead of ending the watcher."""
+    watcher = BagFolderWatcher(
+        str(dataset_root), RosbagParser(), db_manager, settle_seconds=0, use_inotify=False
+    )
+    bag_folder = dataset_root / "autox" / "autox_0"
+    record_bag(bag_folder)
+    (dataset_root / "skidpad").rename(dataset_root / "skidpad_unmounted")
+
+    watcher.poll_once()
+    assert watcher.dirty == {}
+
+    (dataset_root / "skidpad_unmounted").rename(dataset_root / "skidpad")
+    watcher.poll_once()
+    watcher.ingest_ready_folders()
+    assert watcher.ingest_ready_folders() == [str(bag_folder)]
+
+    # Unchanged folders are checked again and again, the skip list does not grow
+    watcher.dirty[str(bag_folder)] = 0.0
+    watcher.ingest_ready_folders()
+    watcher.ingest_ready_folders()
+    assert watcher.fingerprints.skipped == []
+
+
+def test_inotify_watcher_ingests_new_bag_folder(dataset_root, db_manager):
+    """New bag folders are ingested without a rescan."""
+    watcher = BagFolderWatcher(str(dataset_root), RosbagParser(), db_manager, settle_seconds=0.2)
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    try:
+        time.sleep(0.5)
+        record_bag(dataset_root / "trackdrive" / "trackdrive_0")
+
+        deadline = time.monotonic() + 10
+        while not db_manager.get_all_rosbags() and time.monotonic() < deadline:
+            time.sleep(0.1)
+    finally:
+        watcher.stop()
+        thread.join(timeout=5)
+
+    rows = db_manager.get_all_rosbags()
+    assert [row["map_category"] for row in rows] == ["trackdrive"]
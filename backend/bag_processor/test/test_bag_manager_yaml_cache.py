@@ -0,0 +1,27 @@
+import os
+
+import yaml
+
+from ..bag_manager.yaml_cache import MetadataYamlCache
+
+
+def test_metadata_yaml_cache_reparses_changed_files(tmp_path, monkeypatch):
+    """Cache entries survive a new cache instance and are invalidated by mtime and size."""
+    yaml_path = tmp_path / "metadata.yaml"
+    yaml_path.write_text(yaml.safe_dump({"message_count": 1}))
+    cache_dir = str(tmp_path / "cache")
+
+    assert MetadataYamlCache(cache_dir).load(str(yaml_path)) == {"message_count": 1}
+
+    # A new instance, as in the next run, reads the entry without parsing
+    def fail(*args, **kwargs):
+        raise AssertionError("metadata.yaml was parsed again")
+
+    monkeypatch.setattr(yaml, "load", fail)
+    assert MetadataYamlCache(cache_dir).load(str(yaml_path)) == {"message_count": 1}
+    monkeypatch.undo()
+
+    yaml_path.write_text(yaml.safe_dump({"message_count": 22}))
+    st = os.stat(yaml_path)
+    os.utime(yaml_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert MetadataYamlCache(cache_dir).load(str(yaml_path)) == {"message_count": 22}
@@ -0,0 +1,42 @@
+import asyncio
+import threading
+import time
+
+from ..database import AsyncDatabaseManager
+from .test_database_operations import make_metadata
+
+
+def test_async_database_manager_runs_queries_off_the_event_loop(db_manager):
+    """Queries run on the database threads while the event loop keeps serving other tasks."""
+    db_manager.insert_many([make_metadata(index) for index in range(3)], batch_size=10)
+    async_manager = AsyncDatabaseManager(db_manager, max_workers=2)
+    threads = []
+
+    def slow_query():
+        threads.append(threading.current_thread().name)
+        time.sleep(0.3)
+        return db_manager.get_all_rosbags()
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.create_task(tick())
+        rows = await async_manager.run(slow_query)
+        page = await async_manager.list_rosbags(sort="-id", limit=2)
+        ticker.cancel()
+        return rows, page, ticks
+
+    rows, page, ticks = asyncio.run(main())
+
+    assert len(rows) == 3
+    assert [row["id"] for row in page.rows] == [3, 2]
+    assert threads[0].startswith("database")
+    # The loop ticked during the 0.3 s query instead of waiting for it
+    assert ticks >= 10
+    async_manager.executor.shutdown()
@@ -0,0 +1,40 @@
+from ..database import DBConnectionPool, SQLiteProfile
+
+
+def read_pragmas(pool: DBConnectionPool) -> dict:
+    with pool.get_connection() as conn:
+        return {
+            name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in SQLiteProfile._fields
+        }
+
+
+def test_sqlite_profile_is_applied_to_pooled_connections(tmp_path, monkeypatch):
+    """Every pooled connection gets the profile, environment variables override fields."""
+    monkeypatch.setenv("SQLITE_MMAP_SIZE", "0")
+    pool = DBConnectionPool(
+        db_url=f"sqlite:///{tmp_path / 'tuned.db'}", sqlite_profile=SQLiteProfile.from_env()
+    )
+    try:
+        pragmas = read_pragmas(pool)
+    finally:
+        pool.dispose()
+
+    assert pragmas == {
+        "journal_mode": "wal",
+        "synchronous": 1,
+        "mmap_size": 0,
+        "cache_size": -64 * 1024,
+        "temp_store": 2,
+        "busy_timeout": 5000,
+    }
+
+
+def test_sqlite_profile_none_keeps_sqlite_defaults(tmp_path):
+    pool = DBConnectionPool(db_url=f"sqlite:///{tmp_path / 'plain.db'}", sqlite_profile=None)
+    try:
+        pragmas = read_pragmas(pool)
+    finally:
+        pool.dispose()
+
+    assert pragmas["journal_mode"] == "delete"
+    assert pragmas["synchronous"] == 2
@@ -0,0 +1,453 @@
+import json
+import sqlite3
+
+from sqlalchemy import text
+
+from ..database import DatabaseManager, DBConnectionPool, DBInitializer, RosbagMetadata
+from ..database.pagination import keyset_segments
+from ..database.schema import DatabaseSchema
+
+
+def make_metadata(index: int, map_category: str = "autox") -> RosbagMetadata:
+    """Create RosbagMetadata for a synthetic bag."""
+    topics = [{"name": "/vehicle_state", "type": "comm_pkg/msg/VehicleState", "message_count": 10}]
+    return RosbagMetadata(
+        file_path=f"/data/{map_category}/bag_{index}/bag_{index}.mcap",
+        file_name=f"bag_{index}.mcap",
+        file_type="mcap",
+        map_category=map_category,
+        start_time="2024-07-01-10-00-00",
+        end_time="2024-07-01-10-01-00",
+        duration=60.0 + index,
+        size_mb=100.0 + index,
+        message_count=10,
+        topic_count=1,
+        topics_json=json.dumps(topics),
+        metadata_json=json.dumps({}),
+    )
+
+
+def test_insert_many_commits_while_iterating(db_manager):
+    """Batches are committed while the metadata iterator is still producing rows."""
+    visible_rows = []
+
+    def metadata_iter():
+        for index in range(5):
+            visible_rows.append(len(db_manager.get_all_rosbags()))
+            yield make_metadata(index)
+
+    counts = db_manager.insert_many(metadata_iter(), batch_size=2)
+
+    assert counts.inserted == 5
+    assert visible_rows == [0, 0, 2, 2, 4]
+    assert len(db_manager.get_all_rosbags()) == 5
+
+
+def test_insert_many_groups_rows_by_column_set(db_manager):
+    """Rows with different metadata fields get their own columns and are all inserted."""
+    lidar = make_metadata(1)
+    lidar.metadata_json = json.dumps({"weather": "rain"})
+    lidar.topics_json = json.dumps(
+        [{"name": "/rslidar_points", "type": "sensor_msgs/msg/PointCloud2", "message_count": 42}]
+    )
+    rows = [make_metadata(0), lidar, make_metadata(2)]
+
+    assert db_manager.insert_many(rows, batch_size=10).inserted == 3
+
+    by_path = {row["file_path"]: row for row in db_manager.get_all_rosbags()}
+    assert by_path[lidar.file_path]["weather"] == "rain"
+    assert by_path[lidar.file_path]["topic_counts"] == {"/rslidar_points": 42}
+    assert by_path[make_metadata(2).file_path]["weather"] is None
+    assert by_path[make_metadata(2).file_path]["topic_counts"] == {"/vehicle_state": 10}
+    assert not any(column.startswith("topic__") for column in by_path[lidar.file_path])
+
+
+def test_insert_many_upserts_known_bags(db_manager):
+    """Re-ingesting bags updates changed rows in place and leaves unchanged rows alone."""
+    db_manager.insert_many([make_metadata(index) for index in range(3)], batch_size=10)
+    ids = {row["file_path"]: row["id"] for row in db_manager.get_all_rosbags()}
+
+    resized = make_metadata(1)
+    resized.size_mb = 500.0
+    retopiced = make_metadata(2)
+    retopiced.topics_json = json.dumps(
+        [{"name": "/tf", "type": "tf2_msgs/msg/TFMessage", "message_count": 3}]
+    )
+    rows = [make_metadata(0), resized, retopiced, make_metadata(3)]
+
+    counts = db_manager.insert_many(rows, batch_size=10)
+
+    assert counts == (1, 2, 1)
+    by_path = {row["file_path"]: row for row in db_manager.get_all_rosbags()}
+    assert len(by_path) == 4
+    assert all(by_path[path]["id"] == rosbag_id for path, rosbag_id in ids.items())
+    assert by_path[resized.file_path]["size_mb"] == 500.0
+    # Topics that are no longer in the bag are removed
+    assert by_path[retopiced.file_path]["topic_counts"] == {"/tf": 3}
+    assert by_path[resized.file_path]["topic_counts"] == {"/vehicle_state": 10}
+
+    assert db_manager.insert_rosbag_metadata(make_metadata(0)) == (0, 0, 1)
+
+
+def test_insert_runs_no_schema_introspection_in_steady_state(db_manager, tmp_path, monkeypatch):
+    """The rosbags columns are only inspected after schema changes."""
+    inspections = []
+    get_existing_columns = DatabaseSchema.get_existing_columns
+
+    def counting_get_existing_columns(conn):
+        inspections.append(1)
+        return get_existing_columns(conn)
+
+    monkeypatch.setattr(DatabaseSchema, "get_existing_columns", counting_get_existing_columns)
+
+    db_manager.insert_rosbag_metadata(make_metadata(0))
+    after_first_insert = len(inspections)
+    for index in range(1, 4):
+        db_manager.insert_rosbag_metadata(make_metadata(index))
+    assert len(inspections) == after_first_insert
+
+    # A column added by another process changes PRAGMA schema_version
+    conn = sqlite3.connect(str(tmp_path / "rosbag_metadata.db"))
+    conn.execute("ALTER TABLE rosbags ADD COLUMN driver TEXT")
+    conn.close()
+    bag = make_metadata(4)
+    bag.driver = "rui"
+    db_manager.insert_rosbag_metadata(bag)
+
+    assert len(inspections) == after_first_insert + 1
+    assert db_manager.get_rosbag_by_path(bag.file_path)["driver"] == "rui"
+
+
+def test_migrate_topic_count_columns(tmp_path):
+    """Wide topic count columns move to rosbag_topics and are dropped from rosbags."""
+    db_path = str(tmp_path / "wide.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE rosbags (id INTEGER PRIMARY KEY, file_path TEXT UNIQUE NOT NULL, "
+        "file_name TEXT, topic_count INTEGER, topics_json TEXT, metadata_json TEXT, "
+        "topic__vehicle_state_count INTEGER, topic__tf_count INTEGER, driver TEXT)"
+    )
+    topics = [{"name": "/vehicle_state", "type": "comm_pkg/msg/VehicleState", "message_count": 7}]
+    conn.execute(
+        "INSERT INTO rosbags VALUES (3, '/data/bag.mcap', 'bag.mcap', 2, ?, '{}', 7, 9, 'rui')",
+        (json.dumps(topics),),
+    )
+    conn.commit()
+    conn.close()
+
+    DBInitializer(db_path).initialize_db()
+    manager = DatabaseManager(DBConnectionPool(db_url=f"sqlite:///{db_path}"))
+    try:
+        rosbag = manager.get_rosbag_by_path("/data/bag.mcap")
+        topic_rows = manager.get_rosbag_topics(3)
+    finally:
+        manager.close_db()
+
+    assert not [column for column in rosbag if DatabaseSchema.is_topic_count_column(column)]
+    assert rosbag["driver"] == "rui"
+    assert rosbag["topic_count"] == 2
+    assert rosbag["topic_counts"] == {"/tf": 9, "/vehicle_state": 7}
+    assert [(row["topic"], row["type"]) for row in topic_rows] == [
+        ("/tf", None),
+        ("/vehicle_state", "comm_pkg/msg/VehicleState"),
+    ]
+
+
+def query_plan(db_manager, sql, params=None):
+    with db_manager.conn_pool.get_connection() as conn:
+        res = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params or {})
+        return " | ".join(row.detail for row in res)
+
+
+def test_catalog_queries_use_indexes(db_manager):
+    """Filtering by category and sorting by the list columns use indexes after ANALYZE."""
+    rows = [
+        make_metadata(index, map_category)
+        for map_category in ("autox", "skidpad", "acceleration", "trackdrive")
+        for index in range(20)
+    ]
+    db_manager.insert_many(rows, batch_size=100)
+
+    plan = query_plan(
+        db_manager, "SELECT * FROM rosbags WHERE map_category = :category", {"category": "autox"}
+    )
+    assert "USING INDEX ix_rosbags_map_category" in plan
+
+    plan = query_plan(
+        db_manager,
+        "SELECT * FROM rosbags WHERE map_category = :category ORDER BY start_time DESC LIMIT 50",
+        {"category": "autox"},
+    )
+    assert "USING INDEX ix_rosbags_map_category_start_time" in plan
+    assert "TEMP B-TREE" not in plan
+
+    for column in ("start_time", "duration", "size_mb"):
+        plan = query_plan(db_manager, f"SELECT * FROM rosbags ORDER BY {column} LIMIT 50")
+        assert f"SCAN rosbags USING INDEX ix_rosbags_{column}" in plan
+
+    plan = query_plan(db_manager, "SELECT * FROM rosbags WHERE duration > 70")
+    assert "USING INDEX ix_rosbags_duration" in plan
+
+    plan = query_plan(db_manager, "SELECT * FROM rosbag_topics WHERE rosbag_id = 1")
+    # The UNIQUE (rosbag_id, topic) constraint's index
+    assert "SEARCH rosbag_topics USING INDEX sqlite_autoindex_rosbag_topics_1 (rosbag_id=?)" in plan
+
+
+def test_indexes_survive_topic_count_migration(tmp_path):
+    """The rosbags rebuild of the topic count migration gets the managed indexes again."""
+    db_path = str(tmp_path / "wide.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE rosbags (id INTEGER PRIMARY KEY, file_path TEXT UNIQUE NOT NULL, "
+        "topics_json TEXT, map_category TEXT, start_time TEXT, topic__tf_count INTEGER)"
+    )
+    conn.execute("CREATE INDEX ix_rosbags_map_category_start_time ON rosbags (map_category)")
+    conn.execute("CREATE INDEX ix_rosbags_obsolete ON rosbags (start_time)")
+    conn.commit()
+    conn.close()
+
+    DBInitializer(db_path).initialize_db()
+
+    conn = sqlite3.connect(db_path)
+    indexes = {
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'rosbags' "
+            "AND name LIKE 'ix_%'"
+        )
+    }
+    conn.close()
+    assert indexes == set(DatabaseSchema.ROSBAGS_INDEXES)
+
+
+def test_search_rosbags(db_manager):
+    """Prefix and phrase searches over paths, start times and topic names stay in sync."""
+    trackdrive = make_metadata(1, "trackdrive")
+    trackdrive.topics_json = json.dumps(
+        [{"name": "/rslidar_points", "type": "sensor_msgs/msg/PointCloud2", "message_count": 5}]
+    )
+    august = make_metadata(2, "trackdrive")
+    august.start_time = "2024-08-03-09-00-00"
+    db_manager.insert_many([make_metadata(0), trackdrive, august], batch_size=10)
+
+    def search(text):
+        return sorted(row["file_path"] for row in db_manager.search_rosbags(text))
+
+    assert search("trackdrive 2024-07*") == [trackdrive.file_path]
+    assert search("/rslidar*") == [trackdrive.file_path]
+    assert search("rslidar_points") == [trackdrive.file_path]
+    assert search("/vehicle_st*") == sorted([make_metadata(0).file_path, august.file_path])
+    # FTS5 syntax characters are not passed through
+    assert search('bag_0 "(') == [make_metadata(0).file_path]
+    assert len(search("-*")) == 3
+
+    # Re-ingesting with other topics updates the index
+    trackdrive.topics_json = json.dumps([{"name": "/tf", "message_count": 1}])
+    db_manager.insert_many([trackdrive], batch_size=10)
+    assert search("/rslidar*") == []
+    assert search("/tf") == [trackdrive.file_path]
+
+
+def test_list_rosbags_keyset_pagination(db_manager):
+    """Walking the pages in every sort order returns each row once, in order, NULLs included."""
+    rows = []
+    for index in range(23):
+        metadata = make_metadata(index, ("autox", "skidpad")[index % 2])
+        # Repeated sort values and missing ones
+        metadata.duration = None if index % 5 == 0 else float(index % 4)
+        metadata.start_time = None if index % 7 == 0 else f"2024-07-{1 + index % 3:02d}-10-00-00"
+        rows.append(metadata)
+    db_manager.insert_many(rows, batch_size=100)
+    all_rows = db_manager.get_all_rosbags()
+
+    for sort in ("id", "-id", "file_path", "start_time", "-start_time", "duration", "-duration"):
+        column = sort.lstrip("-")
+        descending = sort.startswith("-")
+        # SQLite orders NULLs first, ties are ordered by id in the same direction
+        expected = sorted(
+            all_rows, key=lambda row: (row[column] is not None, row[column] or 0, row["id"])
+        )
+        if descending:
+            expected.reverse()
+
+        listed, cursor = [], None
+        while True:
+            page = db_manager.list_rosbags(
+                sort=sort, after_cursor=cursor, limit=4, columns=["file_path"]
+            )
+            listed.extend(page.rows)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert [row["id"] for row in listed] == [row["id"] for row in expected], sort
+
+    page = db_manager.list_rosbags(
+        filters={"map_category": "skidpad", "min_duration": 2, "max_size_mb": 115, "search": None},
+        sort="-duration",
+        columns=["file_path", "topic_counts"],
+    )
+    assert set(page.rows[0]) == {"id", "duration", "file_path", "topic_counts"}
+    assert page.rows[0]["topic_counts"] == {"/vehicle_state": 10}
+    assert [(row["duration"], row["id"]) for row in page.rows] == sorted(
+        [
+            (row["duration"], row["id"])
+            for row in all_rows
+            if row["map_category"] == "skidpad"
+            and row["duration"] is not None
+            and row["duration"] >= 2
+            and row["size_mb"] <= 115
+        ],
+        reverse=True,
+    )
+    assert page.next_cursor is None
+
+
+def test_list_rosbags_deep_page_is_an_index_range(db_manager):
+    """A page after a cursor starts an index range at the cursor row instead of skipping rows."""
+    segment = keyset_segments("start_time", False, ("2024-07-01-10-00-00", 42))[0]
+    plan = query_plan(
+        db_manager,
+        f"SELECT * FROM rosbags WHERE {segment.where} ORDER BY {segment.order_by} LIMIT 50",
+        segment.params,
+    )
+    assert "SEARCH rosbags USING INDEX ix_rosbags_start_time (start_time>?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_list_rosbags_sorts_are_index_ranges(db_manager):
+    """Every segment of every sort key reads an index in page order, without a sort."""
+    rows = []
+    for map_category in ("autox", "skidpad", "acceleration", "trackdrive"):
+        for index in range(20):
+            metadata = make_metadata(index, map_category)
+            metadata.start_time = f"2024-07-{index + 1:02d}-10-00-00"
+            rows.append(metadata)
+    # A few bags without the sort values, for the NULL segments
+    for index in range(3):
+        metadata = make_metadata(index, None)
+        metadata.start_time = metadata.duration = metadata.size_mb = None
+        rows.append(metadata)
+    db_manager.insert_many(rows, batch_size=100)
+    values = {
+        "map_category": "autox",
+        "start_time": "2024-07-01-10-00-00",
+        "duration": 60.0,
+        "size_mb": 100.0,
+    }
+    for column, value in values.items():
+        index = f"USING INDEX ix_rosbags_{column} "
+        for descending in (False, True):
+            for cursor in (None, (value, 5), (None, 5)):
+                for segment in keyset_segments(column, descending, cursor):
+                    plan = query_plan(
+                        db_manager,
+                        f"SELECT * FROM rosbags WHERE {segment.where} "
+                        f"ORDER BY {segment.order_by} LIMIT 50",
+                        segment.params,
+                    )
+                    context = (column, descending, cursor, segment.where, plan)
+                    assert index in plan + " ", context
+                    assert "TEMP B-TREE" not in plan, context
+
+
+def test_catalog_stats_follow_inserts_updates_and_deletes(db_manager, tmp_path):
+    """catalog_stats matches aggregates over rosbags after every kind of change."""
+    rows = [make_metadata(index, ("autox", "skidpad")[index % 2]) for index in range(6)]
+    rows[5].map_category = None
+    db_manager.insert_many(rows, batch_size=100)
+
+    moved = make_metadata(0, "autox")
+    moved.map_category = "trackdrive"
+    moved.size_mb = 1000.0
+    db_manager.insert_many([moved], batch_size=100)
+    with db_manager.conn_pool.get_connection() as conn:
+        conn.execute(
+            text("DELETE FROM rosbags WHERE file_path = :path"), {"path": rows[2].file_path}
+        )
+        conn.commit()
+
+    def expected_stats():
+        conn = sqlite3.connect(str(tmp_path / "rosbag_metadata.db"))
+        res = conn.execute(
+            "SELECT map_category, COUNT(*), SUM(size_mb), SUM(duration) FROM rosbags "
+            "GROUP BY map_category ORDER BY COALESCE(map_category, '')"
+        ).fetchall()
+        conn.close()
+        return [
+            {
+                "map_category": map_category,
+                "rosbag_count": count,
+                "total_size_mb": size,
+                "total_duration": duration,
+            }
+            for map_category, count, size, duration in res
+        ]
+
+    stats = db_manager.get_database_stats()
+    assert stats["categories"] == expected_stats()
+    assert [c["map_category"] for c in stats["categories"]] == [
+        None,
+        "autox",
+        "skidpad",
+        "trackdrive",
+    ]
+    assert stats["rosbag_count"] == 5
+    assert stats["total_size_mb"] == 1000 + 101 + 103 + 104 + 105
+    with db_manager.conn_pool.get_connection() as conn:
+        assert stats["total_columns"] == len(DatabaseSchema.get_existing_columns(conn))
+
+    # A catalog_stats table that lost its rows is filled again on startup
+    with db_manager.conn_pool.get_connection() as conn:
+        conn.execute(text("DELETE FROM catalog_stats"))
+        conn.commit()
+    DBInitializer(str(tmp_path / "rosbag_metadata.db")).initialize_db()
+    assert db_manager.get_database_stats()["categories"] == expected_stats()
+
+
+def test_deleting_a_rosbag_deletes_its_topic_rows(db_manager, tmp_path):
+    """Topic rows go with their bag, also when another process deletes it."""
+    db_manager.insert_many([make_metadata(index) for index in range(2)], batch_size=100)
+    deleted = db_manager.get_rosbag_by_path(make_metadata(0).file_path)
+    kept = db_manager.get_rosbag_by_path(make_metadata(1).file_path)
+    assert db_manager.get_rosbag_topics(deleted["id"])
+
+    conn = sqlite3.connect(str(tmp_path / "rosbag_metadata.db"))
+    conn.execute("DELETE FROM rosbags WHERE id = ?", (deleted["id"],))
+    conn.commit()
+    (orphans,) = conn.execute(
+        "SELECT COUNT(*) FROM rosbag_topics WHERE rosbag_id = ?", (deleted["id"],)
+    ).fetchone()
+    conn.close()
+    assert orphans == 0
+    assert db_manager.get_rosbag_topics(deleted["id"]) == []
+    assert db_manager.get_rosbag_topics(kept["id"])
+
+
+def test_catalog_version_counts_writes(db_manager, tmp_path):
+    """The catalog generation changes with every write, also by another process."""
+    initial = db_manager.get_catalog_version()
+    assert initial.generation == 0
+
+    rows = [make_metadata(index) for index in range(3)]
+    db_manager.insert_many(rows, batch_size=100)
+    version = db_manager.get_catalog_version()
+    assert version.generation == 3
+    assert version.epoch == initial.epoch
+    assert version.modified_at >= initial.modified_at
+    assert version.etag != initial.etag
+
+    assert db_manager.get_catalog_version() == version
+
+    # An unchanged rescan writes nothing
+    db_manager.insert_many(rows, batch_size=100)
+    assert db_manager.get_catalog_version().generation == 3
+
+    conn = sqlite3.connect(str(tmp_path / "rosbag_metadata.db"))
+    conn.execute("DELETE FROM rosbags WHERE id = 1")
+    conn.commit()
+    conn.close()
+    assert db_manager.get_catalog_version().generation == 4
+
+    # A new column changes the stats, so it changes the ETag too
+    db_manager.add_column_if_not_exists("weather")
+    assert db_manager.get_catalog_version().etag != version.etag
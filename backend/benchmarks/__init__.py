@@ -0,0 +1,6 @@
+"""
+Benchmarks for the Cockpit backend.
+
+Each module can be run from the backend directory, e.g.
+`python -m benchmarks.bench_scan_directory /path/to/rosbags`.
+"""
@@ -0,0 +1,108 @@
+"""
+Benchmark wire size and latency of catalog responses over a simulated slow link,
+uncompressed and with every installed content coding.
+
+The API app runs in-process behind httpx's ASGI transport. A wrapping transport
+delays each response by the round trip time plus its size on the wire divided
+by the bandwidth. Cold requests add a unique query parameter, so they miss the
+response cache and run the endpoint; warm requests repeat the same URL.
+
+Usage:
+    python -m benchmarks.bench_compression --bags 2000 --topics 150 --mbit 10 --rtt-ms 50
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import docker
+import httpx
+import numpy as np
+
+from .bench_insert_many import open_database
+from .bench_search import make_metadata
+
+
+class SlowLinkTransport(httpx.AsyncBaseTransport):
+    """Transport delaying responses like a link with the given bandwidth and round trip."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, mbit: float, rtt_ms: float):
+        self.transport = transport
+        self.bytes_per_second = mbit * 1e6 / 8
+        self.rtt = rtt_ms / 1000
+        self.wire_bytes = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        # The body as sent, still compressed
+        body = b"".join([chunk async for chunk in response.stream])
+        self.wire_bytes = len(body)
+        await asyncio.sleep(self.rtt + len(body) / self.bytes_per_second)
+        return httpx.Response(response.status_code, headers=response.headers, content=body)
+
+
+async def measure(app, url: str, params: dict, accept_encoding: str, requests: int, args):
+    """Return the wire size and median cold and warm latency in ms of url."""
+    transport = SlowLinkTransport(httpx.ASGITransport(app=app), args.mbit, args.rtt_ms)
+    headers = {"Accept-Encoding": accept_encoding}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        latencies = {"cold": [], "warm": []}
+        for index in range(requests):
+            nonce = {"nonce": f"{time.time()}-{index}"}
+            for kind, request_params in (("cold", {**params, **nonce}), ("warm", params)):
+                start = time.perf_counter()
+                response = await client.get(url, params=request_params, headers=headers)
+                response.raise_for_status()
+                # Includes decompressing on the client
+                response.json()
+                latencies[kind].append((time.perf_counter() - start) * 1000)
+        encoding = response.headers.get("content-encoding", "identity")
+    return (
+        encoding,
+        transport.wire_bytes,
+        np.median(latencies["cold"]),
+        np.median(latencies["warm"]),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response compression")
+    parser.add_argument("--bags", type=int, default=2000, help="Bags in the catalog")
+    parser.add_argument("--topics", type=int, default=150, help="Topics per bag")
+    parser.add_argument("--mbit", type=float, default=10.0, help="Link bandwidth in Mbit/s")
+    parser.add_argument("--rtt-ms", type=float, default=50.0, help="Link round trip time in ms")
+    parser.add_argument("--requests", type=int, default=5, help="Requests per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "catalog.db")
+        db_manager = open_database(db_path)
+        db_manager.insert_many(
+            (make_metadata(index, args.topics) for index in range(args.bags)), batch_size=1000
+        )
+        db_manager.close_db()
+
+        # The routes module opens the database and a Docker client on import; the
+        # measured endpoints do not use Docker, so no daemon is needed
+        os.environ["DATABASE_PATH"] = db_path
+        docker.from_env = lambda: None
+        from bag_processor.api import app
+        from bag_processor.api.compression import COMPRESSORS
+
+        print(f"link: {args.mbit} Mbit/s, {args.rtt_ms} ms round trip")
+        for url, params in (("/api/rosbags", {"limit": 500}), ("/api/rosbags/autox", {})):
+            print(url, params)
+            for accept_encoding in ["identity", *COMPRESSORS]:
+                encoding, wire_bytes, cold, warm = asyncio.run(
+                    measure(app, url, params, accept_encoding, args.requests, args)
+                )
+                print(
+                    f"  {encoding:9} {wire_bytes / 1024:9.0f} KiB"
+                    f"   cold {cold:7.0f} ms   warm {warm:7.0f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark API-style read latency while a bulk ingest is running in another process.
+
+Each SQLite profile runs on a fresh database that is seeded with a few bags of one
+map category. A separate process then ingests synthetic bags with insert_many, like
+the CLI, while this process keeps reading the seeded category, like the API.
+
+Usage:
+    python -m benchmarks.bench_concurrent_reads --bags 5000 --topics 150
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from bag_processor.database import (
+    DEFAULT_SQLITE_PROFILE,
+    DatabaseManager,
+    DBConnectionPool,
+    DBInitializer,
+)
+
+from .bench_insert_many import make_metadata
+
+# Journal mode and synchronous of a plain SQLite connection
+SQLITE_DEFAULTS = DEFAULT_SQLITE_PROFILE._replace(
+    journal_mode="DELETE", synchronous="FULL", mmap_size=0, cache_size=-2000, temp_store="DEFAULT"
+)
+
+
+def open_database(path: str, profile) -> DatabaseManager:
+    return DatabaseManager(DBConnectionPool(db_url=f"sqlite:///{path}", sqlite_profile=profile))
+
+
+def ingest(path: str, profile, bags: int, topics: int, batch_size: int) -> None:
+    """Insert synthetic bags, runs in the writer process."""
+    db_manager = open_database(path, profile)
+    db_manager.insert_many(
+        (make_metadata(index, topics) for index in range(1000, 1000 + bags)),
+        batch_size=batch_size,
+    )
+    db_manager.close_db()
+
+
+def run(name: str, profile, args, tmp_dir: str) -> None:
+    path = os.path.join(tmp_dir, f"{name}.db")
+    DBInitializer(path).initialize_db()
+    db_manager = open_database(path, profile)
+    seed = [make_metadata(index, args.topics) for index in range(args.seed)]
+    for metadata in seed:
+        metadata.map_category = "skidpad"
+    db_manager.insert_many(seed, batch_size=args.seed)
+
+    writer = multiprocessing.Process(
+        target=ingest, args=(path, profile, args.bags, args.topics, args.batch_size)
+    )
+    start = time.perf_counter()
+    writer.start()
+    latencies = []
+    errors = 0
+    while writer.is_alive():
+        read_start = time.perf_counter()
+        try:
+            db_manager.get_rosbags_by_map_category("skidpad")
+        except ConnectionError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - read_start)
+        # Paced like polling API clients, so the reader does not compete for CPU
+        time.sleep(args.interval)
+    writer.join()
+    ingest_time = time.perf_counter() - start
+    db_manager.close_db()
+
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    print(
+        f"{name:>8}: ingest {args.bags / ingest_time:6.0f} rows/s, {len(latencies):6d} reads, "
+        f"p50 {np.percentile(ms, 50):7.2f} ms, p99 {np.percentile(ms, 99):7.2f} ms, "
+        f"max {ms.max():8.2f} ms, {errors} failed"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reads during a bulk ingest")
+    parser.add_argument("--bags", type=int, default=5000, help="Bags ingested by the writer")
+    parser.add_argument("--seed", type=int, default=50, help="Bags read by the reader")
+    parser.add_argument("--topics", type=int, default=150, help="Topics per bag")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per transaction")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between reads")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run("defaults", SQLITE_DEFAULTS, args, tmp_dir)
+        run("tuned", DEFAULT_SQLITE_PROFILE, args, tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark keyset-paginated list_rosbags against loading the whole catalog.
+
+Usage:
+    python -m benchmarks.bench_list_rosbags --bags 100000 --topics 10
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from bag_processor.database.pagination import encode_cursor
+
+from .bench_insert_many import open_database
+from .bench_search import make_metadata
+
+
+def timed(func, repeat: int) -> float:
+    """Average milliseconds of a call."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DatabaseManager.list_rosbags")
+    parser.add_argument("--bags", type=int, default=100000, help="Bags in the catalog")
+    parser.add_argument("--topics", type=int, default=10, help="Topics per bag")
+    parser.add_argument("--limit", type=int, default=50, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per page")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = open_database(os.path.join(tmp_dir, "list.db"))
+        db_manager.insert_many(
+            (make_metadata(index, args.topics) for index in range(args.bags)), batch_size=1000
+        )
+
+        sort = "-start_time"
+        print(f"{'page':>8} {'list_rosbags':>13} {'LIMIT/OFFSET':>13}")
+        for page in (0, 10, 100, (args.bags // args.limit) - 1):
+            offset = page * args.limit
+            with db_manager.conn_pool.get_connection() as conn:
+                row = conn.execute(
+                    text(
+                        "SELECT start_time, id FROM rosbags "
+                        "ORDER BY start_time DESC, id DESC LIMIT 1 OFFSET :offset"
+                    ),
+                    {"offset": max(offset - 1, 0)},
+                ).one()
+            cursor = encode_cursor(sort, row.start_time, row.id) if offset else None
+
+            keyset_ms = timed(
+                lambda: db_manager.list_rosbags(sort=sort, after_cursor=cursor, limit=args.limit),
+                args.repeat,
+            )
+
+            def offset_page():
+                with db_manager.conn_pool.get_connection() as conn:
+                    conn.execute(
+                        text(
+                            "SELECT * FROM rosbags ORDER BY start_time DESC, id DESC "
+                            "LIMIT :limit OFFSET :offset"
+                        ),
+                        {"limit": args.limit, "offset": offset},
+                    ).fetchall()
+
+            print(f"{page:>8} {keyset_ms:>10.2f} ms {timed(offset_page, args.repeat):>10.2f} ms")
+
+        all_ms = timed(db_manager.get_all_rosbags, 1)
+        print(f"get_all_rosbags: {all_ms:.0f} ms")
+        db_manager.close_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark metadata.yaml loading on a synthetic 500-topic rosbag2 metadata.yaml.
+
+Compares the pure Python loader, the libyaml C loader and a warm parsed-result
+cache.
+
+Usage:
+    python -m benchmarks.bench_metadata_yaml --topics 500 --repeat 20
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import yaml
+
+from bag_processor.bag_manager.yaml_cache import MetadataYamlCache, SafeLoader
+
+
+def write_synthetic_metadata_yaml(path: str, topic_count: int) -> None:
+    """
+    Write a rosbag2 metadata.yaml with the given number of topics.
+
+    Args:
+        path: Output file path
+        topic_count: Number of topics
+    """
+    qos = (
+        "- history: 3\n  depth: 0\n  reliability: 1\n  durability: 2\n"
+        "  deadline:\n    sec: 9223372036\n    nsec: 854775807\n"
+        "  lifespan:\n    sec: 9223372036\n    nsec: 854775807\n"
+        "  liveliness: 1\n  liveliness_lease_duration:\n    sec: 9223372036\n"
+        "    nsec: 854775807\n  avoid_ros_namespace_conventions: false"
+    )
+    start_ns = 1_700_000_000_000_000_000
+    info = {
+        "rosbag2_bagfile_information": {
+            "version": 5,
+            "storage_identifier": "mcap",
+            "duration": {"nanoseconds": 120_000_000_000},
+            "starting_time": {"nanoseconds_since_epoch": start_ns},
+            "message_count": 1000 * topic_count,
+            "topics_with_message_count": [
+                {
+                    "topic_metadata": {
+                        "name": f"/vehicle/sensor_{index}/data",
+                        "type": "sensor_msgs/msg/PointCloud2",
+                        "serialization_format": "cdr",
+                        "offered_qos_profiles": qos,
+                    },
+                    "message_count": 1000,
+                }
+                for index in range(topic_count)
+            ],
+            "compression_format": "",
+            "compression_mode": "",
+            "relative_file_paths": ["bag_0.mcap"],
+            "files": [
+                {
+                    "path": "bag_0.mcap",
+                    "starting_time": {"nanoseconds_since_epoch": start_ns},
+                    "duration": {"nanoseconds": 120_000_000_000},
+                    "message_count": 1000 * topic_count,
+                }
+            ],
+        }
+    }
+    with open(path, "w") as f:
+        yaml.safe_dump(info, f, sort_keys=False)
+
+
+def time_per_load(load, repeat: int) -> float:
+    """Return the mean seconds per call of load()."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        load()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metadata.yaml loading")
+    parser.add_argument("--topics", type=int, default=500, help="Topics in the metadata.yaml")
+    parser.add_argument("--repeat", type=int, default=20, help="Loads per variant")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        yaml_path = os.path.join(tmp_dir, "metadata.yaml")
+        write_synthetic_metadata_yaml(yaml_path, args.topics)
+        cache = MetadataYamlCache(os.path.join(tmp_dir, "cache"))
+        expected = cache.load(yaml_path)  # Warm the cache
+
+        def load_pure():
+            with open(yaml_path, "rb") as f:
+                return yaml.load(f, Loader=yaml.SafeLoader)
+
+        def load_c():
+            with open(yaml_path, "rb") as f:
+                return yaml.load(f, Loader=SafeLoader)
+
+        pure_time = time_per_load(load_pure, args.repeat)
+        c_time = time_per_load(load_c, args.repeat)
+        cached_time = time_per_load(lambda: cache.load(yaml_path), args.repeat)
+        identical = load_pure() == load_c() == cache.load(yaml_path) == expected
+
+        print(f"metadata.yaml: {args.topics} topics, {os.path.getsize(yaml_path) / 1024:.0f} KiB")
+        print(f"libyaml available: {SafeLoader is not yaml.SafeLoader}")
+        print(f"yaml.SafeLoader:  {pure_time * 1000:8.2f} ms")
+        print(f"CSafeLoader:      {c_time * 1000:8.2f} ms ({pure_time / c_time:.1f}x)")
+        print(f"cache hit:        {cached_time * 1000:8.2f} ms ({pure_time / cached_time:.1f}x)")
+        print(f"identical results: {identical}")
+
+
+if __name__ == "__main__":
+    main()
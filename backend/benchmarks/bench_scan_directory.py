@@ -0,0 +1,40 @@
+"""
+Benchmark the serial and the process-pool directory scan of RosbagParser.
+
+Usage:
+    python -m benchmarks.bench_scan_directory /path/to/rosbags --workers 8
+"""
+
+import argparse
+import os
+import time
+
+from bag_processor.bag_manager.parser import RosbagParser
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RosbagParser.scan_directory")
+    parser.add_argument("directory", type=str, help="Dataset directory to scan")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel workers")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds allowed per bag")
+    args = parser.parse_args()
+
+    bag_parser = RosbagParser()
+
+    start = time.perf_counter()
+    serial = bag_parser.scan_directory(args.directory)
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = bag_parser.scan_directory(args.directory, workers=args.workers, timeout=args.timeout)
+    parallel_time = time.perf_counter() - start
+
+    identical = [m.to_dict() for m in serial] == [m.to_dict() for m in parallel]
+    print(f"bags: {len(serial)}")
+    print(f"serial:              {serial_time:8.3f}s")
+    print(f"parallel ({args.workers:2d} workers): {parallel_time:8.3f}s")
+    print(f"speedup: {serial_time / parallel_time:.2f}x, identical results: {identical}")
+
+
+if __name__ == "__main__":
+    main()
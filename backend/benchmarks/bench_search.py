@@ -0,0 +1,92 @@
+"""
+Benchmark full-text search latency on a large synthetic catalog.
+
+Usage:
+    python -m benchmarks.bench_search --bags 100000 --topics 10
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from bag_processor.database import RosbagMetadata
+from bag_processor.database.search import to_fts5_query
+
+from .bench_insert_many import open_database
+
+MAP_CATEGORIES = ["skidpad", "acceleration", "autox", "trackdrive"]
+QUERIES = ["trackdrive 2024-07*", "/rslidar*", "bag_4242", "autox 2024-07-1* /rslidar*"]
+
+
+def make_metadata(index: int, topic_count: int) -> RosbagMetadata:
+    """Create RosbagMetadata for a synthetic bag, every tenth bag has a lidar."""
+    map_category = MAP_CATEGORIES[index % len(MAP_CATEGORIES)]
+    topics = [
+        {"name": f"/vehicle/sensor_{topic}", "type": "std_msgs/msg/Header", "message_count": 10}
+        for topic in range(topic_count)
+    ]
+    if index % 10 == 0:
+        topics.append({"name": "/rslidar_points", "type": "sensor_msgs/msg/PointCloud2"})
+    month, day = 1 + (index // 28) % 12, 1 + index % 28
+    return RosbagMetadata(
+        file_path=f"/data/{map_category}/bag_{index}/bag_{index}.mcap",
+        file_name=f"bag_{index}.mcap",
+        file_type="mcap",
+        map_category=map_category,
+        start_time=f"2024-{month:02d}-{day:02d}-10-00-00",
+        end_time=f"2024-{month:02d}-{day:02d}-10-01-00",
+        duration=60.0,
+        size_mb=1024.0,
+        message_count=10 * topic_count,
+        topic_count=len(topics),
+        topics_json=json.dumps(topics),
+        metadata_json=json.dumps({}),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DatabaseManager.search_rosbags")
+    parser.add_argument("--bags", type=int, default=100000, help="Bags in the catalog")
+    parser.add_argument("--topics", type=int, default=10, help="Topics per bag")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_manager = open_database(os.path.join(tmp_dir, "search.db"))
+        db_manager.insert_many(
+            (make_metadata(index, args.topics) for index in range(args.bags)), batch_size=1000
+        )
+
+        print(f"{'query':<28} {'matches':>8} {'MATCH ids':>10} {'first 50 rows':>14}")
+        for query in QUERIES:
+            fts_query = to_fts5_query(query)
+            with db_manager.conn_pool.get_connection() as conn:
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    ids = conn.execute(
+                        text("SELECT rowid FROM rosbags_fts WHERE rosbags_fts MATCH :query"),
+                        {"query": fts_query},
+                    ).fetchall()
+                match_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    conn.execute(
+                        text(
+                            "SELECT rosbags.* FROM rosbags_fts "
+                            "JOIN rosbags ON rosbags.id = rosbags_fts.rowid "
+                            "WHERE rosbags_fts MATCH :query LIMIT 50"
+                        ),
+                        {"query": fts_query},
+                    ).fetchall()
+                page_ms = (time.perf_counter() - start) / args.repeat * 1000
+            print(f"{query:<28} {len(ids):>8} {match_ms:>7.2f} ms {page_ms:>11.2f} ms")
+        db_manager.close_db()
+
+
+if __name__ == "__main__":
+    main()
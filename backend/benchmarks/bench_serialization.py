@@ -0,0 +1,92 @@
+"""
+Benchmark serializing catalog rows to a JSON response, through the Rosbag models
+as before and with the unvalidated fast path.
+
+The model path repeats what happened per request: the service validated every
+row into a Rosbag, then FastAPI dumped the models, validated the dumps again
+against the response_model and serialized them.
+
+Usage:
+    python -m benchmarks.bench_serialization --bags 10000 --topics 20
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import List
+
+import docker
+from pydantic import TypeAdapter
+
+from .bench_insert_many import open_database
+from .bench_search import make_metadata
+
+
+def timed(func, repeat: int) -> float:
+    """Return the best time of func over repeat runs in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rosbag response serialization")
+    parser.add_argument("--bags", type=int, default=10000, help="Rows serialized")
+    parser.add_argument("--topics", type=int, default=20, help="Topics per bag")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "catalog.db")
+        db_manager = open_database(db_path)
+        db_manager.insert_many(
+            (make_metadata(index, args.topics) for index in range(args.bags)), batch_size=1000
+        )
+        columns = db_manager.get_list_columns() + ["topic_counts"]
+        rows = db_manager.list_rosbags(limit=args.bags, columns=columns).rows
+        db_manager.close_db()
+
+        # Importing the api package imports the routes, which open the database and a
+        # Docker client; no daemon is needed
+        os.environ["DATABASE_PATH"] = db_path
+        docker.from_env = lambda: None
+        from bag_processor.api.models import Rosbag
+        from bag_processor.api.schema import (
+            dump_json,
+            from_dicts_to_rosbag_responses,
+            from_dicts_to_rosbags,
+        )
+
+    adapter = TypeAdapter(List[Rosbag])
+
+    def model_path() -> bytes:
+        models = from_dicts_to_rosbags(rows)
+        dumped = [model.model_dump(by_alias=True) for model in models]
+        return adapter.dump_json(adapter.validate_python(dumped))
+
+    def fast_path() -> bytes:
+        return dump_json(from_dicts_to_rosbag_responses(rows))
+
+    def stdlib_path() -> bytes:
+        responses = from_dicts_to_rosbag_responses(rows)
+        return json.dumps(responses, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    assert json.loads(model_path()) == json.loads(fast_path())
+    size_mb = len(fast_path()) / 1e6
+    print(f"{len(rows)} rows, {size_mb:.1f} MB of JSON")
+    for name, func in (
+        ("Rosbag models + response_model", model_path),
+        ("fast path (orjson)", fast_path),
+        ("fast path (json fallback)", stdlib_path),
+    ):
+        seconds = timed(func, args.repeat)
+        print(f"{name:32} {seconds * 1000:7.1f} ms {len(rows) / seconds:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
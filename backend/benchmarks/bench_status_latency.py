@@ -0,0 +1,103 @@
+"""
+Load test of /api/rosbags/play/status latency while catalog listings run.
+
+The API app runs in-process behind httpx's ASGI transport, so all requests share
+one event loop like under uvicorn. A poller requests the playback status every
+few milliseconds while other clients keep listing a map category. The run is
+repeated with the database calls made directly on the event loop, as before
+AsyncDatabaseManager.
+
+Usage:
+    python -m benchmarks.bench_status_latency --bags 2000 --topics 20
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import docker
+import httpx
+import numpy as np
+
+from bag_processor.database import AsyncDatabaseManager
+
+from .bench_insert_many import open_database
+from .bench_search import make_metadata
+
+
+class InlineDatabaseManager(AsyncDatabaseManager):
+    """Runs the database calls on the event loop, the behavior before the executor."""
+
+    async def run(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+
+async def measure(app, duration: float, listers: int, interval: float):
+    """Poll the status endpoint while listers request the catalog, return latencies in ms."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = time.perf_counter() + duration
+        latencies = []
+        listings = 0
+
+        async def poll():
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                response = await client.post("/api/rosbags/play/status")
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(interval)
+
+        async def list_catalog():
+            nonlocal listings
+            while time.perf_counter() < stop:
+                response = await client.get("/api/rosbags/autox")
+                response.raise_for_status()
+                listings += 1
+
+        await asyncio.gather(poll(), *(list_catalog() for _ in range(listers)))
+    return np.array(latencies), listings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the playback status endpoint")
+    parser.add_argument("--bags", type=int, default=2000, help="Bags in the catalog")
+    parser.add_argument("--topics", type=int, default=20, help="Topics per bag")
+    parser.add_argument("--listers", type=int, default=4, help="Concurrent listing clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run")
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between polls")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "catalog.db")
+        db_manager = open_database(db_path)
+        db_manager.insert_many(
+            (make_metadata(index, args.topics) for index in range(args.bags)), batch_size=1000
+        )
+        db_manager.close_db()
+
+        # The routes module opens the database and a Docker client on import; the
+        # measured endpoints do not use Docker, so no daemon is needed
+        os.environ["DATABASE_PATH"] = db_path
+        docker.from_env = lambda: None
+        from bag_processor.api import app, routes
+
+        executor_manager = routes.database_service.db_manager
+        inline_manager = InlineDatabaseManager(executor_manager.db_manager, max_workers=1)
+        for name, manager in (("on event loop", inline_manager), ("executor", executor_manager)):
+            routes.database_service.db_manager = manager
+            ms, listings = asyncio.run(measure(app, args.duration, args.listers, args.interval))
+            print(
+                f"{name:>14}: {len(ms):5d} polls, p50 {np.percentile(ms, 50):7.2f} ms, "
+                f"p99 {np.percentile(ms, 99):7.2f} ms, max {ms.max():7.2f} ms, "
+                f"{listings} listings"
+            )
+            idle_ms, _ = asyncio.run(measure(app, 2.0, 0, args.interval))
+        print(f"{'idle':>14}: p50 {np.percentile(idle_ms, 50):7.2f} ms")
+        executor_manager.close_db()
+
+
+if __name__ == "__main__":
+    main()
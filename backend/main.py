@@ -10,8 +10,10 @@ import argparse
 import os
 import sys
 
+from bag_processor.bag_manager.fingerprint import FingerprintStore
 from bag_processor.bag_manager.parser import RosbagParser
-from bag_processor.database import DatabaseManager, DBConnectionPool, DBInitializer
+from bag_processor.bag_manager.watcher import BagFolderWatcher
+from bag_processor.database import DatabaseManager, DBConnectionPool, DBInitializer, SQLiteProfile
 
 
 def parse_args():
@@ -36,6 +38,73 @@ def parse_args():
         default=True,
         help="Recursively process subdirectories (default: True)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes used to parse bag folders (default: 1)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Seconds allowed per bag folder when parsing with several workers",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=100,
+        help="Number of bags written to the database per transaction (default: 100)",
+    )
+    parser.add_argument(
+        "--full-rescan",
+        action="store_true",
+        help="Parse every bag folder, even if it is unchanged since the last scan",
+    )
+    parser.add_argument(
+        "--yaml-cache",
+        type=str,
+        default=os.path.join(os.path.expanduser("~"), ".cache", "rosbag_cockpit", "metadata_yaml"),
+        help="Directory of the parsed metadata.yaml cache (default: ~/.cache/rosbag_cockpit/...)",
+    )
+    parser.add_argument(
+        "--no-yaml-cache",
+        action="store_true",
+        help="Parse every metadata.yaml without the cache",
+    )
+    parser.add_argument(
+        "--deep-scan",
+        action="store_true",
+        help="Read all message timestamps and store per-topic frequency, jitter and gaps",
+    )
+    parser.add_argument(
+        "--gap-factor",
+        type=float,
+        default=2.0,
+        help="Deep scan gap threshold as a multiple of a topic's median period (default: 2)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running after the scan and ingest new bag folders as they appear",
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Watch by polling instead of inotify, e.g. on network mounts",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between polling diffs in watch mode (default: 10)",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="Seconds a bag folder must stay unchanged before it is ingested (default: 2)",
+    )
     parser.add_argument(
         "--stats",
         action="store_true",
@@ -54,18 +123,23 @@ def main():
 
     # Initialize database connection pool
     db_conn_pool = DBConnectionPool(
-        db_url="sqlite:///rosbag_metadata.db",
+        db_url=f"sqlite:///{args.db}",
         pool_size=10,
         max_overflow=20,
         pool_timeout=30,
         pool_recycle=1800,
+        sqlite_profile=SQLiteProfile.from_env(),
     )
 
     # Create database manager with the connection pool
     db_manager = DatabaseManager(db_conn_pool=db_conn_pool)
 
     # Initialize parser
-    parser = RosbagParser()
+    parser = RosbagParser(
+        yaml_cache_dir=None if args.no_yaml_cache else args.yaml_cache,
+        deep_scan=args.deep_scan,
+        gap_factor=args.gap_factor,
+    )
 
     print(f"Using database: {args.db}")
     try:
@@ -92,13 +166,41 @@ def main():
             print(f"Processing bag files in directory: {args.dir}")
             print(f"Recursive search: {args.recursive}")
 
-            metadata_list = parser.scan_directory(args.dir, args.recursive)
-            print(f"Found {len(metadata_list)} bag files")
-
-            for metadata in metadata_list:
-                db_manager.insert_rosbag_metadata(metadata)
-
-            print(f"Successfully processed {len(metadata_list)} bag files")
+            fingerprints = None
+            if not args.full_rescan:
+                fingerprints = FingerprintStore(db_manager.get_bag_fingerprints())
+
+            # Bags are written in batches while the scan is still running
+            metadata_iter = parser.iter_scan_directory(
+                args.dir,
+                args.recursive,
+                workers=args.workers,
+                timeout=args.timeout,
+                fingerprints=fingerprints,
+            )
+            counts = db_manager.insert_many(metadata_iter, batch_size=args.batch_size)
+            if fingerprints is not None:
+                print(f"Skipped {len(fingerprints.skipped)} unchanged bag folders")
+                db_manager.save_bag_fingerprints(fingerprints.commit())
+
+            print(
+                f"Successfully processed {counts.total} bag files: {counts.inserted} new, "
+                f"{counts.updated} updated, {counts.unchanged} unchanged"
+            )
+
+            if args.watch:
+                watcher = BagFolderWatcher(
+                    args.dir,
+                    parser,
+                    db_manager,
+                    settle_seconds=args.settle,
+                    poll_interval=args.poll_interval,
+                    use_inotify=not args.poll,
+                )
+                try:
+                    watcher.run()
+                except KeyboardInterrupt:
+                    print("Stopped watching")
 
         if args.stats:
             db_manager.get_database_stats()
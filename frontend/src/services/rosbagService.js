@@ -1,9 +1,11 @@
 import api, { uploadFile } from './api'
 
-// 获取所有Rosbag列表
-export const getRosbags = async () => {
+// 获取一页Rosbag列表: { items, total, next_cursor }
+// params: limit, cursor, category, start_from, start_before, min_duration, max_duration,
+// min_size_mb, max_size_mb, sort (e.g. "-start_time"), search (e.g. "trackdrive 2024-07*")
+export const getRosbags = async (params = {}) => {
   try {
-    return await api.get('/rosbags')
+    return await api.get('/rosbags', { params })
   } catch (error) {
     throw error
   }